@@ -0,0 +1,111 @@
+"""
+Measure request latency and event loop lag of an asyncio service reading and
+writing images, with blocking ImageBuf calls versus OpenImageIO.aio.
+
+A ticker coroutine measures how late the event loop wakes it up, which is the
+latency any other request (health check, small RPC) would see. Results are
+printed as JSON.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import tempfile
+import time
+from typing import Dict, List
+
+
+def _percentiles(values: List[float]) -> Dict[str, float]:
+    values = sorted(values)
+    if not values:
+        return {}
+
+    def _at(fraction: float) -> float:
+        return values[min(len(values) - 1, int(fraction * len(values)))]
+
+    return {
+        "p50_ms": round(_at(0.50) * 1000, 2),
+        "p95_ms": round(_at(0.95) * 1000, 2),
+        "max_ms": round(values[-1] * 1000, 2),
+        "mean_ms": round(statistics.mean(values) * 1000, 2),
+    }
+
+
+async def _ticker(stop: asyncio.Event, lags: List[float], period: float) -> None:
+    loop = asyncio.get_running_loop()
+    while not stop.is_set():
+        start = loop.time()
+        await asyncio.sleep(period)
+        lags.append(loop.time() - start - period)
+
+
+async def _run(mode: str, src: str, tmp_dir: str, requests: int, concurrency: int):
+    import OpenImageIO as oiio  # pylint: disable=import-outside-toplevel
+    from OpenImageIO import aio  # pylint: disable=import-outside-toplevel
+
+    io = aio.AsyncImageIO(max_workers=concurrency)
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies: List[float] = []
+
+    async def _request(index: int) -> None:
+        async with semaphore:
+            start = time.perf_counter()
+            dst = os.path.join(tmp_dir, f"{mode}_{index}.exr")
+            if mode == "blocking":
+                buf = oiio.ImageBuf(src)
+                buf.read(force=True)
+                buf.write(dst, oiio.HALF)
+            else:
+                buf = await io.read(src)
+                await io.write(buf, dst, oiio.HALF)
+            latencies.append(time.perf_counter() - start)
+
+    lags: List[float] = []
+    stop = asyncio.Event()
+    ticker = asyncio.create_task(_ticker(stop, lags, 0.005))
+    start = time.perf_counter()
+    await asyncio.gather(*(_request(i) for i in range(requests)))
+    elapsed = time.perf_counter() - start
+    stop.set()
+    await ticker
+    await io.close()
+    return {
+        "mode": mode,
+        "requests": requests,
+        "concurrency": concurrency,
+        "seconds": round(elapsed, 3),
+        "requests_per_second": round(requests / elapsed, 2),
+        "request_latency": _percentiles(latencies),
+        "event_loop_lag": _percentiles(lags),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--width", type=int, default=2048)
+    parser.add_argument("--height", type=int, default=1080)
+    parser.add_argument("--requests", type=int, default=64)
+    parser.add_argument("--concurrency", type=int, default=8)
+    args = parser.parse_args()
+
+    import numpy as np  # pylint: disable=import-outside-toplevel
+    import OpenImageIO as oiio  # pylint: disable=import-outside-toplevel
+
+    results = []
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        src = os.path.join(tmp_dir, "source.exr")
+        pixels = np.random.default_rng(0).random(
+            (args.height, args.width, 4), dtype=np.float32
+        )
+        oiio.ImageBuf(pixels).write(src)
+        for mode in ("blocking", "aio"):
+            results.append(
+                asyncio.run(_run(mode, src, tmp_dir, args.requests, args.concurrency))
+            )
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
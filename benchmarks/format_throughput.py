@@ -0,0 +1,246 @@
+"""
+Measure read and write throughput and peak memory of every image format built
+into the wheel, at several resolutions and OpenImageIO thread counts.
+
+Each measurement runs in a separate process so peak RSS is measured in
+isolation. Throughput is in megapixels per second of the best of ``--repeat``
+runs. Results are printed, or written with ``--output``, as JSON together with
+the OpenImageIO version and build dependencies, so files from different wheel
+builds can be compared. Formats the wheel can't write are reported as skipped;
+read-only formats such as Ptex or UltraHDR JPEG can be measured on existing
+files with ``--read-file``.
+"""
+
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Any, Dict, List, Optional
+
+# name, extension, pixel type, channels, extra spec attributes
+CASES = [
+    ("exr-none", "exr", "half", 4, {"compression": "none"}),
+    ("exr-rle", "exr", "half", 4, {"compression": "rle"}),
+    ("exr-zips", "exr", "half", 4, {"compression": "zips"}),
+    ("exr-zip", "exr", "half", 4, {"compression": "zip"}),
+    ("exr-piz", "exr", "half", 4, {"compression": "piz"}),
+    ("exr-pxr24", "exr", "half", 4, {"compression": "pxr24"}),
+    ("exr-b44", "exr", "half", 4, {"compression": "b44"}),
+    ("exr-b44a", "exr", "half", 4, {"compression": "b44a"}),
+    ("exr-dwaa", "exr", "half", 4, {"compression": "dwaa"}),
+    ("exr-dwab", "exr", "half", 4, {"compression": "dwab"}),
+    ("tiff-none", "tif", "uint16", 3, {"compression": "none"}),
+    ("tiff-lzw", "tif", "uint16", 3, {"compression": "lzw"}),
+    ("tiff-zip", "tif", "uint16", 3, {"compression": "zip"}),
+    ("png", "png", "uint8", 4, {}),
+    ("jpeg", "jpg", "uint8", 3, {"compression": "jpeg:90"}),
+    ("webp", "webp", "uint8", 3, {"compression": "webp:90"}),
+    ("heif", "heic", "uint8", 3, {}),
+    ("avif", "avif", "uint8", 3, {}),
+    ("jxl", "jxl", "uint8", 3, {}),
+    ("jpeg2000", "jp2", "uint8", 3, {}),
+]
+
+
+def _peak_rss_mb() -> float:
+    import resource  # pylint: disable=import-outside-toplevel
+
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS reports bytes.
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+def _source(width: int, height: int, nchannels: int):
+    import numpy as np  # pylint: disable=import-outside-toplevel
+
+    # Smooth gradients with noise compress like photographs, unlike pure noise.
+    y, x = np.mgrid[0:height, 0:width].astype(np.float32)
+    planes = [x / width, y / height, (x + y) % 256 / 255, 1 - x / width]
+    pixels = np.stack(planes[:nchannels], -1)
+    pixels += np.random.default_rng(0).normal(0, 0.02, pixels.shape)
+    return np.clip(pixels, 0, 1).astype(np.float32)
+
+
+def _child(task: Dict[str, Any]) -> Dict[str, Any]:
+    import OpenImageIO as oiio  # pylint: disable=import-outside-toplevel
+
+    oiio.attribute("threads", task["threads"])
+    oiio.attribute("exr_threads", task["threads"])
+    path = task["path"]
+    if task["mode"] == "write":
+        buf = oiio.ImageBuf(_source(task["width"], task["height"], task["nchannels"]))
+        for name, value in task["attributes"].items():
+            buf.specmod().attribute(name, value)
+        dtype = oiio.TypeDesc(task["dtype"])
+
+        def run() -> bool:
+            return buf.write(path, dtype)
+
+    else:
+
+        def run() -> bool:
+            buf = oiio.ImageBuf(path)
+            return buf.read(force=True)
+
+    baseline = _peak_rss_mb()
+    best = float("inf")
+    # The first run loads the format plugin and is not timed.
+    for index in range(task["repeat"] + 1):
+        start = time.perf_counter()
+        if not run():
+            return {"error": oiio.geterror() or f"Failed to {task['mode']} {path}"}
+        if index:
+            best = min(best, time.perf_counter() - start)
+    inp = oiio.ImageInput.open(path)
+    megapixels = inp.spec().width * inp.spec().height / 1e6
+    inp.close()
+    return {
+        "seconds": round(best, 4),
+        "megapixels_per_second": round(megapixels / best, 2),
+        "file_bytes": os.path.getsize(path),
+        "peak_rss_mb": round(_peak_rss_mb(), 1),
+        "peak_rss_delta_mb": round(_peak_rss_mb() - baseline, 1),
+    }
+
+
+def _run_child(task: Dict[str, Any]) -> Dict[str, Any]:
+    output = subprocess.run(
+        [sys.executable, __file__, "--child", json.dumps(task)],
+        check=False,
+        capture_output=True,
+        text=True,
+    )
+    if output.returncode:
+        lines = output.stderr.strip().splitlines()
+        return {"error": lines[-1] if lines else f"exit code {output.returncode}"}
+    return json.loads(output.stdout.strip().splitlines()[-1])
+
+
+def _writable(ext: str) -> bool:
+    import OpenImageIO as oiio  # pylint: disable=import-outside-toplevel
+
+    if oiio.ImageOutput.create(ext) is None:
+        oiio.geterror()
+        return False
+    return True
+
+
+def _metadata() -> Dict[str, Any]:
+    import OpenImageIO as oiio  # pylint: disable=import-outside-toplevel
+
+    return {
+        "openimageio": oiio.__version__,
+        "dependencies": oiio.get_string_attribute("build:dependencies"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "machine": platform.machine(),
+        "cpu_count": os.cpu_count(),
+    }
+
+
+def run_benchmarks(
+    resolutions: List[str],
+    threads: List[int],
+    formats: Optional[List[str]] = None,
+    read_files: Optional[List[str]] = None,
+    repeat: int = 3,
+) -> Dict[str, Any]:
+    """Return the metadata and the results of every case, format and setting."""
+    results: List[Dict[str, Any]] = []
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        for name, ext, dtype, nchannels, attributes in CASES:
+            if formats and name not in formats and name.split("-")[0] not in formats:
+                continue
+            if not _writable(ext):
+                results.append({"case": name, "skipped": f"no {ext} writer"})
+                continue
+            for resolution in resolutions:
+                width, height = (int(v) for v in resolution.lower().split("x"))
+                path = os.path.join(tmp_dir, f"{name}_{resolution}.{ext}")
+                for nthreads in threads:
+                    result = {
+                        "case": name,
+                        "resolution": resolution,
+                        "threads": nthreads,
+                        "dtype": dtype,
+                        "nchannels": nchannels,
+                    }
+                    task = {
+                        "path": path,
+                        "width": width,
+                        "height": height,
+                        "nchannels": nchannels,
+                        "dtype": dtype,
+                        "attributes": attributes,
+                        "threads": nthreads,
+                        "repeat": repeat,
+                    }
+                    result["write"] = _run_child(dict(task, mode="write"))
+                    if "error" not in result["write"]:
+                        result["read"] = _run_child(dict(task, mode="read"))
+                    results.append(result)
+        for path in read_files or []:
+            for nthreads in threads:
+                task = {"path": path, "threads": nthreads, "repeat": repeat}
+                results.append(
+                    {
+                        "case": os.path.basename(path),
+                        "threads": nthreads,
+                        "read": _run_child(dict(task, mode="read")),
+                    }
+                )
+    return {"metadata": _metadata(), "results": results}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument(
+        "--resolutions",
+        nargs="+",
+        default=["512x512", "1920x1080", "3840x2160"],
+        help="WIDTHxHEIGHT sizes.",
+    )
+    parser.add_argument(
+        "--threads",
+        nargs="+",
+        type=int,
+        default=[1, 0],
+        help="OpenImageIO thread counts, 0 uses all cores.",
+    )
+    parser.add_argument(
+        "--formats",
+        nargs="+",
+        default=None,
+        help="Cases or families to run, e.g. exr-zip jpeg tiff.",
+    )
+    parser.add_argument(
+        "--read-file",
+        action="append",
+        default=[],
+        help="Also measure reading an existing file, e.g. a Ptex or UltraHDR file.",
+    )
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("-o", "--output", default=None, help="JSON results path.")
+    parser.add_argument("--child", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        print(json.dumps(_child(json.loads(args.child))))
+        return
+
+    report = run_benchmarks(
+        args.resolutions, args.threads, args.formats, args.read_file, args.repeat
+    )
+    if args.output:
+        with open(args.output, "w", encoding="utf8") as f:
+            json.dump(report, f, indent=2)
+    else:
+        print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
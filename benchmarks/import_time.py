@@ -0,0 +1,105 @@
+"""
+Measure cold import latency of the OpenImageIO and PyOpenColorIO packages.
+
+Each sample runs in a fresh interpreter so the native extensions are loaded
+from scratch, in both eager and lazy (OIIO_PYTHON_LAZY_IMPORT=1) modes.
+Results are printed as JSON so they can be compared across releases.
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+SNIPPETS = {
+    "import": "import {module}",
+    "import+access": "import {module}; {module}.__version__",
+}
+
+
+def _measure(module: str, snippet: str, lazy: bool) -> float:
+    code = (
+        "import time\n"
+        "_start = time.perf_counter()\n"
+        f"{snippet.format(module=module)}\n"
+        "print(time.perf_counter() - _start)\n"
+    )
+    env = os.environ.copy()
+    env["OIIO_PYTHON_LAZY_IMPORT"] = "1" if lazy else "0"
+    result = subprocess.run(
+        [sys.executable, "-c", code],
+        check=True,
+        capture_output=True,
+        text=True,
+        env=env,
+    )
+    return float(result.stdout.strip().splitlines()[-1]) * 1000.0
+
+
+def run(modules, repeat: int) -> list:
+    """Run the import benchmark and return one result dict per case."""
+    results = []
+    for module in modules:
+        for lazy in (False, True):
+            for case, snippet in SNIPPETS.items():
+                samples = [_measure(module, snippet, lazy) for _ in range(repeat)]
+                results.append(
+                    {
+                        "module": module,
+                        "mode": "lazy" if lazy else "eager",
+                        "case": case,
+                        "min_ms": round(min(samples), 3),
+                        "median_ms": round(statistics.median(samples), 3),
+                        "max_ms": round(max(samples), 3),
+                        "repeat": repeat,
+                    }
+                )
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument(
+        "--modules",
+        nargs="+",
+        default=["OpenImageIO", "PyOpenColorIO"],
+        help="Packages to import.",
+    )
+    parser.add_argument("--repeat", type=int, default=10, help="Samples per case.")
+    parser.add_argument(
+        "--budget-ms",
+        type=float,
+        default=None,
+        help="Fail if the median lazy 'import' case exceeds this budget.",
+    )
+    parser.add_argument("--output", default=None, help="Write JSON results here.")
+    args = parser.parse_args()
+
+    results = run(args.modules, args.repeat)
+    report = json.dumps(results, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf8") as f:
+            f.write(report)
+    print(report)
+
+    if args.budget_ms is not None:
+        over_budget = [
+            r
+            for r in results
+            if r["mode"] == "lazy"
+            and r["case"] == "import"
+            and r["median_ms"] > args.budget_ms
+        ]
+        for r in over_budget:
+            print(
+                f"Error: lazy import of {r['module']} took {r['median_ms']} ms, "
+                f"budget is {args.budget_ms} ms."
+            )
+        if over_budget:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
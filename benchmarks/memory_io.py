@@ -0,0 +1,83 @@
+"""
+Compare decoding and encoding images in memory, with OpenImageIO.memory_io,
+against the temporary file round trip it replaces, for JPEG, PNG and EXR.
+
+The temporary file path writes the received bytes to a file and reads it back
+with an ImageBuf, or writes an ImageBuf and reads the file bytes. Results are
+printed as JSON, in milliseconds per image.
+"""
+
+import argparse
+import json
+import os
+import tempfile
+import time
+from typing import Callable, Dict
+
+
+def _best_of(func: Callable[[], object], repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return round(best * 1000, 3)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--width", type=int, default=1920)
+    parser.add_argument("--height", type=int, default=1080)
+    parser.add_argument("--repeat", type=int, default=10)
+    args = parser.parse_args()
+
+    import numpy as np  # pylint: disable=import-outside-toplevel
+    import OpenImageIO as oiio  # pylint: disable=import-outside-toplevel
+    from OpenImageIO import memory_io  # pylint: disable=import-outside-toplevel
+
+    # Smooth gradients with noise compress like photographs, unlike pure noise.
+    y, x = np.mgrid[0 : args.height, 0 : args.width].astype(np.float32)
+    pixels = np.stack([x / args.width, y / args.height, (x + y) % 256 / 255], -1)
+    pixels += np.random.default_rng(0).normal(0, 0.02, pixels.shape)
+    buf = oiio.ImageBuf(np.clip(pixels, 0, 1).astype(np.float32))
+
+    results = []
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        for ext, dtype in (
+            ("jpg", oiio.UINT8),
+            ("png", oiio.UINT8),
+            ("exr", oiio.HALF),
+        ):
+            data = memory_io.write(buf, ext, dtype)
+            path = os.path.join(tmp_dir, f"image.{ext}")
+
+            def _decode_file() -> None:
+                with open(path, "wb") as f:
+                    f.write(data)
+                image = oiio.ImageBuf(path)
+                image.read(force=True)
+                os.unlink(path)
+
+            def _encode_file() -> None:
+                buf.write(path, dtype)
+                with open(path, "rb") as f:
+                    f.read()
+                os.unlink(path)
+
+            timings: Dict[str, object] = {
+                "format": ext,
+                "bytes": len(data),
+                "ioproxy": memory_io.HAS_IOPROXY,
+                "decode_memory_ms": _best_of(lambda: memory_io.read(data), args.repeat),
+                "decode_tempfile_ms": _best_of(_decode_file, args.repeat),
+                "encode_memory_ms": _best_of(
+                    lambda: memory_io.write(buf, ext, dtype), args.repeat
+                ),
+                "encode_tempfile_ms": _best_of(_encode_file, args.repeat),
+            }
+            results.append(timings)
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,105 @@
+"""
+Compare peak memory of writing a large EXR from a whole ImageBuf versus
+streaming it band by band with OpenImageIO.streaming.ImageStreamWriter.
+
+Each mode runs in a separate process so peak RSS is measured in isolation.
+Results are printed as JSON.
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+
+def _peak_rss_mb() -> float:
+    import resource  # pylint: disable=import-outside-toplevel
+
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS reports bytes.
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+def _child(mode: str, width: int, height: int, rows: int, path: str) -> None:
+    import numpy as np  # pylint: disable=import-outside-toplevel
+    import OpenImageIO as oiio  # pylint: disable=import-outside-toplevel
+    from OpenImageIO.streaming import (  # pylint: disable=import-outside-toplevel
+        ImageStreamWriter,
+    )
+
+    baseline = _peak_rss_mb()
+    start = time.perf_counter()
+    rng = np.random.default_rng(0)
+    if mode == "whole":
+        pixels = rng.random((height, width, 4), dtype=np.float32)
+        buf = oiio.ImageBuf(pixels)
+        buf.write(path, oiio.HALF)
+    else:
+        spec = oiio.ImageSpec(width, height, 4, oiio.HALF)
+        with ImageStreamWriter(path, spec) as writer:
+            for y in range(0, height, rows):
+                yend = min(y + rows, height)
+                band = rng.random((yend - y, width, 4), dtype=np.float32)
+                writer.write(oiio.ROI(0, width, y, yend), band)
+    elapsed = time.perf_counter() - start
+    print(
+        json.dumps(
+            {
+                "mode": mode,
+                "width": width,
+                "height": height,
+                "seconds": round(elapsed, 3),
+                "baseline_rss_mb": round(baseline, 1),
+                "peak_rss_mb": round(_peak_rss_mb(), 1),
+            }
+        )
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--width", type=int, default=8192)
+    parser.add_argument("--height", type=int, default=4320)
+    parser.add_argument("--rows", type=int, default=64, help="Rows per block.")
+    parser.add_argument(
+        "--child", choices=["whole", "streaming"], help=argparse.SUPPRESS
+    )
+    parser.add_argument("--path", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        _child(args.child, args.width, args.height, args.rows, args.path)
+        return
+
+    results = []
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        for mode in ("whole", "streaming"):
+            path = os.path.join(tmp_dir, f"{mode}.exr")
+            output = subprocess.run(
+                [
+                    sys.executable,
+                    __file__,
+                    "--child",
+                    mode,
+                    "--path",
+                    path,
+                    "--width",
+                    str(args.width),
+                    "--height",
+                    str(args.height),
+                    "--rows",
+                    str(args.rows),
+                ],
+                check=True,
+                capture_output=True,
+                text=True,
+            ).stdout
+            results.append(json.loads(output.strip().splitlines()[-1]))
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+"""
+Measure the overhead of the console script wrappers around the bundled tools.
+
+Compares running the native tool directly against the Python wrapper in both
+launch modes (OIIO_PYTHON_TOOL_LAUNCH=exec and =subprocess). Results are
+printed as JSON.
+"""
+
+import argparse
+import importlib.util
+import json
+import os
+import shutil
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+
+def _native_tool(package: str, tool: str) -> Path:
+    # Locate the package without importing it, to keep the native extension unloaded.
+    spec = importlib.util.find_spec(package)
+    if spec is None or not spec.submodule_search_locations:
+        raise RuntimeError(f"{package} package not found.")
+    return Path(list(spec.submodule_search_locations)[0]) / "tools" / tool
+
+
+def _time_command(cmd: list, env: dict, repeat: int) -> list:
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        subprocess.run(
+            cmd, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+        )
+        samples.append((time.perf_counter() - start) * 1000.0)
+    return samples
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--tool", default="iinfo", help="Tool to launch.")
+    parser.add_argument(
+        "--package",
+        default="OpenImageIO",
+        help="Package shipping the tool (OpenImageIO or PyOpenColorIO).",
+    )
+    parser.add_argument("--repeat", type=int, default=50, help="Launches per case.")
+    parser.add_argument(
+        "tool_args", nargs="*", default=["--help"], help="Arguments for the tool."
+    )
+    args = parser.parse_args()
+
+    wrapper = shutil.which(args.tool)
+    if wrapper is None:
+        sys.exit(f"Error: {args.tool} console script not found on PATH.")
+
+    cases = {
+        "native": ([str(_native_tool(args.package, args.tool))], {}),
+        "wrapper-exec": ([wrapper], {"OIIO_PYTHON_TOOL_LAUNCH": "exec"}),
+        "wrapper-subprocess": ([wrapper], {"OIIO_PYTHON_TOOL_LAUNCH": "subprocess"}),
+    }
+
+    results = []
+    for case, (cmd, extra_env) in cases.items():
+        env = os.environ.copy()
+        env.update(extra_env)
+        samples = _time_command(cmd + args.tool_args, env, args.repeat)
+        results.append(
+            {
+                "tool": args.tool,
+                "case": case,
+                "min_ms": round(min(samples), 3),
+                "median_ms": round(statistics.median(samples), 3),
+                "repeat": args.repeat,
+            }
+        )
+
+    native_ms = results[0]["median_ms"]
+    for result in results:
+        result["overhead_ms"] = round(result["median_ms"] - native_ms, 3)
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
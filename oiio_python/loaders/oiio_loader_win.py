@@ -1,10 +1,68 @@
-import os
-from pathlib import Path
-
-_oiio_site_dir: Path = Path(__file__).parent.resolve()
-_ocio_site_dir: Path = _oiio_site_dir.parent / "PyOpenColorIO"
-with os.add_dll_directory(_oiio_site_dir.as_posix()), os.add_dll_directory(
-    _ocio_site_dir.as_posix()
-):
-    from .OpenImageIO import *
-    from .OpenImageIO import __version__
+import importlib as _importlib
+import os as _os
+import threading as _threading
+from pathlib import Path as _Path
+
+_oiio_site_dir = _Path(__file__).parent.resolve()
+_ocio_site_dir = _oiio_site_dir.parent / "PyOpenColorIO"
+
+# Set OIIO_PYTHON_LAZY_IMPORT=1 to defer loading the native extension (and all
+# the image format libraries it links) until the first attribute access.
+_lazy_import = _os.getenv("OIIO_PYTHON_LAZY_IMPORT", "0") == "1"
+
+if not _lazy_import:
+    with _os.add_dll_directory(_oiio_site_dir.as_posix()), _os.add_dll_directory(
+        _ocio_site_dir.as_posix()
+    ):
+        from .OpenImageIO import *
+        from .OpenImageIO import __version__
+
+_native = None
+_native_lock = _threading.Lock()
+
+
+def _public_names(module):
+    names = getattr(module, "__all__", None)
+    if names is None:
+        names = [name for name in dir(module) if not name.startswith("_")]
+    return list(names)
+
+
+def _load_native():
+    global _native
+    with _native_lock:
+        if _native is None:
+            with _os.add_dll_directory(
+                _oiio_site_dir.as_posix()
+            ), _os.add_dll_directory(_ocio_site_dir.as_posix()):
+                native = _importlib.import_module(".OpenImageIO", __name__)
+            # Cache public names so later lookups bypass __getattr__.
+            namespace = globals()
+            for name in _public_names(native):
+                namespace.setdefault(name, getattr(native, name))
+            namespace["__version__"] = native.__version__
+            _native = native
+    return _native
+
+
+def __getattr__(name):
+    if not _lazy_import or (
+        name.startswith("__") and name not in ("__all__", "__version__")
+    ):
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    native = _load_native()
+    if name == "__all__":
+        return _public_names(native)
+    try:
+        return getattr(native, name)
+    except AttributeError:
+        raise AttributeError(
+            f"module {__name__!r} has no attribute {name!r}"
+        ) from None
+
+
+def __dir__():
+    names = set(globals())
+    if _lazy_import:
+        names.update(_public_names(_load_native()))
+    return sorted(names)
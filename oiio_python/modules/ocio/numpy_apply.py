@@ -0,0 +1,178 @@
+"""
+Apply OpenColorIO processors to whole NumPy images.
+
+Images of shape (height, width, channels) are split into bands of rows, each
+band is wrapped in a ``PackedImageDesc`` and processed by ``CPUProcessor.apply``
+in a thread pool. ``apply`` releases the GIL, so bands run in parallel.
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional, Union
+
+import numpy as np
+import PyOpenColorIO as ocio
+
+from ._workers import cpu_count
+from .processor_cache import get_cpu_processor
+
+_BIT_DEPTHS = {
+    np.dtype(np.float32): ocio.BIT_DEPTH_F32,
+    np.dtype(np.float16): ocio.BIT_DEPTH_F16,
+    np.dtype(np.uint16): ocio.BIT_DEPTH_UINT16,
+    np.dtype(np.uint8): ocio.BIT_DEPTH_UINT8,
+}
+
+AnyProcessor = Union[ocio.Processor, ocio.CPUProcessor]
+
+
+def _bit_depth(pixels: np.ndarray) -> ocio.BitDepth:
+    if pixels.ndim != 3 or pixels.shape[2] not in (3, 4):
+        raise ValueError(
+            f"Expected an array of shape (height, width, 3 or 4), got {pixels.shape}."
+        )
+    try:
+        return _BIT_DEPTHS[pixels.dtype]
+    except KeyError:
+        raise ValueError(f"Unsupported pixel type {pixels.dtype}.") from None
+
+
+def _cpu_processor(
+    processor: AnyProcessor, in_bit_depth: ocio.BitDepth, out_bit_depth: ocio.BitDepth
+) -> ocio.CPUProcessor:
+    if isinstance(processor, ocio.CPUProcessor):
+        if (
+            processor.getInputBitDepth() != in_bit_depth
+            or processor.getOutputBitDepth() != out_bit_depth
+        ):
+            raise ValueError(
+                "CPUProcessor bit depths don't match the arrays, "
+                f"expected {in_bit_depth} -> {out_bit_depth}."
+            )
+        return processor
+    return processor.getOptimizedCPUProcessor(
+        in_bit_depth, out_bit_depth, ocio.OPTIMIZATION_DEFAULT
+    )
+
+
+def _desc(band: np.ndarray, bit_depth: ocio.BitDepth) -> ocio.PackedImageDesc:
+    height, width, channels = band.shape
+    return ocio.PackedImageDesc(
+        band,
+        width,
+        height,
+        channels,
+        bit_depth,
+        band.strides[2],
+        band.strides[1],
+        band.strides[0],
+    )
+
+
+def _run(
+    cpu: ocio.CPUProcessor,
+    src: np.ndarray,
+    dst: np.ndarray,
+    rows: int,
+    workers: Optional[int],
+) -> None:
+    in_bit_depth = _BIT_DEPTHS[src.dtype]
+    out_bit_depth = _BIT_DEPTHS[dst.dtype]
+    inplace = src is dst
+
+    def _apply(y: int) -> None:
+        src_band = src[y : y + rows]
+        if inplace:
+            cpu.apply(_desc(src_band, in_bit_depth))
+        else:
+            cpu.apply(
+                _desc(src_band, in_bit_depth),
+                _desc(dst[y : y + rows], out_bit_depth),
+            )
+
+    height = src.shape[0]
+    rows = max(1, rows)
+    bands = range(0, height, rows)
+    workers = min(workers or cpu_count(), len(bands))
+    if workers <= 1:
+        for y in bands:
+            _apply(y)
+        return
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        # Consume results so exceptions raised in workers are propagated.
+        for _ in executor.map(_apply, bands):
+            pass
+
+
+def apply_inplace(
+    processor: AnyProcessor,
+    pixels: np.ndarray,
+    rows: int = 64,
+    workers: Optional[int] = None,
+) -> np.ndarray:
+    """
+    Apply ``processor`` to ``pixels`` in place and return ``pixels``.
+
+    ``pixels`` is a C-contiguous float32, float16, uint16 or uint8 array of shape
+    (height, width, 3 or 4). A ``CPUProcessor`` must have matching input and
+    output bit depths, a ``Processor`` is optimized for the array type.
+    ``rows`` is the number of scanlines per band and ``workers`` the number of
+    threads, defaulting to the number of usable CPUs.
+    """
+    bit_depth = _bit_depth(pixels)
+    if not pixels.flags.c_contiguous or not pixels.flags.writeable:
+        raise ValueError("In place processing needs a writable C-contiguous array.")
+    cpu = _cpu_processor(processor, bit_depth, bit_depth)
+    _run(cpu, pixels, pixels, rows, workers)
+    return pixels
+
+
+def apply(
+    processor: AnyProcessor,
+    pixels: np.ndarray,
+    out: Optional[np.ndarray] = None,
+    dtype: Optional[np.dtype] = None,
+    rows: int = 64,
+    workers: Optional[int] = None,
+) -> np.ndarray:
+    """
+    Apply ``processor`` to ``pixels`` and return the result in a new array.
+
+    The result is written to ``out`` when given, otherwise to a new array of
+    type ``dtype`` (the type of ``pixels`` by default). ``out`` must have the
+    same shape as ``pixels`` and be C-contiguous. See :func:`apply_inplace`.
+    """
+    in_bit_depth = _bit_depth(pixels)
+    pixels = np.ascontiguousarray(pixels)
+    if out is None:
+        out = np.empty(pixels.shape, dtype=dtype or pixels.dtype)
+    elif out.shape != pixels.shape or not out.flags.c_contiguous:
+        raise ValueError(f"out must be a C-contiguous array of shape {pixels.shape}.")
+    out_bit_depth = _bit_depth(out)
+    cpu = _cpu_processor(processor, in_bit_depth, out_bit_depth)
+    _run(cpu, pixels, out, rows, workers)
+    return out
+
+
+def convert(
+    pixels: np.ndarray,
+    src: str,
+    dst: str,
+    looks: str = "",
+    config: Optional[ocio.Config] = None,
+    inplace: bool = False,
+    rows: int = 64,
+    workers: Optional[int] = None,
+) -> np.ndarray:
+    """
+    Convert ``pixels`` from the ``src`` to the ``dst`` color space.
+
+    The CPU processor is taken from :mod:`PyOpenColorIO.processor_cache`, so
+    converting many images with the same spaces compiles the transform once.
+    """
+    bit_depth = _bit_depth(pixels)
+    cpu = get_cpu_processor(
+        src, dst, looks, config, in_bit_depth=bit_depth, out_bit_depth=bit_depth
+    )
+    if inplace:
+        return apply_inplace(cpu, pixels, rows, workers)
+    return apply(cpu, pixels, rows=rows, workers=workers)
@@ -0,0 +1,156 @@
+"""
+Memoize OpenColorIO processors so repeated conversions skip transform compilation.
+
+Processors are keyed by the config cache ID, source and destination color
+spaces, looks, optimization flags and bit depths, and kept in a bounded,
+thread-safe LRU cache.
+"""
+
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Optional
+
+import PyOpenColorIO as ocio
+
+
+class ProcessorCache:
+    """Thread-safe LRU cache of ``Processor`` and ``CPUProcessor`` objects."""
+
+    def __init__(self, maxsize: int = 128) -> None:
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._entries: "OrderedDict[Hashable, Any]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _get(self, key: Hashable, build) -> Any:
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return self._entries[key]
+            self.misses += 1
+        # Build outside of the lock, compiling a transform can take a while.
+        value = build()
+        with self._lock:
+            value = self._entries.setdefault(key, value)
+            self._entries.move_to_end(key)
+            self._evict()
+        return value
+
+    def _evict(self) -> None:
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+
+    def get_processor(
+        self,
+        src: str,
+        dst: str,
+        looks: str = "",
+        config: Optional[ocio.Config] = None,
+    ) -> ocio.Processor:
+        """Return the processor converting ``src`` to ``dst`` through ``looks``."""
+        config = config or ocio.GetCurrentConfig()
+        key = ("processor", config.getCacheID(), src, dst, looks)
+
+        def _build() -> ocio.Processor:
+            if looks:
+                return config.getProcessor(ocio.LookTransform(src, dst, looks))
+            return config.getProcessor(src, dst)
+
+        return self._get(key, _build)
+
+    def get_cpu_processor(
+        self,
+        src: str,
+        dst: str,
+        looks: str = "",
+        config: Optional[ocio.Config] = None,
+        optimization: ocio.OptimizationFlags = ocio.OPTIMIZATION_DEFAULT,
+        in_bit_depth: ocio.BitDepth = ocio.BIT_DEPTH_F32,
+        out_bit_depth: Optional[ocio.BitDepth] = None,
+    ) -> ocio.CPUProcessor:
+        """
+        Return the CPU processor converting ``src`` to ``dst`` through ``looks``.
+
+        ``out_bit_depth`` defaults to ``in_bit_depth``.
+        """
+        config = config or ocio.GetCurrentConfig()
+        if out_bit_depth is None:
+            out_bit_depth = in_bit_depth
+        key = (
+            "cpu",
+            config.getCacheID(),
+            src,
+            dst,
+            looks,
+            int(optimization),
+            int(in_bit_depth),
+            int(out_bit_depth),
+        )
+
+        def _build() -> ocio.CPUProcessor:
+            processor = self.get_processor(src, dst, looks, config)
+            return processor.getOptimizedCPUProcessor(
+                in_bit_depth, out_bit_depth, optimization
+            )
+
+        return self._get(key, _build)
+
+    def stats(self) -> Dict[str, int]:
+        """Return hit/miss counters and the current cache size."""
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "size": len(self._entries),
+                "maxsize": self.maxsize,
+            }
+
+    def resize(self, maxsize: int) -> None:
+        """Change the cache size, evicting the oldest entries if needed."""
+        with self._lock:
+            self.maxsize = maxsize
+            self._evict()
+
+    def clear(self) -> None:
+        """Drop all cached processors and reset counters."""
+        with self._lock:
+            self._entries.clear()
+            self.hits = 0
+            self.misses = 0
+
+
+_default_cache = ProcessorCache()
+
+
+def get_processor(
+    src: str, dst: str, looks: str = "", config: Optional[ocio.Config] = None
+) -> ocio.Processor:
+    """Return a processor from the module level cache."""
+    return _default_cache.get_processor(src, dst, looks, config)
+
+
+def get_cpu_processor(
+    src: str,
+    dst: str,
+    looks: str = "",
+    config: Optional[ocio.Config] = None,
+    optimization: ocio.OptimizationFlags = ocio.OPTIMIZATION_DEFAULT,
+    in_bit_depth: ocio.BitDepth = ocio.BIT_DEPTH_F32,
+    out_bit_depth: Optional[ocio.BitDepth] = None,
+) -> ocio.CPUProcessor:
+    """Return a CPU processor from the module level cache."""
+    return _default_cache.get_cpu_processor(
+        src, dst, looks, config, optimization, in_bit_depth, out_bit_depth
+    )
+
+
+def cache_stats() -> Dict[str, int]:
+    """Return statistics of the module level cache."""
+    return _default_cache.stats()
+
+
+def set_cache_size(maxsize: int) -> None:
+    """Resize the module level cache, evicting the oldest entries if needed."""
+    _default_cache.resize(maxsize)
@@ -0,0 +1,75 @@
+"""Read images band by band of rows, without decoding whole files."""
+
+import threading
+from typing import Optional
+
+import numpy as np
+import OpenImageIO as oiio
+
+# Rows of the tiles emulated for untiled files, a power of two.
+BAND_ROWS = 64
+
+_cache: Optional[oiio.ImageCache] = None
+_cache_lock = threading.Lock()
+
+
+def band_cache(max_memory_mb: Optional[float] = None) -> oiio.ImageCache:
+    """
+    Return this process' ImageCache for band reads, setting its memory limit.
+
+    ``ImageBuf`` decodes whole files on first access. This private cache has
+    ``autotile`` and ``autoscanline`` set instead, so reading rows of an
+    untiled file only decodes the :data:`BAND_ROWS` bands holding them.
+    """
+    global _cache  # pylint: disable=global-statement
+    with _cache_lock:
+        if _cache is None:
+            cache = oiio.ImageCache(False)
+            cache.attribute("autotile", BAND_ROWS)
+            cache.attribute("autoscanline", 1)
+            _cache = cache
+        if max_memory_mb is not None:
+            _cache.attribute("max_memory_MB", float(max_memory_mb))
+        return _cache
+
+
+def read_spec(cache: oiio.ImageCache, path: str) -> oiio.ImageSpec:
+    """Return the spec of ``path``, raising RuntimeError if it can't be read."""
+    spec = cache.get_imagespec(path)
+    error = cache.geterror()
+    if error or spec is None:
+        raise RuntimeError(error or f"Could not read {path}.")
+    return spec
+
+
+def read_rows(
+    cache: oiio.ImageCache,
+    path: str,
+    spec: oiio.ImageSpec,
+    ybegin: int,
+    yend: int,
+    z: int = 0,
+    format: oiio.TypeDesc = oiio.TypeUnknown,  # pylint: disable=redefined-builtin
+    miplevel: int = 0,
+) -> np.ndarray:
+    """
+    Return rows ``ybegin`` to ``yend`` of slice ``z`` of ``path``, full width.
+
+    Pixels have shape (rows, width, nchannels) and the ``format`` type, the
+    file data type by default. ``spec`` is the spec of the ``miplevel`` read.
+    """
+    pixels = cache.get_pixels(
+        path,
+        0,
+        miplevel,
+        spec.x,
+        spec.x + spec.width,
+        ybegin,
+        yend,
+        z,
+        z + 1,
+        format,
+    )
+    if pixels is None:
+        raise RuntimeError(cache.geterror() or f"Could not read {path}.")
+    return pixels.reshape(yend - ybegin, spec.width, spec.nchannels)
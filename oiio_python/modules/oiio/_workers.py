@@ -0,0 +1,63 @@
+"""
+Helpers to size Python worker pools next to OpenImageIO's own threads.
+
+This module is also shipped in PyOpenColorIO, so it only imports OpenImageIO
+when needed.
+"""
+
+import os
+import warnings
+from typing import Optional, Tuple
+
+
+def cpu_count() -> int:
+    """Return the number of CPUs usable by this process."""
+    if hasattr(os, "sched_getaffinity"):
+        return max(1, len(os.sched_getaffinity(0)))
+    return max(1, os.cpu_count() or 1)
+
+
+def split_threads(
+    workers: Optional[int] = None, threads: Optional[int] = None
+) -> Tuple[int, int]:
+    """
+    Return a (workers, threads per worker) pair that does not oversubscribe cores.
+
+    Missing values are derived from the CPU count, so that the Python pool size
+    multiplied by the OpenImageIO threads used by each job matches the number of
+    available cores.
+    """
+    cores = cpu_count()
+    if workers is None or workers <= 0:
+        workers = cores if threads is None or threads <= 0 else max(1, cores // threads)
+    if threads is None or threads <= 0:
+        threads = max(1, cores // workers)
+    check_oversubscription(workers, threads, stacklevel=3)
+    return workers, threads
+
+
+def check_oversubscription(
+    workers: int, threads: Optional[int] = None, stacklevel: int = 2
+) -> bool:
+    """
+    Warn and return True if ``workers`` x ``threads`` exceeds the CPU count.
+
+    ``threads`` defaults to the current OpenImageIO ``threads`` attribute, 0
+    meaning one thread per core. ``stacklevel`` is passed to
+    ``warnings.warn``, the default pointing at the caller of this function.
+    """
+    cores = cpu_count()
+    if threads is None:
+        import OpenImageIO as oiio  # pylint: disable=import-outside-toplevel
+
+        threads = oiio.get_int_attribute("threads")
+    threads = threads if threads > 0 else cores
+    if workers * threads <= cores:
+        return False
+    warnings.warn(
+        f"{workers} workers x {threads} OpenImageIO threads oversubscribe "
+        f"{cores} cores, expect contention.",
+        RuntimeWarning,
+        stacklevel=stacklevel,
+    )
+    return True
@@ -0,0 +1,250 @@
+"""
+Awaitable image I/O for asyncio applications.
+
+``ImageBuf.read`` and ``ImageBuf.write`` release the GIL, so running them in a
+thread pool keeps the event loop responsive. :class:`AsyncImageIO` bounds that
+pool and the number of pixel bytes in flight: once the budget is used, new
+requests wait for earlier ones to finish instead of piling up decoded images
+in memory::
+
+    buf = await aio.read("plate.exr")
+    await aio.write(buf, "plate.jpg", oiio.UINT8)
+
+Cancelling a request that did not start yet drops it. A request already
+running in a thread completes, but its bytes stay reserved until it does.
+"""
+
+import asyncio
+import weakref
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Optional, Tuple
+
+import OpenImageIO as oiio
+
+from ._workers import cpu_count
+from .convert_tree import convert_file
+
+
+def _check(ok: bool, buf: oiio.ImageBuf) -> oiio.ImageBuf:
+    if not ok or buf.has_error:
+        raise RuntimeError(buf.geterror() or oiio.geterror())
+    return buf
+
+
+def _nbytes(spec: oiio.ImageSpec, format: oiio.TypeDesc) -> int:
+    # pylint: disable=redefined-builtin
+    format = oiio.TypeDesc(format)
+    if format == oiio.TypeUnknown:
+        format = spec.format
+    return spec.width * spec.height * spec.depth * spec.nchannels * format.size()
+
+
+def _read_spec(path: str, subimage: int, miplevel: int) -> oiio.ImageSpec:
+    buf = oiio.ImageBuf()
+    _check(buf.init_spec(path, subimage, miplevel), buf)
+    return oiio.ImageSpec(buf.spec())
+
+
+def _read(
+    path: str, subimage: int, miplevel: int, format: oiio.TypeDesc
+) -> oiio.ImageBuf:
+    # pylint: disable=redefined-builtin
+    buf = oiio.ImageBuf(path, subimage, miplevel)
+    return _check(buf.read(subimage, miplevel, force=True, convert=format), buf)
+
+
+def _write(buf: oiio.ImageBuf, path: str, dtype: oiio.TypeDesc) -> None:
+    _check(buf.write(path, dtype), buf)
+
+
+class _ByteBudget:
+    """Async counting semaphore over bytes, admitting one oversized request alone."""
+
+    def __init__(self, limit: int) -> None:
+        self.limit = limit
+        self.used = 0
+        self._cond = asyncio.Condition()
+
+    async def acquire(self, nbytes: int) -> None:
+        async with self._cond:
+            await self._cond.wait_for(
+                lambda: self.used == 0 or self.used + nbytes <= self.limit
+            )
+            self.used += nbytes
+
+    async def release(self, nbytes: int) -> None:
+        async with self._cond:
+            self.used -= nbytes
+            self._cond.notify_all()
+
+
+class AsyncImageIO:
+    """
+    Run image I/O in a bounded thread pool with a limit on in-flight bytes.
+
+    ``max_workers`` defaults to the number of usable CPUs and
+    ``max_inflight_mb`` bounds the decoded size of the images being read or
+    written at once. Instances must be used from a single event loop.
+    """
+
+    def __init__(
+        self, max_workers: Optional[int] = None, max_inflight_mb: float = 1024.0
+    ) -> None:
+        self.max_workers = max_workers or cpu_count()
+        self.max_inflight_bytes = int(max_inflight_mb * 1024 * 1024)
+        self._executor = ThreadPoolExecutor(
+            max_workers=self.max_workers, thread_name_prefix="oiio-aio"
+        )
+        self._budget: Optional[_ByteBudget] = None
+
+    async def __aenter__(self) -> "AsyncImageIO":
+        return self
+
+    async def __aexit__(self, exc_type, exc_value, traceback) -> None:
+        await self.close()
+
+    @property
+    def inflight_bytes(self) -> int:
+        """Number of bytes currently reserved by running or queued requests."""
+        return self._budget.used if self._budget else 0
+
+    async def _run(self, nbytes: int, func: Callable[..., Any], *args: Any) -> Any:
+        if self._budget is None:
+            self._budget = _ByteBudget(self.max_inflight_bytes)
+        budget = self._budget
+        await budget.acquire(nbytes)
+        future: Future = self._executor.submit(func, *args)
+        try:
+            return await asyncio.wrap_future(future)
+        except asyncio.CancelledError:
+            if not future.cancel():
+                # Already running, keep the bytes reserved until it finishes.
+                loop = asyncio.get_running_loop()
+                reserved, nbytes = nbytes, 0
+                future.add_done_callback(
+                    lambda _: loop.call_soon_threadsafe(
+                        lambda: loop.create_task(budget.release(reserved))
+                    )
+                )
+            raise
+        finally:
+            if nbytes:
+                await asyncio.shield(budget.release(nbytes))
+
+    async def read_spec(
+        self, path: str, subimage: int = 0, miplevel: int = 0
+    ) -> oiio.ImageSpec:
+        """Return the ``ImageSpec`` of ``path``, reading its header only."""
+        return await self._run(0, _read_spec, path, subimage, miplevel)
+
+    async def read(
+        self,
+        path: str,
+        subimage: int = 0,
+        miplevel: int = 0,
+        format: oiio.TypeDesc = oiio.TypeUnknown,  # pylint: disable=redefined-builtin
+    ) -> oiio.ImageBuf:
+        """Read ``path`` fully into memory, converted to ``format`` if given."""
+        spec = await self.read_spec(path, subimage, miplevel)
+        return await self._run(
+            _nbytes(spec, format), _read, path, subimage, miplevel, format
+        )
+
+    async def write(
+        self, buf: oiio.ImageBuf, path: str, dtype: oiio.TypeDesc = oiio.TypeUnknown
+    ) -> None:
+        """Write ``buf`` to ``path``, with pixels converted to ``dtype`` if given."""
+        await self._run(_nbytes(buf.spec(), dtype), _write, buf, path, dtype)
+
+    async def convert(
+        self,
+        src: str,
+        dst: str,
+        dtype: Optional[str] = None,
+        compression: Optional[str] = None,
+        tile: Optional[Tuple[int, int]] = None,
+    ) -> Tuple[int, int]:
+        """
+        Convert ``src`` to ``dst``, returning the (source, destination) file sizes.
+
+        See :func:`OpenImageIO.convert_tree.convert_file`.
+        """
+        spec = await self.read_spec(src)
+        return await self._run(
+            _nbytes(spec, oiio.TypeUnknown),
+            convert_file,
+            src,
+            dst,
+            dtype,
+            compression,
+            tile,
+        )
+
+    async def close(self) -> None:
+        """Wait for running requests and shut the thread pool down."""
+        await asyncio.get_running_loop().run_in_executor(None, self._executor.shutdown)
+
+
+_default_options: Tuple[Optional[int], float] = (None, 1024.0)
+# The byte budget belongs to one event loop, so each ``asyncio.run`` gets its own.
+_defaults: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, AsyncImageIO]" = (
+    weakref.WeakKeyDictionary()
+)
+
+
+def _default_io() -> AsyncImageIO:
+    loop = asyncio.get_running_loop()
+    io = _defaults.get(loop)
+    if io is None:
+        io = _defaults[loop] = AsyncImageIO(*_default_options)
+        weakref.finalize(loop, io._executor.shutdown, wait=False)
+    return io
+
+
+def configure(
+    max_workers: Optional[int] = None, max_inflight_mb: float = 1024.0
+) -> None:
+    """
+    Set the options of the instances used by the module level functions.
+
+    Each event loop gets its own instance; the ones created before this call
+    finish their queued requests and are dropped.
+    """
+    global _default_options  # pylint: disable=global-statement
+    _default_options = (max_workers, max_inflight_mb)
+    for io in list(_defaults.values()):
+        io._executor.shutdown(wait=False)
+    _defaults.clear()
+
+
+async def read_spec(path: str, subimage: int = 0, miplevel: int = 0) -> oiio.ImageSpec:
+    """See :meth:`AsyncImageIO.read_spec`."""
+    return await _default_io().read_spec(path, subimage, miplevel)
+
+
+async def read(
+    path: str,
+    subimage: int = 0,
+    miplevel: int = 0,
+    format: oiio.TypeDesc = oiio.TypeUnknown,  # pylint: disable=redefined-builtin
+) -> oiio.ImageBuf:
+    """See :meth:`AsyncImageIO.read`."""
+    return await _default_io().read(path, subimage, miplevel, format)
+
+
+async def write(
+    buf: oiio.ImageBuf, path: str, dtype: oiio.TypeDesc = oiio.TypeUnknown
+) -> None:
+    """See :meth:`AsyncImageIO.write`."""
+    await _default_io().write(buf, path, dtype)
+
+
+async def convert(
+    src: str,
+    dst: str,
+    dtype: Optional[str] = None,
+    compression: Optional[str] = None,
+    tile: Optional[Tuple[int, int]] = None,
+) -> Tuple[int, int]:
+    """See :meth:`AsyncImageIO.convert`."""
+    return await _default_io().convert(src, dst, dtype, compression, tile)
@@ -0,0 +1,270 @@
+"""
+Run many oiiotool-like jobs inside one long-lived process.
+
+Jobs are described in a JSON lines manifest, one job per line::
+
+    {"input": "a.exr", "output": "a.jpg", "ops": [{"op": "resize", "width": 512}]}
+
+Supported operations mirror the matching oiiotool commands: ``resize``,
+``fit``, ``colorconvert``, ``ch``, ``flip``, ``flop``, ``rotate90``,
+``rotate180`` and ``rotate270``. Optional output settings are ``dtype``,
+``compression``, ``tile`` and ``attributes``.
+
+Inputs are read through one ImageCache shared by all jobs, so an input used by
+several jobs is opened and decoded once while it fits in the cache, instead of
+once per oiiotool process.
+"""
+
+import argparse
+import json
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, as_completed, wait
+from typing import Any, Callable, Dict, Iterable, Iterator, Optional, Tuple
+
+import OpenImageIO as oiio
+
+from ._bands import band_cache, read_rows, read_spec
+from ._workers import split_threads
+
+Job = Dict[str, Any]
+
+
+def _check(ok: bool, buf: oiio.ImageBuf) -> oiio.ImageBuf:
+    if not ok or buf.has_error:
+        raise RuntimeError(buf.geterror() or oiio.geterror())
+    return buf
+
+
+def _target_size(src: oiio.ImageBuf, params: Dict[str, Any]) -> Tuple[int, int]:
+    spec = src.spec()
+    if "scale" in params:
+        scale = float(params["scale"])
+        return max(1, round(spec.width * scale)), max(1, round(spec.height * scale))
+    width = params.get("width")
+    height = params.get("height")
+    if width is None and height is None:
+        raise ValueError("Expected 'scale', 'width' or 'height'.")
+    if width is None:
+        width = round(spec.width * height / spec.height)
+    if height is None:
+        height = round(spec.height * width / spec.width)
+    return max(1, int(width)), max(1, int(height))
+
+
+def _resize(src: oiio.ImageBuf, params: Dict[str, Any], nthreads: int) -> oiio.ImageBuf:
+    width, height = _target_size(src, params)
+    roi = oiio.ROI(0, width, 0, height, 0, 1, 0, src.nchannels)
+    dst = oiio.ImageBuf()
+    ok = oiio.ImageBufAlgo.resize(
+        dst, src, filtername=params.get("filter", ""), roi=roi, nthreads=nthreads
+    )
+    return _check(ok, dst)
+
+
+def _fit(src: oiio.ImageBuf, params: Dict[str, Any], nthreads: int) -> oiio.ImageBuf:
+    width, height = _target_size(src, params)
+    roi = oiio.ROI(0, width, 0, height, 0, 1, 0, src.nchannels)
+    dst = oiio.ImageBuf()
+    ok = oiio.ImageBufAlgo.fit(
+        dst,
+        src,
+        filtername=params.get("filter", ""),
+        fillmode=params.get("fillmode", "letterbox"),
+        roi=roi,
+        nthreads=nthreads,
+    )
+    return _check(ok, dst)
+
+
+def _colorconvert(
+    src: oiio.ImageBuf, params: Dict[str, Any], nthreads: int
+) -> oiio.ImageBuf:
+    dst = oiio.ImageBuf()
+    ok = oiio.ImageBufAlgo.colorconvert(
+        dst,
+        src,
+        params["from"],
+        params["to"],
+        unpremult=params.get("unpremult", True),
+        nthreads=nthreads,
+    )
+    return _check(ok, dst)
+
+
+def _channels(
+    src: oiio.ImageBuf, params: Dict[str, Any], nthreads: int
+) -> oiio.ImageBuf:
+    dst = oiio.ImageBuf()
+    ok = oiio.ImageBufAlgo.channels(
+        dst, src, tuple(params["channels"]), nthreads=nthreads
+    )
+    return _check(ok, dst)
+
+
+def _simple(name: str) -> Callable[[oiio.ImageBuf, Dict[str, Any], int], oiio.ImageBuf]:
+    func = getattr(oiio.ImageBufAlgo, name)
+
+    def _op(src: oiio.ImageBuf, params: Dict[str, Any], nthreads: int) -> oiio.ImageBuf:
+        dst = oiio.ImageBuf()
+        return _check(func(dst, src, nthreads=nthreads), dst)
+
+    return _op
+
+
+OPERATIONS: Dict[str, Callable[[oiio.ImageBuf, Dict[str, Any], int], oiio.ImageBuf]] = {
+    "resize": _resize,
+    "fit": _fit,
+    "colorconvert": _colorconvert,
+    "ch": _channels,
+    "flip": _simple("flip"),
+    "flop": _simple("flop"),
+    "rotate90": _simple("rotate90"),
+    "rotate180": _simple("rotate180"),
+    "rotate270": _simple("rotate270"),
+}
+
+
+def read_manifest(lines: Iterable[str]) -> Iterator[Job]:
+    """Yield jobs from JSON lines, skipping blank lines and # comments."""
+    for line in lines:
+        line = line.strip()
+        if line and not line.startswith("#"):
+            yield json.loads(line)
+
+
+def read_input(cache: oiio.ImageCache, path: str) -> oiio.ImageBuf:
+    """Return the first subimage of ``path`` read through ``cache``."""
+    spec = read_spec(cache, path)
+    local_spec = oiio.ImageSpec(spec)
+    local_spec.tile_width = local_spec.tile_height = local_spec.tile_depth = 0
+    buf = oiio.ImageBuf(local_spec)
+    for z in range(spec.z, spec.z + spec.depth):
+        pixels = read_rows(cache, path, spec, spec.y, spec.y + spec.height, z)
+        roi = oiio.ROI(
+            spec.x, spec.x + spec.width, spec.y, spec.y + spec.height, z, z + 1
+        )
+        _check(buf.set_pixels(roi, pixels), buf)
+    return buf
+
+
+def run_job(
+    job: Job, nthreads: int = 0, cache: Optional[oiio.ImageCache] = None
+) -> None:
+    """
+    Run a single manifest job, raising on failure.
+
+    The input is read through ``cache`` when given, ``ImageBuf`` reading it
+    whole otherwise.
+    """
+    if cache is not None:
+        buf = read_input(cache, job["input"])
+    else:
+        buf = _check(True, oiio.ImageBuf(job["input"]))
+    for params in job.get("ops", []):
+        op = OPERATIONS.get(params["op"])
+        if op is None:
+            raise ValueError(f"Unknown operation: {params['op']}")
+        buf = op(buf, params, nthreads)
+
+    if "compression" in job:
+        buf.specmod().attribute("compression", job["compression"])
+    for name, value in job.get("attributes", {}).items():
+        buf.specmod().attribute(name, value)
+    if "tile" in job:
+        buf.set_write_tiles(*job["tile"])
+
+    dtype = oiio.TypeDesc(job["dtype"]) if "dtype" in job else oiio.TypeUnknown
+    _check(buf.write(job["output"], dtype), buf)
+    if cache is not None:
+        # Later jobs may read this output, make sure they see the new file.
+        cache.invalidate(job["output"])
+
+
+def run_batch(
+    jobs: Iterable[Job],
+    workers: Optional[int] = None,
+    threads: Optional[int] = None,
+    cache_memory_mb: Optional[float] = None,
+) -> Iterator[Dict[str, Any]]:
+    """
+    Run jobs in a thread pool sharing one ImageCache, yielding a result per job.
+
+    Jobs are consumed lazily so manifests of any size run in bounded memory.
+    Results are yielded in completion order and contain the job ``index``,
+    ``output``, ``status`` ("ok" or "error"), ``seconds`` and ``error``.
+    """
+    workers, threads = split_threads(workers, threads)
+    oiio.attribute("threads", threads)
+    cache = band_cache(cache_memory_mb)
+
+    def _timed(index: int, job: Job) -> Dict[str, Any]:
+        start = time.perf_counter()
+        result = {
+            "index": index,
+            "output": job.get("output"),
+            "status": "ok",
+            "error": "",
+        }
+        try:
+            run_job(job, threads, cache)
+        except Exception as e:  # pylint: disable=broad-except
+            result["status"] = "error"
+            result["error"] = str(e)
+        result["seconds"] = round(time.perf_counter() - start, 6)
+        return result
+
+    max_pending = workers * 2
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        pending = set()
+        for index, job in enumerate(jobs):
+            pending.add(executor.submit(_timed, index, job))
+            if len(pending) >= max_pending:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    yield future.result()
+        for future in as_completed(pending):
+            yield future.result()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        prog="oiio-batch",
+        description="Run a JSON lines manifest of oiiotool-like jobs in one process.",
+    )
+    parser.add_argument("manifest", help="JSON lines manifest, '-' reads stdin.")
+    parser.add_argument(
+        "-j", "--workers", type=int, default=None, help="Concurrent jobs."
+    )
+    parser.add_argument(
+        "--threads", type=int, default=None, help="OpenImageIO threads per job."
+    )
+    parser.add_argument(
+        "--cache-memory", type=float, default=None, help="ImageCache size in MB."
+    )
+    args = parser.parse_args()
+
+    if args.manifest == "-":
+        lines = sys.stdin
+    else:
+        # pylint: disable-next=consider-using-with
+        lines = open(args.manifest, encoding="utf8")
+
+    start = time.perf_counter()
+    failed = 0
+    total = 0
+    with lines:
+        for result in run_batch(
+            read_manifest(lines), args.workers, args.threads, args.cache_memory
+        ):
+            total += 1
+            failed += result["status"] != "ok"
+            print(json.dumps(result), flush=True)
+
+    elapsed = time.perf_counter() - start
+    print(
+        f"{total} jobs, {failed} failed in {elapsed:.2f}s "
+        f"({total / elapsed if elapsed else 0.0:.1f} jobs/s)",
+        file=sys.stderr,
+    )
+    sys.exit(1 if failed else 0)
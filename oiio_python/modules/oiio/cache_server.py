@@ -0,0 +1,383 @@
+"""
+Share one ImageCache between many worker processes.
+
+``oiio-cache-server`` is a standalone process owning a single ``ImageCache``
+and listening on a Unix socket. Clients ask for pixel regions with
+:meth:`CacheClient.get_pixels`, which mirrors ``ImageCache.get_pixels``; the
+server decodes tiles once for all clients and hands pixels back through a
+``multiprocessing.shared_memory`` segment dedicated to each connection, so only
+small JSON messages go through the socket::
+
+    oiio-cache-server --memory 8192 &
+
+    client = CacheClient()
+    pixels = client.get_pixels("plate.exr", 0, 0, 0, 512, 0, 512)
+
+The socket is only accessible to its owner, and is created by default in the
+user's ``$XDG_RUNTIME_DIR``, or as ``oiio-cache-<uid>.sock`` in the temporary
+folder. Only available on platforms supporting Unix sockets.
+"""
+
+import argparse
+import json
+import os
+import socket
+import socketserver
+import stat
+import struct
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from multiprocessing import resource_tracker, shared_memory
+from typing import Any, Dict, Optional
+
+import numpy as np
+import OpenImageIO as oiio
+
+if not hasattr(socket, "AF_UNIX"):
+    raise ImportError(
+        "OpenImageIO.cache_server is not supported on this platform, "
+        "it needs Unix sockets."
+    )
+
+
+def _default_socket() -> str:
+    # Per user, so other users can't take the path or connect to the server.
+    runtime_dir = os.getenv("XDG_RUNTIME_DIR")
+    if runtime_dir and os.path.isdir(runtime_dir):
+        return os.path.join(runtime_dir, "oiio-cache.sock")
+    uid = os.getuid() if hasattr(os, "getuid") else os.getpid()
+    return os.path.join(tempfile.gettempdir(), f"oiio-cache-{uid}.sock")
+
+
+DEFAULT_SOCKET = _default_socket()
+
+_HEADER = struct.Struct("!I")
+
+
+def _send(sock: socket.socket, message: Dict[str, Any]) -> None:
+    data = json.dumps(message).encode("utf8")
+    sock.sendall(_HEADER.pack(len(data)) + data)
+
+
+def _recv_exact(sock: socket.socket, size: int) -> bytes:
+    data = bytearray()
+    while len(data) < size:
+        chunk = sock.recv(size - len(data))
+        if not chunk:
+            raise ConnectionError("Connection closed.")
+        data += chunk
+    return bytes(data)
+
+
+def _recv(sock: socket.socket) -> Dict[str, Any]:
+    (size,) = _HEADER.unpack(_recv_exact(sock, _HEADER.size))
+    return json.loads(_recv_exact(sock, size))
+
+
+class _Handler(socketserver.BaseRequestHandler):
+    """Serve requests of one client connection."""
+
+    server: "CacheServer"
+
+    def setup(self) -> None:
+        self.shm: Optional[shared_memory.SharedMemory] = None
+
+    def handle(self) -> None:
+        while True:
+            try:
+                request = _recv(self.request)
+            except (ConnectionError, OSError):
+                return
+            try:
+                reply = self._dispatch(request)
+            except Exception as e:  # pylint: disable=broad-except
+                reply = {"error": str(e)}
+            _send(self.request, reply)
+            if request.get("op") == "shutdown":
+                threading.Thread(target=self.server.shutdown, daemon=True).start()
+                return
+
+    def finish(self) -> None:
+        if self.shm is not None:
+            self.server.release(self.shm)
+
+    def _buffer(self, nbytes: int) -> shared_memory.SharedMemory:
+        if self.shm is None or self.shm.size < nbytes:
+            # Grow geometrically so clients rarely have to attach a new segment.
+            size = max(nbytes, 2 * self.shm.size if self.shm else 1 << 20)
+            if self.shm is not None:
+                self.server.release(self.shm)
+            self.shm = self.server.allocate(size)
+        return self.shm
+
+    def _dispatch(self, request: Dict[str, Any]) -> Dict[str, Any]:
+        cache = self.server.cache
+        op = request.get("op")
+        if op == "get_pixels":
+            pixels = cache.get_pixels(
+                request["filename"],
+                request["subimage"],
+                request["miplevel"],
+                *request["roi"],
+                oiio.TypeDesc(request["datatype"]),
+            )
+            if pixels is None:
+                return {"error": cache.geterror() or oiio.geterror()}
+            shm = self._buffer(pixels.nbytes)
+            np.ndarray(pixels.shape, pixels.dtype, buffer=shm.buf)[...] = pixels
+            return {"shm": shm.name, "shape": pixels.shape, "dtype": pixels.dtype.str}
+        if op == "get_imagespec":
+            spec = cache.get_imagespec(request["filename"], request["subimage"])
+            if cache.has_error:
+                return {"error": cache.geterror()}
+            return {"spec": spec.serialize("xml")}
+        if op == "invalidate":
+            cache.invalidate(request["filename"])
+            return {}
+        if op == "invalidate_all":
+            cache.invalidate_all(request.get("force", False))
+            return {}
+        if op == "getstats":
+            return {"stats": cache.getstats(request.get("level", 1))}
+        if op in ("ping", "shutdown"):
+            return {"pid": os.getpid()}
+        return {"error": f"Unknown operation {op!r}."}
+
+
+class CacheServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    """Unix socket server owning the process wide ``ImageCache``."""
+
+    daemon_threads = True
+
+    def __init__(
+        self,
+        socket_path: str = DEFAULT_SOCKET,
+        max_memory_mb: Optional[float] = None,
+        max_open_files: Optional[int] = None,
+    ) -> None:
+        if os.path.exists(socket_path):
+            if not stat.S_ISSOCK(os.stat(socket_path).st_mode):
+                raise RuntimeError(f"{socket_path} exists and is not a socket.")
+            try:
+                with CacheClient(socket_path) as client:
+                    client.ping()
+            except OSError:
+                os.unlink(socket_path)  # Left over by a dead server.
+            else:
+                raise RuntimeError(f"A cache server already listens on {socket_path}.")
+        self.cache = oiio.ImageCache(True)
+        if max_memory_mb is not None:
+            self.cache.attribute("max_memory_MB", float(max_memory_mb))
+        if max_open_files is not None:
+            self.cache.attribute("max_open_files", max_open_files)
+        self._segments: Dict[str, shared_memory.SharedMemory] = {}
+        self._segments_lock = threading.Lock()
+        super().__init__(socket_path, _Handler)
+
+    def server_bind(self) -> None:
+        # Clients can read any file the server can, create the socket private
+        # rather than restricting it after bind, when others could connect.
+        umask = os.umask(0o177)
+        try:
+            super().server_bind()
+        finally:
+            os.umask(umask)
+
+    def allocate(self, size: int) -> shared_memory.SharedMemory:
+        """Create a shared memory segment, unlinked when the server closes."""
+        shm = shared_memory.SharedMemory(create=True, size=size)
+        with self._segments_lock:
+            self._segments[shm.name] = shm
+        return shm
+
+    def release(self, shm: shared_memory.SharedMemory) -> None:
+        """Unlink a segment created by :meth:`allocate`."""
+        with self._segments_lock:
+            if self._segments.pop(shm.name, None) is None:
+                return
+        shm.close()
+        shm.unlink()
+
+    def server_close(self) -> None:
+        super().server_close()
+        for shm in list(self._segments.values()):
+            self.release(shm)
+        try:
+            os.unlink(self.server_address)
+        except FileNotFoundError:
+            pass
+
+
+class CacheClient:
+    """
+    Connection to a :class:`CacheServer`, with methods mirroring ``ImageCache``.
+
+    A client is thread-safe, but requests of the threads sharing it are
+    serialized, use one client per thread for concurrent requests.
+    """
+
+    def __init__(self, socket_path: str = DEFAULT_SOCKET) -> None:
+        self._sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self._sock.connect(socket_path)
+        self._lock = threading.Lock()
+        self._shm: Optional[shared_memory.SharedMemory] = None
+
+    def __enter__(self) -> "CacheClient":
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        self.close()
+
+    def _request(self, **request: Any) -> Dict[str, Any]:
+        _send(self._sock, request)
+        reply = _recv(self._sock)
+        if "error" in reply:
+            raise RuntimeError(reply["error"])
+        return reply
+
+    def _attach(self, name: str) -> shared_memory.SharedMemory:
+        if self._shm is None or self._shm.name != name:
+            self._detach()
+            self._shm = shared_memory.SharedMemory(name=name)
+            # The server owns the segment, don't let this process unlink it.
+            resource_tracker.unregister(
+                self._shm._name, "shared_memory"  # pylint: disable=protected-access
+            )
+        return self._shm
+
+    def _detach(self) -> None:
+        if self._shm is not None:
+            try:
+                self._shm.close()
+            except BufferError:
+                pass  # Still viewed by an array, unmapped once it is released.
+            self._shm = None
+
+    def get_pixels(
+        self,
+        filename: str,
+        subimage: int,
+        miplevel: int,
+        xbegin: int,
+        xend: int,
+        ybegin: int,
+        yend: int,
+        zbegin: int = 0,
+        zend: int = 1,
+        datatype: oiio.TypeDesc = oiio.TypeUnknown,
+        copy: bool = True,
+    ) -> np.ndarray:
+        """
+        Return the pixels of a region, like ``ImageCache.get_pixels``.
+
+        With ``copy=False`` the array is a view of the shared memory segment,
+        only valid until the next request of this client.
+        """
+        with self._lock:
+            reply = self._request(
+                op="get_pixels",
+                filename=filename,
+                subimage=subimage,
+                miplevel=miplevel,
+                roi=[xbegin, xend, ybegin, yend, zbegin, zend],
+                datatype=str(datatype),
+            )
+            shm = self._attach(reply["shm"])
+            pixels = np.ndarray(reply["shape"], np.dtype(reply["dtype"]), shm.buf)
+            return pixels.copy() if copy else pixels
+
+    def get_imagespec(self, filename: str, subimage: int = 0) -> oiio.ImageSpec:
+        """Return the ``ImageSpec`` of ``filename``."""
+        with self._lock:
+            reply = self._request(
+                op="get_imagespec", filename=filename, subimage=subimage
+            )
+        spec = oiio.ImageSpec()
+        spec.from_xml(reply["spec"])
+        return spec
+
+    def invalidate(self, filename: str) -> None:
+        """Invalidate ``filename`` in the server cache."""
+        with self._lock:
+            self._request(op="invalidate", filename=filename)
+
+    def invalidate_all(self, force: bool = False) -> None:
+        """Invalidate all files of the server cache."""
+        with self._lock:
+            self._request(op="invalidate_all", force=force)
+
+    def getstats(self, level: int = 1) -> str:
+        """Return the server ``ImageCache.getstats`` report."""
+        with self._lock:
+            return self._request(op="getstats", level=level)["stats"]
+
+    def ping(self) -> int:
+        """Return the server process id."""
+        with self._lock:
+            return self._request(op="ping")["pid"]
+
+    def shutdown(self) -> None:
+        """Stop the server."""
+        with self._lock:
+            self._request(op="shutdown")
+
+    def close(self) -> None:
+        """Close the connection, releasing the server shared memory segment."""
+        with self._lock:
+            self._detach()
+            self._sock.close()
+
+
+def spawn_server(
+    socket_path: str = DEFAULT_SOCKET,
+    max_memory_mb: Optional[float] = None,
+    timeout: float = 30.0,
+) -> subprocess.Popen:
+    """Start a cache server process and wait until it accepts connections."""
+    cmd = [sys.executable, "-m", "OpenImageIO.cache_server", "--socket", socket_path]
+    if max_memory_mb is not None:
+        cmd += ["--memory", str(max_memory_mb)]
+    process = subprocess.Popen(cmd)  # pylint: disable=consider-using-with
+    deadline = time.monotonic() + timeout
+    while True:
+        try:
+            with CacheClient(socket_path) as client:
+                if client.ping() == process.pid:
+                    return process
+        except OSError:
+            pass
+        if process.poll() is not None:
+            raise RuntimeError(f"Cache server exited with code {process.returncode}.")
+        if time.monotonic() > deadline:
+            process.kill()
+            raise TimeoutError(f"Cache server did not start within {timeout}s.")
+        time.sleep(0.05)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        prog="oiio-cache-server",
+        description="Serve one shared ImageCache to local processes.",
+    )
+    parser.add_argument("--socket", default=DEFAULT_SOCKET, help="Unix socket path.")
+    parser.add_argument("--memory", type=float, default=None, help="Cache size in MB.")
+    parser.add_argument("--max-open-files", type=int, default=None)
+    parser.add_argument(
+        "--threads", type=int, default=None, help="OpenImageIO threads."
+    )
+    args = parser.parse_args()
+
+    if args.threads is not None:
+        oiio.attribute("threads", args.threads)
+    with CacheServer(args.socket, args.memory, args.max_open_files) as server:
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+
+
+if __name__ == "__main__":
+    main()
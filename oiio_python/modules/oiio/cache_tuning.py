@@ -0,0 +1,209 @@
+"""
+Configure the ImageCache from named profiles and report its statistics.
+
+Profiles set the attributes that matter most under load::
+
+    apply_profile("interactive", max_memory_MB=8192)
+
+:func:`cache_stats` reads the ``stat:*`` attributes of the cache into a flat
+dict, with derived values such as the tile hit rate, and
+:func:`to_prometheus` formats it in the Prometheus text exposition format,
+e.g. for the node_exporter textfile collector. :class:`StatsPoller` samples
+statistics periodically in a background thread.
+"""
+
+import os
+import re
+import tempfile
+import threading
+from typing import Any, Callable, Dict, Mapping, Optional
+
+import OpenImageIO as oiio
+
+PROFILES: Dict[str, Dict[str, Any]] = {
+    # Frames read once from start to end, keep memory low and files few.
+    "streaming": {
+        "max_memory_MB": 512.0,
+        "max_open_files": 64,
+        "autotile": 0,
+        "autoscanline": 0,
+        "forcefloat": 0,
+    },
+    # Viewers revisiting regions of untiled files, cache small tiles of them.
+    "interactive": {
+        "max_memory_MB": 4096.0,
+        "max_open_files": 500,
+        "autotile": 256,
+        "autoscanline": 1,
+        "forcefloat": 0,
+    },
+    # Texture lookups from many tiled files, large cache, float math.
+    "texture-bake": {
+        "max_memory_MB": 8192.0,
+        "max_open_files": 1000,
+        "autotile": 64,
+        "autoscanline": 0,
+        "forcefloat": 1,
+    },
+}
+
+_STATS = (
+    "cache_memory_used",
+    "tiles_created",
+    "tiles_current",
+    "tiles_peak",
+    "open_files_created",
+    "open_files_current",
+    "open_files_peak",
+    "find_tile_calls",
+    "find_tile_microcache_misses",
+    "find_tile_cache_misses",
+    "files_totalsize",
+    "bytes_read",
+    "unique_files",
+    "fileio_time",
+    "fileopen_time",
+    "file_locking_time",
+)
+
+_BROKEN_FILES = re.compile(r"Broken or invalid files:\s*(\d+)")
+
+
+def _cache(cache: Optional[oiio.ImageCache]) -> oiio.ImageCache:
+    return cache if cache is not None else oiio.ImageCache(True)
+
+
+def apply_profile(
+    name: str, cache: Optional[oiio.ImageCache] = None, **overrides: Any
+) -> Dict[str, Any]:
+    """
+    Set the attributes of profile ``name`` on ``cache``, the shared cache by default.
+
+    ``overrides`` replace or extend the profile attributes. Returns the applied
+    attributes.
+    """
+    try:
+        attributes = dict(PROFILES[name])
+    except KeyError:
+        raise ValueError(
+            f"Unknown profile {name!r}, expected one of {sorted(PROFILES)}."
+        ) from None
+    attributes.update(overrides)
+    cache = _cache(cache)
+    for key, value in attributes.items():
+        cache.attribute(key, value)
+    return attributes
+
+
+def cache_stats(cache: Optional[oiio.ImageCache] = None) -> Dict[str, Any]:
+    """
+    Return the statistics of ``cache``, the shared cache by default.
+
+    Keys are the ``stat:*`` attribute names without prefix, plus
+    ``max_memory_MB``, ``hit_rate`` (found tiles over lookups),
+    ``microcache_hit_rate`` and ``broken_files`` parsed from ``getstats()``.
+    """
+    cache = _cache(cache)
+    stats: Dict[str, Any] = {
+        name: cache.getattribute(f"stat:{name}") or 0 for name in _STATS
+    }
+    stats["max_memory_MB"] = cache.getattribute("max_memory_MB")
+    calls = stats["find_tile_calls"]
+    stats["hit_rate"] = 1.0 - stats["find_tile_cache_misses"] / calls if calls else 0.0
+    stats["microcache_hit_rate"] = (
+        1.0 - stats["find_tile_microcache_misses"] / calls if calls else 0.0
+    )
+    match = _BROKEN_FILES.search(cache.getstats(1))
+    stats["broken_files"] = int(match.group(1)) if match else 0
+    return stats
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def to_prometheus(
+    stats: Mapping[str, Any],
+    prefix: str = "oiio_imagecache",
+    labels: Optional[Mapping[str, str]] = None,
+) -> str:
+    """Format ``stats`` as Prometheus text exposition, one gauge per value."""
+    label_text = ""
+    if labels:
+        pairs = ",".join(
+            f'{key}="{_escape(str(value))}"' for key, value in sorted(labels.items())
+        )
+        label_text = "{" + pairs + "}"
+    lines = []
+    for key, value in stats.items():
+        if isinstance(value, bool) or not isinstance(value, (int, float)):
+            continue
+        name = f"{prefix}_{re.sub(r'[^a-zA-Z0-9_]', '_', key)}"
+        lines.append(f"# TYPE {name} gauge")
+        lines.append(f"{name}{label_text} {value}")
+    return "\n".join(lines) + "\n"
+
+
+def write_prometheus(path: str, stats: Mapping[str, Any], **kwargs: Any) -> None:
+    """
+    Atomically write ``stats`` to ``path`` in Prometheus text format.
+
+    Suited for the node_exporter textfile collector, which must never see a
+    partially written file. ``kwargs`` are passed to :func:`to_prometheus`.
+    """
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, tmp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+    try:
+        with os.fdopen(fd, "w", encoding="utf8") as f:
+            f.write(to_prometheus(stats, **kwargs))
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+
+
+class StatsPoller:
+    """
+    Call ``callback(stats)`` with :func:`cache_stats` every ``interval`` seconds.
+
+    Runs in a daemon thread between :meth:`start` and :meth:`stop`, or as a
+    context manager.
+    """
+
+    def __init__(
+        self,
+        callback: Callable[[Dict[str, Any]], None],
+        interval: float = 10.0,
+        cache: Optional[oiio.ImageCache] = None,
+    ) -> None:
+        self.callback = callback
+        self.interval = interval
+        self.cache = cache
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def __enter__(self) -> "StatsPoller":
+        self.start()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        self.stop()
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            self.callback(cache_stats(self.cache))
+
+    def start(self) -> None:
+        """Start polling."""
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        """Stop polling, after a final sample."""
+        if self._thread is None:
+            return
+        self._stop.set()
+        self._thread.join()
+        self._thread = None
+        self.callback(cache_stats(self.cache))
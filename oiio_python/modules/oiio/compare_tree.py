@@ -0,0 +1,277 @@
+"""
+Compare two directory trees of renders with idiff-like thresholds, in parallel.
+
+Each pair of images is compared band by band through the ImageCache, and the
+comparison stops reading as soon as the image is known to fail, so broken
+frames cost a fraction of a full read. Results are returned as a
+machine-readable report with per-image errors and timings.
+"""
+
+import argparse
+import json
+import math
+import multiprocessing
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence
+
+import numpy as np
+import OpenImageIO as oiio
+
+from ._bands import BAND_ROWS, band_cache, read_rows, read_spec
+from ._workers import split_threads
+
+
+def _init_worker(threads: int, cache_memory_mb: float) -> None:
+    oiio.attribute("threads", threads)
+    oiio.attribute("exr_threads", threads)
+    band_cache(cache_memory_mb)
+
+
+def compare_images(
+    ref_path: str,
+    test_path: str,
+    failthresh: float = 1e-6,
+    failpercent: float = 0.0,
+    hardfail: float = math.inf,
+    warnthresh: float = 1e-6,
+    warnpercent: float = 0.0,
+    rows: int = BAND_ROWS,
+) -> Dict[str, Any]:
+    """
+    Compare ``test_path`` against ``ref_path`` like ``idiff`` does.
+
+    An image fails when more than ``failpercent`` % of its pixels differ by
+    more than ``failthresh``, or when any pixel differs by more than
+    ``hardfail``, and warns likewise with ``warnthresh`` / ``warnpercent``.
+    Images are read ``rows`` scanlines at a time through an ImageCache
+    emulating tiles for untiled files, and reading stops once the image fails,
+    so the rest of the file is never decoded. ``early_exit`` is then set and
+    ``mean_error`` only covers the compared pixels.
+
+    Returns a dict with ``status`` ("pass", "warn", "fail" or "error"),
+    ``max_error``, ``mean_error``, ``nfail``, ``nwarn``, ``npixels`` and
+    ``seconds``.
+    """
+    start = time.perf_counter()
+    result: Dict[str, Any] = {"ref": ref_path, "test": test_path}
+    cache = band_cache()
+    try:
+        try:
+            spec = read_spec(cache, ref_path)
+            test_spec = read_spec(cache, test_path)
+        except RuntimeError as e:
+            result.update(status="error", error=str(e))
+            result["seconds"] = time.perf_counter() - start
+            return result
+        if (spec.width, spec.height, spec.depth, spec.nchannels) != (
+            test_spec.width,
+            test_spec.height,
+            test_spec.depth,
+            test_spec.nchannels,
+        ):
+            result.update(
+                status="fail", error="Images have different sizes or channels."
+            )
+            result["seconds"] = time.perf_counter() - start
+            return result
+
+        total = spec.width * spec.height * spec.depth
+        max_fail = total * failpercent / 100.0
+        nfail = 0
+        nwarn = 0
+        npixels = 0
+        max_error = 0.0
+        error_sum = 0.0
+        early_exit = False
+        for z in range(spec.z, spec.z + spec.depth):
+            for y in range(spec.y, spec.y + spec.height, rows):
+                yend = min(y + rows, spec.y + spec.height)
+                # The data windows of both images are compared from their origin.
+                dy = test_spec.y - spec.y
+                dz = test_spec.z - spec.z
+                try:
+                    ref_pixels = read_rows(
+                        cache, ref_path, spec, y, yend, z, oiio.FLOAT
+                    )
+                    test_pixels = read_rows(
+                        cache,
+                        test_path,
+                        test_spec,
+                        y + dy,
+                        yend + dy,
+                        z + dz,
+                        oiio.FLOAT,
+                    )
+                except RuntimeError as e:
+                    result.update(status="error", error=str(e))
+                    result["seconds"] = time.perf_counter() - start
+                    return result
+                # Per pixel error is the largest error of its channels, as in idiff.
+                error = np.abs(ref_pixels - test_pixels).reshape(-1, spec.nchannels)
+                error = np.nan_to_num(error.max(axis=1), nan=math.inf)
+                npixels += error.size
+                max_error = max(max_error, float(error.max(initial=0.0)))
+                error_sum += float(error.sum())
+                nfail += int(np.count_nonzero(error > failthresh))
+                nwarn += int(np.count_nonzero(error > warnthresh))
+                if nfail > max_fail or max_error > hardfail:
+                    early_exit = npixels < total
+                    break
+            else:
+                continue
+            break
+
+        if nfail > max_fail or max_error > hardfail:
+            status = "fail"
+        elif nwarn > total * warnpercent / 100.0:
+            status = "warn"
+        else:
+            status = "pass"
+        result.update(
+            status=status,
+            max_error=max_error,
+            mean_error=error_sum / npixels if npixels else 0.0,
+            nfail=nfail,
+            nwarn=nwarn,
+            npixels=npixels,
+            early_exit=early_exit,
+            seconds=time.perf_counter() - start,
+        )
+        return result
+    finally:
+        # Release cached tiles and file handles of frames we won't read again,
+        # failing and unreadable ones included.
+        for path in (ref_path, test_path):
+            cache.invalidate(path)
+
+
+def compare_trees(
+    ref_dir: Path,
+    test_dir: Path,
+    extensions: Sequence[str] = ("exr",),
+    workers: Optional[int] = None,
+    threads: Optional[int] = None,
+    cache_memory_mb: float = 256.0,
+    **thresholds: Any,
+) -> Dict[str, Any]:
+    """
+    Compare every image of ``ref_dir`` with the same relative path in ``test_dir``.
+
+    ``thresholds`` are passed to :func:`compare_images`. Returns a report with
+    a ``summary`` of counts and timing and the per-image results in ``images``.
+    Images missing from ``test_dir`` have the "missing" status.
+    """
+    ref_dir = Path(ref_dir)
+    test_dir = Path(test_dir)
+    workers, threads = split_threads(workers, threads)
+    suffixes = {"." + ext.lower().lstrip(".") for ext in extensions}
+    pairs = []
+    images: List[Dict[str, Any]] = []
+    for root, _, files in os.walk(ref_dir):
+        for name in sorted(files):
+            ref = Path(root) / name
+            if ref.suffix.lower() not in suffixes:
+                continue
+            test = test_dir / ref.relative_to(ref_dir)
+            if test.exists():
+                pairs.append((str(ref), str(test)))
+            else:
+                images.append({"ref": str(ref), "test": str(test), "status": "missing"})
+
+    start = time.perf_counter()
+    # Forking a process whose OIIO thread pool is already running can deadlock.
+    with ProcessPoolExecutor(
+        max_workers=workers,
+        mp_context=multiprocessing.get_context("spawn"),
+        initializer=_init_worker,
+        initargs=(threads, cache_memory_mb / workers),
+    ) as executor:
+        futures = {
+            executor.submit(compare_images, ref, test, **thresholds): (ref, test)
+            for ref, test in pairs
+        }
+        for future in as_completed(futures):
+            try:
+                images.append(future.result())
+            except Exception as e:  # pylint: disable=broad-except
+                ref, test = futures[future]
+                images.append(
+                    {"ref": ref, "test": test, "status": "error", "error": str(e)}
+                )
+    elapsed = time.perf_counter() - start
+
+    images.sort(key=lambda image: image["ref"])
+    summary: Dict[str, Any] = {
+        status: sum(image["status"] == status for image in images)
+        for status in ("pass", "warn", "fail", "missing", "error")
+    }
+    summary.update(
+        total=len(images),
+        workers=workers,
+        threads_per_worker=threads,
+        seconds=elapsed,
+        images_per_second=len(pairs) / elapsed if elapsed else 0.0,
+    )
+    return {"summary": summary, "images": images}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        prog="idiff-batch",
+        description="Compare two directory trees of images like idiff, in parallel.",
+    )
+    parser.add_argument("ref_dir", type=Path, help="Reference images.")
+    parser.add_argument("test_dir", type=Path, help="Images to test.")
+    parser.add_argument("--ext", nargs="+", default=["exr"], help="e.g. exr png.")
+    parser.add_argument("--fail", type=float, default=1e-6, help="Failure threshold.")
+    parser.add_argument(
+        "--failpercent", type=float, default=0.0, help="Allowed failing pixels %%."
+    )
+    parser.add_argument(
+        "--hardfail", type=float, default=math.inf, help="Fail if any error exceeds."
+    )
+    parser.add_argument("--warn", type=float, default=1e-6, help="Warning threshold.")
+    parser.add_argument(
+        "--warnpercent", type=float, default=0.0, help="Allowed warning pixels %%."
+    )
+    parser.add_argument(
+        "--rows", type=int, default=BAND_ROWS, help="Scanlines compared at a time."
+    )
+    parser.add_argument("-j", "--workers", type=int, default=None, help="Processes.")
+    parser.add_argument(
+        "--threads", type=int, default=None, help="OpenImageIO threads per worker."
+    )
+    parser.add_argument("-o", "--report", default=None, help="JSON report path.")
+    args = parser.parse_args()
+
+    report = compare_trees(
+        args.ref_dir,
+        args.test_dir,
+        args.ext,
+        workers=args.workers,
+        threads=args.threads,
+        failthresh=args.fail,
+        failpercent=args.failpercent,
+        hardfail=args.hardfail,
+        warnthresh=args.warn,
+        warnpercent=args.warnpercent,
+        rows=args.rows,
+    )
+    if args.report:
+        with open(args.report, "w", encoding="utf8") as f:
+            json.dump(report, f, indent=2)
+    else:
+        print(json.dumps(report, indent=2))
+
+    summary = report["summary"]
+    print(
+        f"{summary['total']} images: {summary['pass']} passed, {summary['warn']} "
+        f"warned, {summary['fail']} failed, {summary['missing']} missing, "
+        f"{summary['error']} errors in {summary['seconds']:.2f}s",
+        file=sys.stderr,
+    )
+    sys.exit(1 if summary["fail"] or summary["missing"] or summary["error"] else 0)
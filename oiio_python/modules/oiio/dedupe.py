@@ -0,0 +1,275 @@
+"""
+Find duplicate images by pixel content rather than file bytes.
+
+Exact duplicates share the same SHA-1 of their pixels, so re-encodes with
+another compression or metadata still match. Near duplicates are found with an
+optional 64 bit perceptual fingerprint (difference hash) computed on a tiny
+grayscale version of each image.
+
+Images are hashed in a pool of worker processes. Pixels are read a band of rows
+at a time through an ImageCache emulating tiles for untiled files, so whole
+images are never decoded or held in memory.
+"""
+
+import argparse
+import hashlib
+import json
+import multiprocessing
+import os
+import sys
+import time
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+import OpenImageIO as oiio
+
+from ._bands import BAND_ROWS, band_cache, read_rows, read_spec
+from ._workers import split_threads
+
+FINGERPRINT_SIZE = 8
+_LUMA_WEIGHTS = (0.2126, 0.7152, 0.0722)
+
+
+def _init_worker(threads: int, cache_memory_mb: float) -> None:
+    oiio.attribute("threads", threads)
+    oiio.attribute("exr_threads", threads)
+    # Each file is only read once, keep the cache of every worker small.
+    band_cache(cache_memory_mb)
+
+
+def pixel_hash(path: str, rows: int = BAND_ROWS) -> str:
+    """
+    Return the SHA-1 of the pixels of ``path``, hashed ``rows`` rows at a time.
+
+    The image dimensions, channel count and data type are part of the hash, so
+    different layouts of the same bytes don't collide.
+    """
+    cache = band_cache()
+    spec = read_spec(cache, path)
+    extrainfo = f"{spec.width}x{spec.height}x{spec.depth}:{spec.nchannels}"
+    digest = hashlib.sha1(extrainfo.encode("utf8"))
+    for z in range(spec.z, spec.z + spec.depth):
+        for y in range(spec.y, spec.y + spec.height, rows):
+            yend = min(y + rows, spec.y + spec.height)
+            pixels = read_rows(cache, path, spec, y, yend, z)
+            digest.update(pixels.dtype.str.encode("utf8"))
+            digest.update(pixels.tobytes())
+    return digest.hexdigest()
+
+
+def _bins(n: int, count: int) -> np.ndarray:
+    # (begin, end) of ``count`` box filter bins over ``n`` samples, each bin
+    # holding at least one sample.
+    begin = np.arange(count) * n // count
+    end = np.maximum(np.arange(1, count + 1) * n // count, begin + 1)
+    return np.stack([begin, end], axis=1)
+
+
+def _fingerprint_level(path: str, size: int) -> Tuple[int, oiio.ImageSpec]:
+    # The smallest MIP level large enough, reading headers only.
+    image = oiio.ImageInput.open(path)
+    if image is None:
+        raise RuntimeError(oiio.geterror())
+    try:
+        level = 0
+        spec = oiio.ImageSpec(image.spec())
+        while image.seek_subimage(0, level + 1):
+            mip = image.spec()
+            if mip.width <= size or mip.height < size:
+                break
+            level, spec = level + 1, oiio.ImageSpec(mip)
+        image.geterror()  # Seeking past the last level is not an error.
+        return level, spec
+    finally:
+        image.close()
+
+
+def fingerprint(path: str, size: int = FINGERPRINT_SIZE, rows: int = BAND_ROWS) -> int:
+    """
+    Return the ``size`` x ``size`` bits difference hash of ``path``.
+
+    The image is box filtered to (size + 1, size) gray pixels while reading it
+    ``rows`` rows at a time, each bit tells whether a pixel is brighter than
+    its left neighbour. The smallest MIP level large enough is used when the
+    file has any.
+    """
+    level, spec = _fingerprint_level(path, size)
+    cache = band_cache()
+    if spec.nchannels >= 3:
+        weights = np.array(_LUMA_WEIGHTS + (0.0,) * (spec.nchannels - 3), np.float32)
+    else:
+        weights = np.eye(spec.nchannels, 1, dtype=np.float32)[:, 0]
+    row_bins = _bins(spec.height, size)
+    col_bins = _bins(spec.width, size + 1)
+    # Sums of the gray pixels of each bin of rows, by column.
+    row_sums = np.zeros((size, spec.width), np.float64)
+    for y in range(0, spec.height, rows):
+        yend = min(y + rows, spec.height)
+        band = read_rows(
+            cache, path, spec, spec.y + y, spec.y + yend, spec.z, oiio.FLOAT, level
+        )
+        gray = band @ weights
+        for index, (begin, end) in enumerate(row_bins):
+            if begin < yend and end > y:
+                row_sums[index] += gray[max(begin, y) - y : min(end, yend) - y].sum(0)
+    cumulative = np.concatenate(
+        [np.zeros((size, 1)), np.cumsum(row_sums, axis=1)], axis=1
+    )
+    sums = cumulative[:, col_bins[:, 1]] - cumulative[:, col_bins[:, 0]]
+    areas = np.outer(row_bins[:, 1] - row_bins[:, 0], col_bins[:, 1] - col_bins[:, 0])
+    pixels = sums / areas
+    bits = pixels[:, 1:] > pixels[:, :-1]
+    return int.from_bytes(np.packbits(bits).tobytes(), "big")
+
+
+def hamming(a: int, b: int) -> int:
+    """Return the number of differing bits of two fingerprints."""
+    return bin(a ^ b).count("1")
+
+
+def hash_file(path: str, with_fingerprint: bool = False) -> Dict[str, Any]:
+    """Return the pixel hash, and optionally the fingerprint, of ``path``."""
+    result: Dict[str, Any] = {"path": path, "hash": pixel_hash(path)}
+    if with_fingerprint:
+        result["fingerprint"] = fingerprint(path)
+    return result
+
+
+def _group_near(
+    fingerprints: Dict[str, int], max_distance: int, bits: int
+) -> List[List[str]]:
+    # Pigeonhole: fingerprints within max_distance bits share at least one of
+    # max_distance + 1 bands exactly, so only paths sharing a band are compared.
+    nbands = max_distance + 1
+    band_bits = -(-bits // nbands)
+    band_mask = (1 << band_bits) - 1
+    buckets: Dict[Any, List[str]] = defaultdict(list)
+    for path, value in fingerprints.items():
+        for band in range(nbands):
+            buckets[(band, (value >> (band * band_bits)) & band_mask)].append(path)
+
+    parent = {path: path for path in fingerprints}
+
+    def _find(path: str) -> str:
+        while parent[path] != path:
+            parent[path] = parent[parent[path]]
+            path = parent[path]
+        return path
+
+    for paths in buckets.values():
+        for i, a in enumerate(paths):
+            for b in paths[i + 1 :]:
+                if hamming(fingerprints[a], fingerprints[b]) <= max_distance:
+                    parent[_find(a)] = _find(b)
+
+    groups: Dict[str, List[str]] = defaultdict(list)
+    for path in fingerprints:
+        groups[_find(path)].append(path)
+    return sorted(sorted(group) for group in groups.values() if len(group) > 1)
+
+
+def dedupe(
+    paths: Sequence[str],
+    workers: Optional[int] = None,
+    threads: Optional[int] = None,
+    near: bool = False,
+    max_distance: int = 4,
+    cache_memory_mb: float = 64.0,
+) -> Dict[str, Any]:
+    """
+    Hash ``paths`` in parallel and group duplicates.
+
+    Returns a report with ``duplicates``, groups of paths with identical
+    pixels, and with ``near``, ``near_duplicates``, groups of paths whose
+    fingerprints differ by at most ``max_distance`` bits. Unreadable files
+    are listed in ``failures``.
+    """
+    workers, threads = split_threads(workers, threads)
+    start = time.perf_counter()
+    by_hash: Dict[str, List[str]] = defaultdict(list)
+    fingerprints: Dict[str, int] = {}
+    failures: List[Dict[str, str]] = []
+    # Forking a process whose OIIO thread pool is already running can deadlock.
+    with ProcessPoolExecutor(
+        max_workers=workers,
+        mp_context=multiprocessing.get_context("spawn"),
+        initializer=_init_worker,
+        initargs=(threads, cache_memory_mb),
+    ) as executor:
+        futures = {executor.submit(hash_file, path, near): path for path in paths}
+        for future in as_completed(futures):
+            try:
+                result = future.result()
+            except Exception as e:  # pylint: disable=broad-except
+                failures.append({"path": futures[future], "error": str(e)})
+                continue
+            by_hash[result["hash"]].append(result["path"])
+            if near:
+                fingerprints[result["path"]] = result["fingerprint"]
+
+    report: Dict[str, Any] = {
+        "files": len(paths),
+        "duplicates": sorted(
+            sorted(group) for group in by_hash.values() if len(group) > 1
+        ),
+        "failures": failures,
+    }
+    if near:
+        report["near_duplicates"] = _group_near(
+            fingerprints, max_distance, FINGERPRINT_SIZE * FINGERPRINT_SIZE
+        )
+    report["seconds"] = time.perf_counter() - start
+    return report
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        prog="oiio-dedupe",
+        description="Group images with identical or similar pixels.",
+    )
+    parser.add_argument("paths", nargs="+", help="Images or directories.")
+    parser.add_argument(
+        "--ext",
+        nargs="+",
+        default=["exr", "dpx", "tif", "tiff", "png", "jpg", "jpeg"],
+        help="Extensions searched in directories.",
+    )
+    parser.add_argument(
+        "--near", action="store_true", help="Also find near duplicates."
+    )
+    parser.add_argument(
+        "--max-distance",
+        type=int,
+        default=4,
+        help="Max differing fingerprint bits of near duplicates.",
+    )
+    parser.add_argument("-j", "--workers", type=int, default=None, help="Processes.")
+    parser.add_argument(
+        "--threads", type=int, default=None, help="OpenImageIO threads per worker."
+    )
+    args = parser.parse_args()
+
+    suffixes = {"." + ext.lower().lstrip(".") for ext in args.ext}
+    files = []
+    for path in args.paths:
+        if not os.path.isdir(path):
+            files.append(path)
+            continue
+        for root, _, names in os.walk(path):
+            files.extend(
+                os.path.join(root, name)
+                for name in sorted(names)
+                if os.path.splitext(name)[1].lower() in suffixes
+            )
+
+    report = dedupe(
+        files,
+        workers=args.workers,
+        threads=args.threads,
+        near=args.near,
+        max_distance=args.max_distance,
+    )
+    print(json.dumps(report, indent=2))
+    sys.exit(1 if report["failures"] else 0)
@@ -0,0 +1,361 @@
+"""
+Convert many textures with ``ImageBufAlgo.make_texture`` in a process pool.
+
+A JSON manifest next to the outputs records the source modification time, size
+and (optionally) content hash, along with the options each texture was made
+with. Textures whose source and options did not change since the last run are
+skipped, so re-baking a library after editing one texture only converts that
+texture::
+
+    maketx-batch "textures/**/*.png" --out-dir tx/ --option maketx:filtername=lanczos3
+"""
+
+import argparse
+import glob
+import hashlib
+import json
+import multiprocessing
+import os
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+import OpenImageIO as oiio
+
+from ._workers import split_threads
+
+MANIFEST_NAME = ".maketx-manifest.json"
+
+MODES = {
+    "texture": oiio.MakeTxTexture,
+    "latl": oiio.MakeTxEnvLatl,
+    "latl-from-lightprobe": oiio.MakeTxEnvLatlFromLightProbe,
+    "shadow": oiio.MakeTxShadow,
+    "bump-with-slopes": oiio.MakeTxBumpWithSlopes,
+}
+
+
+def _init_worker(threads: int) -> None:
+    oiio.attribute("threads", threads)
+    oiio.attribute("exr_threads", threads)
+
+
+def file_sha1(path: str, chunk_size: int = 1 << 20) -> str:
+    """Return the SHA-1 hex digest of the bytes of ``path``."""
+    digest = hashlib.sha1()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def make_texture_file(
+    src: str, dst: str, mode: str = "texture", options: Optional[Dict[str, Any]] = None
+) -> float:
+    """
+    Convert ``src`` into the texture ``dst``, returning the conversion time.
+
+    ``options`` are ``make_texture`` configuration attributes, e.g.
+    ``{"maketx:filtername": "lanczos3", "tile_width": 64}``.
+    """
+    start = time.perf_counter()
+    config = oiio.ImageSpec()
+    for name, value in (options or {}).items():
+        config.attribute(name, value)
+    Path(dst).parent.mkdir(parents=True, exist_ok=True)
+    if not oiio.ImageBufAlgo.make_texture(MODES[mode], src, dst, config):
+        raise RuntimeError(oiio.geterror())
+    return time.perf_counter() - start
+
+
+def _bake(
+    src: str, dst: str, mode: str, options: Dict[str, Any], use_hash: bool
+) -> Optional[str]:
+    make_texture_file(src, dst, mode, options)
+    return file_sha1(src) if use_hash else None
+
+
+def _options_key(mode: str, options: Dict[str, Any]) -> str:
+    return json.dumps([mode, options], sort_keys=True)
+
+
+def _source_state(src: str) -> Dict[str, int]:
+    stat = os.stat(src)
+    return {"mtime_ns": stat.st_mtime_ns, "size": stat.st_size}
+
+
+def load_manifest(path: Path) -> Dict[str, Dict[str, Any]]:
+    """Return the manifest entries stored at ``path``, keyed by output path."""
+    try:
+        with open(path, encoding="utf8") as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {}
+    except ValueError:
+        # A corrupt manifest only costs a full rebuild.
+        return {}
+
+
+def save_manifest(path: Path, entries: Dict[str, Dict[str, Any]]) -> None:
+    """Atomically write ``entries`` to the manifest at ``path``."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=path.parent, suffix=".tmp")
+    try:
+        with os.fdopen(fd, "w", encoding="utf8") as f:
+            json.dump(entries, f, indent=1, sort_keys=True)
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+
+
+def expand_sources(patterns: Iterable[str]) -> List[str]:
+    """Expand paths and recursive glob patterns into a sorted list of files."""
+    sources = set()
+    for pattern in patterns:
+        if glob.has_magic(pattern):
+            sources.update(
+                p for p in glob.glob(pattern, recursive=True) if os.path.isfile(p)
+            )
+        else:
+            sources.add(pattern)
+    return sorted(sources)
+
+
+def _output_path(src: str, out_dir: Optional[Path], base_dir: Path) -> str:
+    src_path = Path(src)
+    if out_dir is None:
+        return str(src_path.with_suffix(".tx"))
+    try:
+        rel = src_path.relative_to(base_dir)
+    except ValueError:
+        raise ValueError(
+            f"{src} is not inside the base directory {base_dir}."
+        ) from None
+    return str(out_dir / rel.with_suffix(".tx"))
+
+
+def output_paths(
+    sources: Iterable[str],
+    out_dir: Optional[Path] = None,
+    base_dir: Optional[Path] = None,
+) -> Dict[str, str]:
+    """
+    Return the absolute ``.tx`` path of each absolute source path.
+
+    With ``out_dir``, the layout relative to ``base_dir`` is kept, which
+    defaults to the common parent folder of the sources. Raises ValueError
+    for sources outside of ``base_dir``, for sources sharing an output and
+    for ``.tx`` sources that would be overwritten by their own output.
+    """
+    sources = list(dict.fromkeys(os.path.abspath(src) for src in sources))
+    if out_dir is not None and base_dir is None and sources:
+        base_dir = Path(os.path.commonpath([os.path.dirname(s) for s in sources]))
+    base_dir = Path(os.path.abspath(base_dir or os.curdir))
+    outputs: Dict[str, str] = {}
+    by_output: Dict[str, str] = {}
+    for src in sources:
+        dst = os.path.abspath(_output_path(src, out_dir, base_dir))
+        if dst == src:
+            raise ValueError(f"{src} would be overwritten by its own texture.")
+        if dst in by_output:
+            raise ValueError(f"{by_output[dst]} and {src} would both write {dst}.")
+        by_output[dst] = src
+        outputs[src] = dst
+    return outputs
+
+
+def _is_up_to_date(
+    entry: Optional[Dict[str, Any]],
+    src: str,
+    dst: str,
+    options_key: str,
+    state: Dict[str, int],
+    use_hash: bool,
+) -> Tuple[bool, Optional[str]]:
+    """Return whether ``dst`` is up to date, and the source hash if computed."""
+    if entry is None or not os.path.exists(dst):
+        return False, None
+    if entry.get("src") != src or entry.get("options") != options_key:
+        return False, None
+    if (
+        entry.get("mtime_ns") == state["mtime_ns"]
+        and entry.get("size") == state["size"]
+    ):
+        return True, entry.get("sha1")
+    if not use_hash or entry.get("size") != state["size"]:
+        return False, None
+    # Touched but maybe unchanged, e.g. after a checkout, compare contents.
+    sha1 = file_sha1(src)
+    return sha1 == entry.get("sha1"), sha1
+
+
+def make_textures(
+    sources: Iterable[str],
+    out_dir: Optional[Path] = None,
+    base_dir: Optional[Path] = None,
+    mode: str = "texture",
+    options: Optional[Dict[str, Any]] = None,
+    workers: Optional[int] = None,
+    threads: Optional[int] = None,
+    use_hash: bool = False,
+    force: bool = False,
+    manifest_path: Optional[Path] = None,
+) -> Dict[str, Any]:
+    """
+    Convert ``sources`` into ``.tx`` textures, skipping the up to date ones.
+
+    Outputs go next to their sources, or into ``out_dir``, keeping the layout
+    relative to ``base_dir``, see :func:`output_paths`. ValueError is raised
+    before any conversion if a source is outside of ``base_dir``, if two
+    sources would write the same output or if a ``.tx`` source would write
+    itself. With ``use_hash``, sources whose modification time changed are
+    also skipped when their content did not. ``force`` rebuilds everything.
+    The manifest is stored in ``manifest_path``, by default
+    ``.maketx-manifest.json`` in ``out_dir`` or the current directory.
+
+    Returns a report with converted, skipped and failed counts.
+    """
+    options = dict(options or {})
+    if mode not in MODES:
+        raise ValueError(f"Unknown mode {mode!r}, expected one of {sorted(MODES)}.")
+    out_dir = Path(out_dir) if out_dir is not None else None
+    outputs = output_paths(sources, out_dir, base_dir)
+    if manifest_path is None:
+        manifest_path = (out_dir or Path.cwd()) / MANIFEST_NAME
+    manifest_path = Path(manifest_path)
+    manifest = load_manifest(manifest_path)
+    options_key = _options_key(mode, options)
+
+    todo = []
+    skipped = 0
+    failures: List[Dict[str, str]] = []
+    for src, dst in outputs.items():
+        try:
+            state = _source_state(src)
+        except OSError as e:
+            failures.append({"path": src, "error": str(e)})
+            continue
+        up_to_date, sha1 = False, None
+        if not force:
+            up_to_date, sha1 = _is_up_to_date(
+                manifest.get(dst), src, dst, options_key, state, use_hash
+            )
+        if up_to_date:
+            manifest[dst].update(state)
+            skipped += 1
+        else:
+            todo.append((src, dst, state, sha1))
+
+    workers, threads = split_threads(workers, threads)
+    start = time.perf_counter()
+    converted = 0
+    # Forking a process whose OIIO thread pool is already running can deadlock.
+    with ProcessPoolExecutor(
+        max_workers=workers,
+        mp_context=multiprocessing.get_context("spawn"),
+        initializer=_init_worker,
+        initargs=(threads,),
+    ) as executor:
+        futures = {
+            executor.submit(
+                _bake, src, dst, mode, options, use_hash and sha1 is None
+            ): (src, dst, state, sha1)
+            for src, dst, state, sha1 in todo
+        }
+        for future in as_completed(futures):
+            src, dst, state, sha1 = futures[future]
+            try:
+                sha1 = future.result() or sha1
+            except Exception as e:  # pylint: disable=broad-except
+                manifest.pop(dst, None)
+                failures.append({"path": src, "error": str(e)})
+                continue
+            converted += 1
+            manifest[dst] = dict(state, src=src, options=options_key, sha1=sha1)
+    save_manifest(manifest_path, manifest)
+    elapsed = time.perf_counter() - start
+
+    return {
+        "converted": converted,
+        "skipped": skipped,
+        "failed": len(failures),
+        "failures": failures,
+        "workers": workers,
+        "threads_per_worker": threads,
+        "seconds": elapsed,
+    }
+
+
+def _parse_option(text: str) -> Tuple[str, Any]:
+    name, sep, value = text.partition("=")
+    if not sep:
+        raise argparse.ArgumentTypeError(f"Expected NAME=VALUE, got {text!r}.")
+    for cast in (int, float):
+        try:
+            return name, cast(value)
+        except ValueError:
+            pass
+    return name, value
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        prog="maketx-batch",
+        description="Convert many textures with make_texture, skipping unchanged ones.",
+    )
+    parser.add_argument("sources", nargs="+", help="Files or glob patterns (**).")
+    parser.add_argument("-o", "--out-dir", type=Path, default=None)
+    parser.add_argument(
+        "--base-dir",
+        type=Path,
+        default=None,
+        help="Keep the layout relative to this directory in --out-dir, "
+        "by default the common parent folder of the sources.",
+    )
+    parser.add_argument("--mode", choices=sorted(MODES), default="texture")
+    parser.add_argument(
+        "--option",
+        action="append",
+        type=_parse_option,
+        default=[],
+        metavar="NAME=VALUE",
+        help="make_texture attribute, e.g. maketx:filtername=lanczos3.",
+    )
+    parser.add_argument("--manifest", type=Path, default=None)
+    parser.add_argument(
+        "--hash", action="store_true", help="Compare source contents on mtime change."
+    )
+    parser.add_argument("-f", "--force", action="store_true", help="Rebuild all.")
+    parser.add_argument("-j", "--workers", type=int, default=None, help="Processes.")
+    parser.add_argument(
+        "--threads", type=int, default=None, help="OpenImageIO threads per worker."
+    )
+    args = parser.parse_args()
+
+    try:
+        report = make_textures(
+            expand_sources(args.sources),
+            out_dir=args.out_dir,
+            base_dir=args.base_dir,
+            mode=args.mode,
+            options=dict(args.option),
+            workers=args.workers,
+            threads=args.threads,
+            use_hash=args.hash,
+            force=args.force,
+            manifest_path=args.manifest,
+        )
+    except ValueError as e:
+        parser.error(str(e))
+    for failure in report["failures"]:
+        print(f"Error: {failure['path']}: {failure['error']}", file=sys.stderr)
+    print(
+        f"{report['converted']} textures converted, {report['skipped']} up to date, "
+        f"{report['failed']} failed in {report['seconds']:.2f}s with "
+        f"{report['workers']} workers x {report['threads_per_worker']} threads"
+    )
+    sys.exit(1 if report["failed"] else 0)
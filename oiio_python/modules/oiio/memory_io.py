@@ -0,0 +1,174 @@
+"""
+Read and write images held in memory, e.g. received or sent over HTTP.
+
+Encoded images are decoded from ``bytes``, ``bytearray``, ``memoryview`` or
+any buffer through OpenImageIO's IOProxy (``IOMemReader``), and encoded into
+``bytes`` through ``IOVecOutput``, without temporary files::
+
+    buf = memory_io.read(request_body)
+    spec = memory_io.read_spec(request_body)
+    body = memory_io.write(buf, "jpg", oiio.UINT8)
+
+The format is guessed from the data, or given by a file name or extension.
+Formats whose reader or writer has no IOProxy support, and bindings built
+without ``ImageBuf.from_bytes``, go through a temporary file instead.
+"""
+
+import os
+import tempfile
+from functools import lru_cache
+from typing import Optional, Union
+
+import OpenImageIO as oiio
+
+Data = Union[bytes, bytearray, memoryview]
+
+HAS_IOPROXY = hasattr(oiio.ImageBuf, "from_bytes")
+
+# Magic bytes at the start of the file and the matching format extension.
+_SIGNATURES = (
+    (b"\xff\xd8\xff", "jpg"),
+    (b"\x89PNG\r\n\x1a\n", "png"),
+    (b"\x76\x2f\x31\x01", "exr"),
+    (b"II*\x00", "tif"),
+    (b"MM\x00*", "tif"),
+    (b"II+\x00", "tif"),
+    (b"MM\x00+", "tif"),
+    (b"GIF87a", "gif"),
+    (b"GIF89a", "gif"),
+    (b"#?RADIANCE", "hdr"),
+    (b"#?RGBE", "hdr"),
+    (b"SDPX", "dpx"),
+    (b"XPDS", "dpx"),
+    (b"8BPS", "psd"),
+    (b"\x00\x00\x00\x0cjP  \r\n\x87\n", "jp2"),
+    (b"\xff\x4f\xff\x51", "j2k"),
+    (b"\x80\x2a\x5f\xd7", "cin"),
+    (b"BM", "bmp"),
+)
+
+
+def guess_format(data: Data) -> Optional[str]:
+    """Return the file extension of the format of ``data``, None if unknown."""
+    head = bytes(memoryview(data)[:16])
+    if head[:4] == b"RIFF" and head[8:12] == b"WEBP":
+        return "webp"
+    for magic, ext in _SIGNATURES:
+        if head.startswith(magic):
+            return ext
+    return None
+
+
+def _filename(data: Data, filename: Optional[str]) -> str:
+    if filename:
+        return filename
+    ext = guess_format(data)
+    if ext is None:
+        raise ValueError("Unknown image format, pass a filename or extension.")
+    return ext
+
+
+def _extension(filename: str) -> str:
+    return os.path.splitext(filename)[1].lstrip(".") or filename
+
+
+@lru_cache(maxsize=None)
+def _supports_ioproxy(ext: str, output: bool) -> bool:
+    plugin = (oiio.ImageOutput if output else oiio.ImageInput).create(ext)
+    if plugin is None:
+        oiio.geterror()
+        return False
+    return bool(plugin.supports("ioproxy"))
+
+
+def _check(ok: bool, buf: oiio.ImageBuf) -> oiio.ImageBuf:
+    if not ok or buf.has_error:
+        raise RuntimeError(buf.geterror() or oiio.geterror())
+    return buf
+
+
+class _TemporaryCopy:
+    """Temporary file holding ``data``, for formats without IOProxy support."""
+
+    def __init__(self, data: Data, ext: str) -> None:
+        fd, self.path = tempfile.mkstemp(suffix="." + ext)
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+
+    def __enter__(self) -> str:
+        return self.path
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        os.unlink(self.path)
+
+
+def read_spec(
+    data: Data,
+    filename: Optional[str] = None,
+    subimage: int = 0,
+    miplevel: int = 0,
+) -> oiio.ImageSpec:
+    """
+    Return the ``ImageSpec`` of the encoded image ``data``, decoding its header only.
+
+    ``filename`` only selects the format, e.g. "upload.exr" or "exr", and is
+    guessed from ``data`` when not given.
+    """
+    filename = _filename(data, filename)
+    if HAS_IOPROXY and _supports_ioproxy(_extension(filename), False):
+        spec = oiio.ImageInput.spec_from_bytes(data, filename, subimage, miplevel)
+        if spec is None:
+            raise RuntimeError(oiio.geterror())
+        return spec
+    with _TemporaryCopy(data, _extension(filename)) as path:
+        buf = oiio.ImageBuf()
+        _check(buf.init_spec(path, subimage, miplevel), buf)
+        return oiio.ImageSpec(buf.spec())
+
+
+def read(
+    data: Data,
+    filename: Optional[str] = None,
+    subimage: int = 0,
+    miplevel: int = 0,
+    format: oiio.TypeDesc = oiio.TypeUnknown,  # pylint: disable=redefined-builtin
+) -> oiio.ImageBuf:
+    """
+    Decode the encoded image ``data`` into an ``ImageBuf``.
+
+    Pixels are converted to ``format`` if given. ``filename`` only selects the
+    format, and is guessed from ``data`` when not given.
+    """
+    filename = _filename(data, filename)
+    if HAS_IOPROXY and _supports_ioproxy(_extension(filename), False):
+        buf = oiio.ImageBuf.from_bytes(data, filename, subimage, miplevel, format)
+        return _check(True, buf)
+    with _TemporaryCopy(data, _extension(filename)) as path:
+        buf = oiio.ImageBuf(path, subimage, miplevel)
+        return _check(buf.read(subimage, miplevel, force=True, convert=format), buf)
+
+
+def write(
+    buf: oiio.ImageBuf, filename: str, dtype: oiio.TypeDesc = oiio.TypeUnknown
+) -> bytes:
+    """
+    Encode ``buf`` and return the file contents.
+
+    ``filename`` selects the format, e.g. "out.png" or "png", and metadata of
+    ``buf`` such as "compression" is passed to the writer as with
+    ``ImageBuf.write``. Pixels are converted to ``dtype`` if given.
+    """
+    ext = _extension(filename)
+    if HAS_IOPROXY and _supports_ioproxy(ext, True):
+        data = buf.to_bytes(filename, dtype)
+        if data is None:
+            raise RuntimeError(oiio.geterror())
+        return data
+    fd, path = tempfile.mkstemp(suffix="." + ext)
+    os.close(fd)
+    try:
+        _check(buf.write(path, dtype), buf)
+        with open(path, "rb") as f:
+            return f.read()
+    finally:
+        os.unlink(path)
@@ -0,0 +1,343 @@
+"""
+Index image headers of large libraries into an SQLite database.
+
+Files are opened with ``ImageInput.open``, which only reads headers, in a pool
+of worker processes. Rows are keyed by path and skipped on later scans when the
+file modification time and size did not change, so re-scans are incremental.
+Queries then run against the database instead of re-opening any image::
+
+    oiio-index scan library.db /mnt/plates
+    oiio-index query library.db --format openexr --min-width 3840 --compression dwaa
+"""
+
+import argparse
+import json
+import multiprocessing
+import os
+import sqlite3
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+import OpenImageIO as oiio
+
+from ._workers import cpu_count
+
+DEFAULT_ATTRIBUTES = (
+    "oiio:ColorSpace",
+    "PixelAspectRatio",
+    "FramesPerSecond",
+    "DateTime",
+    "Software",
+)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS images (
+    path TEXT PRIMARY KEY,
+    mtime_ns INTEGER NOT NULL,
+    size INTEGER NOT NULL,
+    format TEXT,
+    width INTEGER,
+    height INTEGER,
+    depth INTEGER,
+    nchannels INTEGER,
+    channelnames TEXT,
+    dtype TEXT,
+    tile_width INTEGER,
+    tile_height INTEGER,
+    compression TEXT,
+    subimages INTEGER,
+    attributes TEXT,
+    error TEXT
+);
+CREATE INDEX IF NOT EXISTS images_format ON images (format, width, height);
+CREATE INDEX IF NOT EXISTS images_compression ON images (compression);
+"""
+
+_COLUMNS = (
+    "path",
+    "mtime_ns",
+    "size",
+    "format",
+    "width",
+    "height",
+    "depth",
+    "nchannels",
+    "channelnames",
+    "dtype",
+    "tile_width",
+    "tile_height",
+    "compression",
+    "subimages",
+    "attributes",
+    "error",
+)
+
+FileEntry = Tuple[str, int, int]
+
+
+def known_extensions() -> List[str]:
+    """Return the file extensions of all formats supported by OpenImageIO."""
+    extensions = []
+    for entry in oiio.get_string_attribute("extension_list").split(";"):
+        _, _, exts = entry.partition(":")
+        extensions.extend(ext for ext in exts.split(",") if ext)
+    return extensions
+
+
+def connect(db_path: str) -> sqlite3.Connection:
+    """Open the index at ``db_path``, creating its tables if needed."""
+    db = sqlite3.connect(db_path)
+    db.row_factory = sqlite3.Row
+    db.executescript(_SCHEMA)
+    return db
+
+
+def read_header(
+    path: str, mtime_ns: int, size: int, attributes: Sequence[str] = DEFAULT_ATTRIBUTES
+) -> Dict[str, Any]:
+    """Open ``path`` header only and return its index row."""
+    row: Dict[str, Any] = dict.fromkeys(_COLUMNS)
+    row.update(path=path, mtime_ns=mtime_ns, size=size)
+    inp = oiio.ImageInput.open(path)
+    if inp is None:
+        row["error"] = oiio.geterror() or "Cannot open file."
+        return row
+    try:
+        spec = inp.spec()
+        extra = {name: spec.getattribute(name) for name in attributes}
+        row.update(
+            format=inp.format_name(),
+            width=spec.width,
+            height=spec.height,
+            depth=spec.depth,
+            nchannels=spec.nchannels,
+            channelnames=",".join(spec.channelnames),
+            dtype=str(spec.format),
+            tile_width=spec.tile_width,
+            tile_height=spec.tile_height,
+            compression=spec.get_string_attribute("compression") or None,
+            subimages=spec.get_int_attribute("oiio:subimages", 0) or None,
+            attributes=json.dumps(
+                {k: v for k, v in extra.items() if v is not None}, default=str
+            ),
+        )
+    finally:
+        inp.close()
+    return row
+
+
+def _read_header(entry: FileEntry, attributes: Sequence[str]) -> Dict[str, Any]:
+    return read_header(*entry, attributes=attributes)
+
+
+def _init_worker() -> None:
+    # Headers are tiny, one OIIO thread per worker is enough.
+    oiio.attribute("threads", 1)
+
+
+def find_files(roots: Iterable[str], extensions: Sequence[str]) -> Iterator[FileEntry]:
+    """Yield (path, mtime_ns, size) for files under ``roots`` with ``extensions``."""
+    suffixes = {"." + ext.lower().lstrip(".") for ext in extensions}
+    for root in roots:
+        for dirpath, _, files in os.walk(root):
+            for name in files:
+                if os.path.splitext(name)[1].lower() not in suffixes:
+                    continue
+                path = os.path.abspath(os.path.join(dirpath, name))
+                try:
+                    stat = os.stat(path)
+                except OSError:
+                    continue
+                yield path, stat.st_mtime_ns, stat.st_size
+
+
+def scan(
+    db: sqlite3.Connection,
+    roots: Iterable[str],
+    extensions: Optional[Sequence[str]] = None,
+    attributes: Sequence[str] = DEFAULT_ATTRIBUTES,
+    workers: Optional[int] = None,
+    prune: bool = True,
+    batch_size: int = 1000,
+) -> Dict[str, Any]:
+    """
+    Index images under ``roots``, only reading headers of new or changed files.
+
+    ``extensions`` defaults to every format known to OpenImageIO. With
+    ``prune``, rows of files that disappeared from ``roots`` are deleted.
+    Returns counts of scanned, skipped, failed and removed files.
+    """
+    roots = [os.path.abspath(root) for root in roots]
+    known = {
+        row["path"]: (row["mtime_ns"], row["size"])
+        for row in db.execute("SELECT path, mtime_ns, size FROM images")
+    }
+    seen = set()
+    todo: List[FileEntry] = []
+    for entry in find_files(roots, extensions or known_extensions()):
+        seen.add(entry[0])
+        if known.get(entry[0]) != entry[1:]:
+            todo.append(entry)
+
+    start = time.perf_counter()
+    insert = (
+        f"INSERT OR REPLACE INTO images ({', '.join(_COLUMNS)}) "
+        f"VALUES ({', '.join('?' * len(_COLUMNS))})"
+    )
+    failed = 0
+    pending: List[Tuple[Any, ...]] = []
+
+    def _store(row: Dict[str, Any]) -> None:
+        nonlocal failed
+        failed += row["error"] is not None
+        pending.append(tuple(row[column] for column in _COLUMNS))
+        if len(pending) >= batch_size:
+            with db:
+                db.executemany(insert, pending)
+            pending.clear()
+
+    workers = min(workers or cpu_count(), max(1, len(todo)))
+    if workers <= 1:
+        for entry in todo:
+            _store(read_header(*entry, attributes=attributes))
+    else:
+        # Forking a process whose OIIO thread pool is already running can deadlock.
+        with ProcessPoolExecutor(
+            max_workers=workers,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_init_worker,
+        ) as executor:
+            chunksize = max(1, min(256, len(todo) // (workers * 4)))
+            for row in executor.map(
+                _read_header, todo, [attributes] * len(todo), chunksize=chunksize
+            ):
+                _store(row)
+
+    removed = 0
+    with db:
+        db.executemany(insert, pending)
+        if prune:
+            stale = [
+                (path,)
+                for path in known
+                if path not in seen
+                and any(path.startswith(os.path.join(root, "")) for root in roots)
+            ]
+            db.executemany("DELETE FROM images WHERE path = ?", stale)
+            removed = len(stale)
+
+    return {
+        "scanned": len(todo),
+        "skipped": len(seen) - len(todo),
+        "failed": failed,
+        "removed": removed,
+        "seconds": time.perf_counter() - start,
+    }
+
+
+def query(
+    db: sqlite3.Connection,
+    format: Optional[str] = None,  # pylint: disable=redefined-builtin
+    min_width: Optional[int] = None,
+    min_height: Optional[int] = None,
+    nchannels: Optional[int] = None,
+    dtype: Optional[str] = None,
+    compression: Optional[str] = None,
+    tiled: Optional[bool] = None,
+    where: Optional[str] = None,
+    params: Sequence[Any] = (),
+) -> List[sqlite3.Row]:
+    """
+    Return the indexed rows matching all given filters.
+
+    ``compression`` matches by prefix, so ``"dwaa"`` also matches ``"dwaa:45"``.
+    ``where`` is an extra raw SQL condition using ``params`` placeholders.
+    """
+    conditions = ["error IS NULL"]
+    args: List[Any] = []
+    for condition, value in (
+        ("format = ?", format),
+        ("width >= ?", min_width),
+        ("height >= ?", min_height),
+        ("nchannels = ?", nchannels),
+        ("dtype = ?", dtype),
+        ("compression LIKE ? || '%'", compression),
+    ):
+        if value is not None:
+            conditions.append(condition)
+            args.append(value)
+    if tiled is not None:
+        conditions.append("tile_width > 0" if tiled else "tile_width = 0")
+    if where:
+        conditions.append(f"({where})")
+        args.extend(params)
+    return db.execute(
+        f"SELECT * FROM images WHERE {' AND '.join(conditions)} ORDER BY path", args
+    ).fetchall()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        prog="oiio-index", description="Index and query image headers with SQLite."
+    )
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    scan_parser = commands.add_parser("scan", help="Add or refresh directories.")
+    scan_parser.add_argument("db", help="SQLite database path.")
+    scan_parser.add_argument("roots", nargs="+", help="Directories to scan.")
+    scan_parser.add_argument("--ext", nargs="+", default=None, help="e.g. exr dpx.")
+    scan_parser.add_argument(
+        "--attributes",
+        nargs="+",
+        default=list(DEFAULT_ATTRIBUTES),
+        help="ImageSpec attributes to store.",
+    )
+    scan_parser.add_argument("-j", "--workers", type=int, default=None)
+    scan_parser.add_argument("--no-prune", action="store_true")
+
+    query_parser = commands.add_parser("query", help="Print matching paths.")
+    query_parser.add_argument("db", help="SQLite database path.")
+    query_parser.add_argument("--format", default=None, help="e.g. openexr.")
+    query_parser.add_argument("--min-width", type=int, default=None)
+    query_parser.add_argument("--min-height", type=int, default=None)
+    query_parser.add_argument("--nchannels", type=int, default=None)
+    query_parser.add_argument("--dtype", default=None, help="e.g. half.")
+    query_parser.add_argument("--compression", default=None, help="e.g. dwaa.")
+    query_parser.add_argument("--where", default=None, help="Raw SQL condition.")
+    query_parser.add_argument("--json", action="store_true", help="Print full rows.")
+    args = parser.parse_args()
+
+    db = connect(args.db)
+    try:
+        if args.command == "scan":
+            report = scan(
+                db,
+                args.roots,
+                extensions=args.ext,
+                attributes=args.attributes,
+                workers=args.workers,
+                prune=not args.no_prune,
+            )
+            print(
+                f"{report['scanned']} scanned, {report['skipped']} unchanged, "
+                f"{report['failed']} failed, {report['removed']} removed "
+                f"in {report['seconds']:.2f}s"
+            )
+            sys.exit(1 if report["failed"] else 0)
+
+        rows = query(
+            db,
+            format=args.format,
+            min_width=args.min_width,
+            min_height=args.min_height,
+            nchannels=args.nchannels,
+            dtype=args.dtype,
+            compression=args.compression,
+            where=args.where,
+        )
+        for row in rows:
+            print(json.dumps(dict(row)) if args.json else row["path"])
+    finally:
+        db.close()
@@ -0,0 +1,154 @@
+"""
+Uncompressed, memory-mappable frames for pipeline stages on the same host.
+
+A raw frame file holds a small header, the ``ImageSpec`` serialized as XML and
+the interleaved pixels, starting on a page boundary. Reading a frame maps the
+file instead of decoding it, so stages exchanging intermediate frames through
+the page cache skip EXR compression entirely::
+
+    write_frame("/dev/shm/frame.oiioraw", buf)
+    pixels, spec = open_frame("/dev/shm/frame.oiioraw")
+    buf = open_imagebuf("/dev/shm/frame.oiioraw")
+
+Layout, little endian: 8 bytes magic, uint32 version, uint32 header size,
+uint64 pixel data offset, the JSON header, padding, then the pixels.
+
+Pixels are stored interleaved (height, width, channels) rather than as one
+plane per channel, on purpose: it is the layout of ``ImageBuf`` local pixels
+and of OpenImageIO's NumPy arrays, so :func:`open_imagebuf` can wrap the
+mapping without copying. A single channel plane is still available without
+copying as the strided view ``pixels[..., c]``.
+"""
+
+import json
+import mmap
+import os
+import struct
+from typing import Optional, Tuple, Union
+
+import numpy as np
+import OpenImageIO as oiio
+
+MAGIC = b"OIIORAWF"
+VERSION = 1
+EXTENSION = ".oiioraw"
+
+_PREFIX = struct.Struct("<8sIIQ")
+_ALIGNMENT = max(mmap.PAGESIZE, 4096)
+
+
+def _align(value: int) -> int:
+    return -(-value // _ALIGNMENT) * _ALIGNMENT
+
+
+def write_frame(
+    path: str,
+    image: Union[oiio.ImageBuf, np.ndarray],
+    spec: Optional[oiio.ImageSpec] = None,
+) -> None:
+    """
+    Write ``image`` to the raw frame file ``path``.
+
+    ``image`` is an ``ImageBuf``, written in its native pixel type, or a
+    (height, width, channels) array, described by ``spec`` when given. The
+    file is written next to ``path`` and renamed, so readers never map a
+    partial frame.
+    """
+    if isinstance(image, oiio.ImageBuf):
+        spec = image.spec()
+        pixels = image.get_pixels(spec.format)
+        if pixels is None or image.has_error:
+            raise RuntimeError(image.geterror() or oiio.geterror())
+    else:
+        pixels = image if image.ndim == 3 else image[..., np.newaxis]
+        if spec is None:
+            spec = oiio.ImageBuf(pixels).spec()
+    pixels = np.ascontiguousarray(pixels)
+    if pixels.shape != (spec.height, spec.width, spec.nchannels):
+        raise ValueError(
+            f"Pixels of shape {pixels.shape} don't match the spec "
+            f"({spec.height}, {spec.width}, {spec.nchannels})."
+        )
+
+    header = json.dumps(
+        {
+            "dtype": pixels.dtype.str,
+            "shape": pixels.shape,
+            "spec": spec.serialize("xml"),
+        }
+    ).encode("utf8")
+    offset = _align(_PREFIX.size + len(header))
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    try:
+        with open(tmp_path, "wb") as f:
+            f.write(_PREFIX.pack(MAGIC, VERSION, len(header), offset))
+            f.write(header)
+            f.seek(offset)
+            f.write(memoryview(pixels).cast("B"))
+        os.replace(tmp_path, path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.unlink(tmp_path)
+
+
+def read_header(path: str) -> Tuple[oiio.ImageSpec, np.dtype, Tuple[int, ...], int]:
+    """Return the spec, pixel dtype, pixel shape and data offset of a raw frame."""
+    with open(path, "rb") as f:
+        prefix = f.read(_PREFIX.size)
+        if len(prefix) < _PREFIX.size:
+            raise ValueError(f"{path} is not a raw frame file.")
+        magic, version, header_size, offset = _PREFIX.unpack(prefix)
+        if magic != MAGIC:
+            raise ValueError(f"{path} is not a raw frame file.")
+        if version > VERSION:
+            raise ValueError(f"{path} has unsupported raw frame version {version}.")
+        header = json.loads(f.read(header_size))
+    spec = oiio.ImageSpec()
+    spec.from_xml(header["spec"])
+    return spec, np.dtype(header["dtype"]), tuple(header["shape"]), offset
+
+
+def open_frame(path: str, mode: str = "r") -> Tuple[np.memmap, oiio.ImageSpec]:
+    """
+    Map the pixels of the raw frame ``path`` without reading them.
+
+    ``mode`` is the ``numpy.memmap`` mode: "r" for read-only, "r+" to modify
+    the file in place, "c" for private copy-on-write pages. Returns the
+    (height, width, channels) array and the frame ``ImageSpec``.
+    """
+    spec, dtype, shape, offset = read_header(path)
+    pixels = np.memmap(path, dtype=dtype, mode=mode, offset=offset, shape=shape)
+    return pixels, spec
+
+
+def open_imagebuf(path: str) -> oiio.ImageBuf:
+    """
+    Return an ``ImageBuf`` holding the raw frame ``path``.
+
+    With ``ImageBuf.wrap`` the ``ImageBuf`` uses the mapped pages directly,
+    copy-on-write so the file is never modified. Bindings without ``wrap``
+    fall back to copying the pixels.
+    """
+    pixels, spec = open_frame(path, mode="c")
+    if hasattr(oiio.ImageBuf, "wrap"):
+        buf = oiio.ImageBuf.wrap(pixels)
+    else:
+        buf = oiio.ImageBuf(np.asarray(pixels))
+    dst_spec = buf.specmod()
+    dst_spec.x, dst_spec.y, dst_spec.z = spec.x, spec.y, spec.z
+    dst_spec.full_x, dst_spec.full_y, dst_spec.full_z = (
+        spec.full_x,
+        spec.full_y,
+        spec.full_z,
+    )
+    dst_spec.full_width, dst_spec.full_height, dst_spec.full_depth = (
+        spec.full_width,
+        spec.full_height,
+        spec.full_depth,
+    )
+    dst_spec.channelnames = spec.channelnames
+    dst_spec.alpha_channel = spec.alpha_channel
+    dst_spec.z_channel = spec.z_channel
+    for param in spec.extra_attribs:
+        dst_spec.attribute(param.name, param.type, param.value)
+    return buf
@@ -0,0 +1,304 @@
+"""
+Stream images in bounded-size NumPy chunks instead of whole-image buffers.
+
+Chunks are read with ``ImageInput.read_tiles`` / ``read_scanlines`` and written
+with ``ImageOutput.write_tiles`` / ``write_scanlines``, so huge plates can be
+processed in constant memory.
+"""
+
+import queue
+import threading
+from typing import Iterator, Optional, Tuple
+
+import numpy as np
+import OpenImageIO as oiio
+
+Chunk = Tuple[oiio.ROI, np.ndarray]
+
+
+def _round_up(value: int, multiple: int) -> int:
+    return -(-value // multiple) * multiple
+
+
+def _channel_range(
+    spec: oiio.ImageSpec, channels: Optional[Tuple[int, int]]
+) -> Tuple[int, int]:
+    if channels is None:
+        return 0, spec.nchannels
+    chbegin, chend = channels
+    if not 0 <= chbegin < chend <= spec.nchannels:
+        raise ValueError(f"Invalid channel range {channels} for {spec.nchannels}.")
+    return chbegin, chend
+
+
+def _read_chunks(
+    inp: oiio.ImageInput,
+    tile: Tuple[int, int],
+    channels: Optional[Tuple[int, int]],
+    format: oiio.TypeDesc,  # pylint: disable=redefined-builtin
+    subimage: int,
+    miplevel: int,
+) -> Iterator[Chunk]:
+    spec = inp.spec(subimage, miplevel)
+    chbegin, chend = _channel_range(spec, channels)
+    xend = spec.x + spec.width
+    yend = spec.y + spec.height
+    tile_width = tile[0] if tile[0] else spec.width
+    tile_height = tile[1] if tile[1] else spec.height
+
+    if spec.tile_width > 0:
+        # Align chunks on file tiles so each tile is decoded once.
+        chunk_width = _round_up(tile_width, spec.tile_width)
+        chunk_height = _round_up(tile_height, spec.tile_height)
+        zstep = max(1, spec.tile_depth)
+        for z in range(spec.z, spec.z + spec.depth, zstep):
+            zend = min(z + zstep, spec.z + spec.depth)
+            for y in range(spec.y, yend, chunk_height):
+                y1 = min(y + chunk_height, yend)
+                for x in range(spec.x, xend, chunk_width):
+                    x1 = min(x + chunk_width, xend)
+                    pixels = inp.read_tiles(
+                        subimage,
+                        miplevel,
+                        x,
+                        x1,
+                        y,
+                        y1,
+                        z,
+                        zend,
+                        chbegin,
+                        chend,
+                        format,
+                    )
+                    if pixels is None:
+                        raise RuntimeError(inp.geterror() or oiio.geterror())
+                    yield oiio.ROI(x, x1, y, y1, z, zend, chbegin, chend), pixels
+    else:
+        # Scanline files decode full rows, only keep one band of rows in memory.
+        for z in range(spec.z, spec.z + spec.depth):
+            for y in range(spec.y, yend, tile_height):
+                y1 = min(y + tile_height, yend)
+                band = inp.read_scanlines(
+                    subimage, miplevel, y, y1, z, chbegin, chend, format
+                )
+                if band is None:
+                    raise RuntimeError(inp.geterror() or oiio.geterror())
+                for x in range(spec.x, xend, tile_width):
+                    x1 = min(x + tile_width, xend)
+                    pixels = band[:, x - spec.x : x1 - spec.x]
+                    if tile_width < spec.width:
+                        # Don't keep the whole band alive through a view.
+                        pixels = pixels.copy()
+                    yield oiio.ROI(x, x1, y, y1, z, z + 1, chbegin, chend), pixels
+
+
+def _prefetched(chunks: Iterator[Chunk], depth: int) -> Iterator[Chunk]:
+    """Run ``chunks`` in a background thread, keeping ``depth`` chunks ahead."""
+    items: "queue.Queue" = queue.Queue(maxsize=depth)
+    stop = threading.Event()
+    done = object()
+
+    def _put(item) -> bool:
+        while not stop.is_set():
+            try:
+                items.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def _producer() -> None:
+        try:
+            for chunk in chunks:
+                if not _put(chunk):
+                    return
+        except BaseException as e:  # pylint: disable=broad-except
+            _put(e)
+            return
+        _put(done)
+
+    thread = threading.Thread(target=_producer, daemon=True)
+    thread.start()
+    try:
+        while True:
+            item = items.get()
+            if item is done:
+                return
+            if isinstance(item, BaseException):
+                raise item
+            yield item
+    finally:
+        stop.set()
+        thread.join()
+
+
+def iter_tiles(
+    path: str,
+    tile: Tuple[int, int] = (256, 256),
+    channels: Optional[Tuple[int, int]] = None,
+    format: oiio.TypeDesc = oiio.FLOAT,  # pylint: disable=redefined-builtin
+    subimage: int = 0,
+    miplevel: int = 0,
+    prefetch: int = 1,
+) -> Iterator[Chunk]:
+    """
+    Yield ``(roi, pixels)`` chunks covering the image at ``path``.
+
+    ``pixels`` is a NumPy array of shape (height, width, channels) holding the
+    region described by ``roi``. ``tile`` is the requested chunk size, rounded
+    up to the file tile size for tiled images; use ``0`` for a full dimension.
+    ``channels`` is an optional (begin, end) channel range.
+
+    With ``prefetch`` > 0, the next chunks are decoded in a background thread
+    while the caller processes the current one. Set it to 0 to read inline.
+    """
+    inp = oiio.ImageInput.open(path)
+    if inp is None:
+        raise RuntimeError(oiio.geterror())
+    try:
+        chunks = _read_chunks(inp, tile, channels, format, subimage, miplevel)
+        if prefetch > 0:
+            chunks = _prefetched(chunks, prefetch)
+        yield from chunks
+    finally:
+        chunks.close()
+        inp.close()
+
+
+def iter_scanlines(
+    path: str,
+    rows: int = 64,
+    channels: Optional[Tuple[int, int]] = None,
+    format: oiio.TypeDesc = oiio.FLOAT,  # pylint: disable=redefined-builtin
+    subimage: int = 0,
+    miplevel: int = 0,
+    prefetch: int = 1,
+) -> Iterator[Chunk]:
+    """Yield full-width ``(roi, pixels)`` bands of ``rows`` scanlines."""
+    return iter_tiles(path, (0, rows), channels, format, subimage, miplevel, prefetch)
+
+
+class ImageStreamWriter:
+    """
+    Write an image incrementally from NumPy blocks, without a full frame buffer.
+
+    Use as a context manager and call :meth:`write` with ``(roi, pixels)``
+    blocks, e.g. the ones yielded by :func:`iter_tiles`. ``pixels`` must have
+    shape (height, width, nchannels) matching the ``roi`` extent.
+
+    When ``spec`` is tiled, blocks must be aligned on tile boundaries and may
+    arrive in any order. Otherwise blocks are gathered into one band of rows at
+    a time, so they must arrive top to bottom, each band being covered by
+    blocks sharing the same rows before the next band starts.
+    """
+
+    def __init__(self, path: str, spec: oiio.ImageSpec) -> None:
+        self.path = path
+        self.spec = spec
+        self._out = oiio.ImageOutput.create(path)
+        if self._out is None:
+            raise RuntimeError(oiio.geterror())
+        self.tiled = spec.tile_width > 0 and bool(self._out.supports("tiles"))
+        if not self._out.open(path, spec):
+            raise RuntimeError(self._out.geterror())
+        self._next_y = spec.y
+        self._band: Optional[np.ndarray] = None
+        self._band_roi: Optional[oiio.ROI] = None
+        # Columns of the current band written so far, blocks may overlap.
+        self._band_covered: Optional[np.ndarray] = None
+
+    def __enter__(self) -> "ImageStreamWriter":
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        self.close(check_complete=exc_type is None)
+
+    def _check_block(self, roi: oiio.ROI, pixels: np.ndarray) -> None:
+        expected = (roi.height, roi.width, self.spec.nchannels)
+        if pixels.shape[:2] != expected[:2] or pixels.shape[-1] != expected[2]:
+            raise ValueError(f"Pixels of shape {pixels.shape} don't match {expected}.")
+        spec = self.spec
+        if (
+            roi.xbegin < spec.x
+            or roi.ybegin < spec.y
+            or roi.xend > spec.x + spec.width
+            or roi.yend > spec.y + spec.height
+        ):
+            raise ValueError("Block is outside of the image data window.")
+
+    def write(self, roi: oiio.ROI, pixels: np.ndarray) -> None:
+        """Write the ``pixels`` block covering ``roi``."""
+        self._check_block(roi, pixels)
+        if self.tiled:
+            self._write_tiles(roi, pixels)
+        else:
+            self._write_rows(roi, pixels)
+
+    def _write_tiles(self, roi: oiio.ROI, pixels: np.ndarray) -> None:
+        spec = self.spec
+        for begin, end, origin, size, tile_size in (
+            (roi.xbegin, roi.xend, spec.x, spec.width, spec.tile_width),
+            (roi.ybegin, roi.yend, spec.y, spec.height, spec.tile_height),
+        ):
+            if (begin - origin) % tile_size or (
+                (end - origin) % tile_size and end != origin + size
+            ):
+                raise ValueError("Tiled output blocks must be tile aligned.")
+        ok = self._out.write_tiles(
+            roi.xbegin,
+            roi.xend,
+            roi.ybegin,
+            roi.yend,
+            roi.zbegin,
+            roi.zend,
+            np.ascontiguousarray(pixels),
+        )
+        if not ok:
+            raise RuntimeError(self._out.geterror())
+
+    def _write_rows(self, roi: oiio.ROI, pixels: np.ndarray) -> None:
+        spec = self.spec
+        if roi.ybegin != self._next_y:
+            raise ValueError(
+                f"Scanline output expects rows starting at {self._next_y}, "
+                f"got {roi.ybegin}."
+            )
+        if roi.width == spec.width and self._band is None:
+            # Full width blocks don't need the band buffer.
+            self._flush(roi.ybegin, roi.yend, roi.zbegin, pixels)
+            return
+
+        if self._band is None:
+            self._band = np.empty(
+                (roi.height, spec.width, spec.nchannels), dtype=pixels.dtype
+            )
+            self._band_roi = roi
+            self._band_covered = np.zeros(spec.width, dtype=bool)
+        elif roi.yend != self._band_roi.yend:
+            raise ValueError("Blocks of a band of rows must share the same rows.")
+
+        self._band[:, roi.xbegin - spec.x : roi.xend - spec.x] = pixels
+        self._band_covered[roi.xbegin - spec.x : roi.xend - spec.x] = True
+        if self._band_covered.all():
+            band, band_roi = self._band, self._band_roi
+            self._band = None
+            self._flush(band_roi.ybegin, band_roi.yend, band_roi.zbegin, band)
+
+    def _flush(self, ybegin: int, yend: int, z: int, pixels: np.ndarray) -> None:
+        if not self._out.write_scanlines(ybegin, yend, z, np.ascontiguousarray(pixels)):
+            raise RuntimeError(self._out.geterror())
+        self._next_y = yend
+
+    def close(self, check_complete: bool = True) -> None:
+        """Close the file, raising if scanlines are missing and ``check_complete``."""
+        if self._out is None:
+            return
+        out, self._out = self._out, None
+        incomplete = not self.tiled and self._next_y != self.spec.y + self.spec.height
+        if not out.close():
+            raise RuntimeError(out.geterror())
+        if check_complete and incomplete:
+            raise RuntimeError(
+                f"{self.path} closed after row {self._next_y} of "
+                f"{self.spec.y + self.spec.height}."
+            )
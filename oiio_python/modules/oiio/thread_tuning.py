@@ -0,0 +1,328 @@
+"""
+Find how to split cores between Python worker pools and OpenImageIO threads.
+
+:func:`sweep` times representative ``ImageBufAlgo`` operations (resize,
+colorconvert, over, make_texture) for combinations of Python pool size and
+OpenImageIO ``threads`` attribute, and reports the fastest combination on this
+host::
+
+    python -m OpenImageIO.thread_tuning --size 2048 --json
+
+Oversubscription is reported at runtime by :func:`check_oversubscription`,
+which the batch tools call when sizing their pools, and on Linux by
+:class:`OversubscriptionMonitor`, which samples the threads actually running.
+"""
+
+import argparse
+import json
+import multiprocessing
+import os
+import shutil
+import sys
+import tempfile
+import threading
+import time
+import warnings
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+import OpenImageIO as oiio
+
+from ._workers import check_oversubscription  # pylint: disable=unused-import
+from ._workers import cpu_count
+
+
+def _check(buf: oiio.ImageBuf) -> None:
+    if buf.has_error:
+        raise RuntimeError(buf.geterror())
+
+
+def _resize(src: oiio.ImageBuf, bg: oiio.ImageBuf, tmp_dir: str, index: int) -> None:
+    spec = src.spec()
+    roi = oiio.ROI(0, spec.width // 2, 0, spec.height // 2, 0, 1, 0, spec.nchannels)
+    _check(oiio.ImageBufAlgo.resize(src, roi=roi))
+
+
+def _colorconvert(
+    src: oiio.ImageBuf, bg: oiio.ImageBuf, tmp_dir: str, index: int
+) -> None:
+    _check(oiio.ImageBufAlgo.colorconvert(src, "linear", "sRGB"))
+
+
+def _over(src: oiio.ImageBuf, bg: oiio.ImageBuf, tmp_dir: str, index: int) -> None:
+    _check(oiio.ImageBufAlgo.over(src, bg))
+
+
+def _make_texture(
+    src: oiio.ImageBuf, bg: oiio.ImageBuf, tmp_dir: str, index: int
+) -> None:
+    path = os.path.join(tmp_dir, f"{os.getpid()}-{index}.tx")
+    if not oiio.ImageBufAlgo.make_texture(oiio.MakeTxTexture, src, path):
+        raise RuntimeError(oiio.geterror())
+    os.unlink(path)
+
+
+OPERATIONS: Dict[str, Callable[[oiio.ImageBuf, oiio.ImageBuf, str, int], None]] = {
+    "resize": _resize,
+    "colorconvert": _colorconvert,
+    "over": _over,
+    "make_texture": _make_texture,
+}
+
+
+# Images and output folder of a sweep worker process, set by _init_worker.
+_images: Optional[Tuple[oiio.ImageBuf, oiio.ImageBuf]] = None
+_tmp_dir = ""
+_barrier: Any = None
+
+
+def _init_worker(
+    threads: int, name: str, size: int, tmp_dir: str, barrier: Any
+) -> None:
+    global _images, _tmp_dir, _barrier  # pylint: disable=global-statement
+    oiio.attribute("threads", threads)
+    oiio.attribute("exr_threads", threads)
+    rng = np.random.default_rng(0)
+    _images = (
+        oiio.ImageBuf(rng.random((size, size, 4), dtype=np.float32)),
+        oiio.ImageBuf(rng.random((size, size, 4), dtype=np.float32)),
+    )
+    _tmp_dir = tmp_dir
+    _barrier = barrier
+    # Untimed run, creating color processors and loading plugins.
+    OPERATIONS[name](*_images, tmp_dir, -1)
+
+
+def _ready() -> None:
+    _barrier.wait()
+
+
+def _run(name: str, index: int) -> None:
+    OPERATIONS[name](*_images, _tmp_dir, index)
+
+
+def _powers_of_two(limit: int) -> List[int]:
+    values = [1]
+    while values[-1] * 2 <= limit:
+        values.append(values[-1] * 2)
+    if values[-1] != limit:
+        values.append(limit)
+    return values
+
+
+def sweep(
+    operations: Sequence[str] = tuple(OPERATIONS),
+    size: int = 1024,
+    workers: Optional[Sequence[int]] = None,
+    threads: Optional[Sequence[int]] = None,
+    jobs: Optional[int] = None,
+    oversubscription: float = 2.0,
+) -> Dict[str, Any]:
+    """
+    Time ``operations`` for each Python pool size and OpenImageIO thread count.
+
+    ``jobs`` images of ``size`` x ``size`` pixels (twice the core count by
+    default) are processed by a spawned process pool of each size in
+    ``workers``, whose processes set the ``threads`` attribute to each value of
+    ``threads``, like the batch tools do. Both default to powers of two up to
+    the core count, and combinations using more than ``oversubscription`` times
+    the cores are skipped. Starting the pool and a first untimed run in each
+    process are not timed.
+
+    Returns the timings of every combination and the ``best`` one per
+    operation.
+    """
+    cores = cpu_count()
+    workers = list(workers or _powers_of_two(cores))
+    threads = list(threads or _powers_of_two(cores))
+    jobs = jobs or 2 * cores
+    context = multiprocessing.get_context("spawn")
+
+    tmp_dir = tempfile.mkdtemp(prefix="oiio-thread-tuning-")
+    results: Dict[str, List[Dict[str, Any]]] = {}
+    try:
+        for name in operations:
+            results[name] = []
+            for nthreads in threads:
+                for nworkers in workers:
+                    if nworkers * nthreads > oversubscription * cores:
+                        continue
+                    with ProcessPoolExecutor(
+                        max_workers=nworkers,
+                        mp_context=context,
+                        initializer=_init_worker,
+                        initargs=(
+                            nthreads,
+                            name,
+                            size,
+                            tmp_dir,
+                            context.Barrier(nworkers),
+                        ),
+                    ) as executor:
+                        # Processes start on demand. Tasks waiting for each
+                        # other keep every process busy, so each submission
+                        # starts and initializes one more before timing.
+                        for future in [
+                            executor.submit(_ready) for _ in range(nworkers)
+                        ]:
+                            future.result()
+                        start = time.perf_counter()
+                        for future in [
+                            executor.submit(_run, name, index) for index in range(jobs)
+                        ]:
+                            future.result()
+                        elapsed = time.perf_counter() - start
+                    results[name].append(
+                        {
+                            "workers": nworkers,
+                            "threads": nthreads,
+                            "seconds": round(elapsed, 4),
+                            "jobs_per_second": round(jobs / elapsed, 2),
+                        }
+                    )
+    finally:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+
+    return {
+        "cores": cores,
+        "size": size,
+        "jobs": jobs,
+        "results": results,
+        "best": {
+            name: max(timings, key=lambda timing: timing["jobs_per_second"])
+            for name, timings in results.items()
+            if timings
+        },
+    }
+
+
+def running_threads() -> Optional[int]:
+    """
+    Return the number of other threads of this process running or ready to run.
+
+    Reads ``/proc/self/task`` and returns None on platforms without it.
+    """
+    try:
+        tasks = os.listdir("/proc/self/task")
+    except OSError:
+        return None
+    running = 0
+    current = str(threading.get_native_id())
+    for task in tasks:
+        if task == current:
+            continue
+        try:
+            with open(f"/proc/self/task/{task}/stat", encoding="utf8") as f:
+                stat = f.read()
+        except OSError:
+            continue  # The thread exited.
+        # The state follows the command name, which may contain spaces.
+        if stat.rsplit(")", 1)[-1].split()[0] == "R":
+            running += 1
+    return running
+
+
+class OversubscriptionMonitor:
+    """
+    Warn when more threads than cores are runnable for ``samples`` samples in a row.
+
+    Samples :func:`running_threads` every ``interval`` seconds in a daemon
+    thread between :meth:`start` and :meth:`stop`, or as a context manager.
+    ``callback(running, cores)`` is called instead of issuing a
+    ``RuntimeWarning`` when given. Does nothing where :func:`running_threads`
+    is not supported.
+    """
+
+    def __init__(
+        self,
+        interval: float = 0.5,
+        samples: int = 3,
+        callback: Optional[Callable[[int, int], None]] = None,
+    ) -> None:
+        self.interval = interval
+        self.samples = samples
+        self.callback = callback
+        self.peak = 0
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def __enter__(self) -> "OversubscriptionMonitor":
+        self.start()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        self.stop()
+
+    def _warn(self, running: int, cores: int) -> None:
+        if self.callback is not None:
+            self.callback(running, cores)
+            return
+        warnings.warn(
+            f"{running} threads are running on {cores} cores, lower the Python "
+            "pool size or the OpenImageIO 'threads' attribute.",
+            RuntimeWarning,
+        )
+
+    def _run(self) -> None:
+        cores = cpu_count()
+        streak = 0
+        while not self._stop.wait(self.interval):
+            running = running_threads()
+            if running is None:
+                return
+            self.peak = max(self.peak, running)
+            streak = streak + 1 if running > cores else 0
+            if streak == self.samples:
+                self._warn(running, cores)
+
+    def start(self) -> None:
+        """Start sampling."""
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        """Stop sampling."""
+        if self._thread is None:
+            return
+        self._stop.set()
+        self._thread.join()
+        self._thread = None
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        prog="python -m OpenImageIO.thread_tuning",
+        description="Find the best Python pool size and OpenImageIO thread count.",
+    )
+    parser.add_argument(
+        "--ops", nargs="+", default=list(OPERATIONS), choices=list(OPERATIONS)
+    )
+    parser.add_argument("--size", type=int, default=1024, help="Image width/height.")
+    parser.add_argument("--workers", nargs="+", type=int, default=None)
+    parser.add_argument("--threads", nargs="+", type=int, default=None)
+    parser.add_argument("--jobs", type=int, default=None, help="Images per run.")
+    parser.add_argument("--json", action="store_true", help="Print the full report.")
+    args = parser.parse_args()
+
+    report = sweep(args.ops, args.size, args.workers, args.threads, args.jobs)
+    if args.json:
+        print(json.dumps(report, indent=2))
+    for name, timings in report["results"].items():
+        for timing in timings:
+            print(
+                f"{name:<13} workers={timing['workers']:<3} "
+                f"threads={timing['threads']:<3} {timing['jobs_per_second']:.2f} jobs/s",
+                file=sys.stderr,
+            )
+    for name, best in report["best"].items():
+        print(
+            f"Best for {name}: {best['workers']} workers x {best['threads']} threads "
+            f"on {report['cores']} cores",
+            file=sys.stderr,
+        )
+
+
+if __name__ == "__main__":
+    main()
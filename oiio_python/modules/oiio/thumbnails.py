@@ -0,0 +1,266 @@
+"""
+Generate thumbnails and proxies without decoding full resolution images.
+
+Before resizing, the cheapest source of pixels is picked:
+
+- an embedded thumbnail large enough (``ImageInput.get_thumbnail``),
+- the smallest MIP level large enough, for tiled EXR, TIFF and ``.tx`` files,
+- a half size LibRaw decode (``raw:half_size``) for camera RAW files,
+- otherwise, the full image.
+
+Thumbnails are generated in a process pool and stored in a cache directory,
+keyed by a hash of the source path, modification time, size and thumbnail
+settings, so unchanged sources are never decoded twice::
+
+    oiio-thumbnails plates/*.exr --cache-dir ~/.cache/thumbs --size 256
+"""
+
+import argparse
+import hashlib
+import json
+import multiprocessing
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+import OpenImageIO as oiio
+
+from ._workers import split_threads
+
+
+def _init_worker(threads: int) -> None:
+    oiio.attribute("threads", threads)
+    oiio.attribute("exr_threads", threads)
+
+
+def _check(ok: bool, buf: oiio.ImageBuf) -> oiio.ImageBuf:
+    if not ok or buf.has_error:
+        raise RuntimeError(buf.geterror() or oiio.geterror())
+    return buf
+
+
+def load_reduced(path: str, size: int) -> Tuple[oiio.ImageBuf, str]:
+    """
+    Return the cheapest image of ``path`` at least ``size`` pixels wide or high.
+
+    The second item tells which decode path was used: "thumbnail", "mip",
+    "raw_half_size" or "full".
+    """
+    inp = oiio.ImageInput.open(path)
+    if inp is None:
+        raise RuntimeError(oiio.geterror())
+    try:
+        spec = inp.spec()
+        format_name = inp.format_name()
+        thumbnail = inp.get_thumbnail(0)
+        if (
+            thumbnail is not None
+            and thumbnail.initialized
+            and max(thumbnail.spec().width, thumbnail.spec().height) >= size
+        ):
+            return thumbnail, "thumbnail"
+
+        level = 0
+        while inp.seek_subimage(0, level + 1):
+            mip = inp.spec()
+            if max(mip.width, mip.height) < size:
+                break
+            level += 1
+    finally:
+        inp.close()
+
+    if level > 0:
+        buf = oiio.ImageBuf(path, 0, level)
+        return _check(buf.read(0, level, force=True), buf), "mip"
+    if format_name == "raw" and max(spec.width, spec.height) >= 2 * size:
+        config = oiio.ImageSpec()
+        config.attribute("raw:half_size", 1)
+        buf = oiio.ImageBuf(path, 0, 0, config)
+        return _check(buf.read(0, 0, force=True), buf), "raw_half_size"
+    buf = oiio.ImageBuf(path)
+    return _check(buf.read(force=True), buf), "full"
+
+
+def make_thumbnail(
+    src: str,
+    dst: str,
+    size: int = 256,
+    to_colorspace: Optional[str] = "sRGB",
+    dtype: str = "uint8",
+) -> Dict[str, Any]:
+    """
+    Write a thumbnail of ``src`` fitting in ``size`` x ``size`` pixels to ``dst``.
+
+    Only the color channels are kept. When the source declares its color space
+    (``oiio:ColorSpace``), pixels are converted to ``to_colorspace``; use None
+    to keep them as they are. Returns the decode method and thumbnail size.
+    """
+    buf, method = load_reduced(src, size)
+    spec = buf.spec()
+    if spec.nchannels > 3:
+        buf = _check(True, oiio.ImageBufAlgo.channels(buf, (0, 1, 2)))
+    elif spec.nchannels == 2:
+        buf = _check(True, oiio.ImageBufAlgo.channels(buf, (0,)))
+
+    colorspace = spec.get_string_attribute("oiio:ColorSpace")
+    if to_colorspace and colorspace and colorspace != to_colorspace:
+        buf = _check(
+            True, oiio.ImageBufAlgo.colorconvert(buf, colorspace, to_colorspace)
+        )
+
+    scale = min(1.0, size / max(spec.width, spec.height))
+    width = max(1, round(spec.width * scale))
+    height = max(1, round(spec.height * scale))
+    if (width, height) != (spec.width, spec.height):
+        roi = oiio.ROI(0, width, 0, height, 0, 1, 0, buf.nchannels)
+        buf = _check(True, oiio.ImageBufAlgo.resize(buf, roi=roi))
+
+    Path(dst).parent.mkdir(parents=True, exist_ok=True)
+    # Write next to the destination first, readers never see partial files.
+    tmp_path = f"{dst}.{os.getpid()}.tmp{os.path.splitext(dst)[1]}"
+    try:
+        _check(buf.write(tmp_path, oiio.TypeDesc(dtype)), buf)
+        os.replace(tmp_path, dst)
+    finally:
+        if os.path.exists(tmp_path):
+            os.unlink(tmp_path)
+    return {"method": method, "width": width, "height": height}
+
+
+def cache_key(src: str, size: int, ext: str, to_colorspace: Optional[str]) -> str:
+    """Return the cache key of the ``src`` thumbnail with the given settings."""
+    stat = os.stat(src)
+    key = json.dumps(
+        [os.path.abspath(src), stat.st_mtime_ns, stat.st_size, size, ext, to_colorspace]
+    )
+    return hashlib.sha1(key.encode("utf8")).hexdigest()
+
+
+def thumbnail_path(
+    src: str,
+    cache_dir: Path,
+    size: int = 256,
+    ext: str = "jpg",
+    to_colorspace: Optional[str] = "sRGB",
+) -> Path:
+    """Return where the thumbnail of ``src`` is stored in ``cache_dir``."""
+    key = cache_key(src, size, ext, to_colorspace)
+    return Path(cache_dir) / key[:2] / f"{key}.{ext}"
+
+
+def thumbnails(
+    sources: Iterable[str],
+    cache_dir: Path,
+    size: int = 256,
+    ext: str = "jpg",
+    to_colorspace: Optional[str] = "sRGB",
+    workers: Optional[int] = None,
+    threads: Optional[int] = None,
+) -> Dict[str, Any]:
+    """
+    Make the missing thumbnails of ``sources`` in ``cache_dir``.
+
+    Returns a report with ``paths`` mapping each source to its thumbnail,
+    ``cached`` and ``generated`` counts, the decode ``methods`` used and the
+    ``failures``.
+    """
+    paths: Dict[str, str] = {}
+    todo: List[Tuple[str, str]] = []
+    failures: List[Dict[str, str]] = []
+    for src in sources:
+        try:
+            dst = thumbnail_path(src, cache_dir, size, ext, to_colorspace)
+        except OSError as e:
+            failures.append({"path": src, "error": str(e)})
+            continue
+        paths[src] = str(dst)
+        if not dst.exists():
+            todo.append((src, str(dst)))
+
+    workers, threads = split_threads(workers, threads)
+    start = time.perf_counter()
+    methods: Dict[str, int] = {}
+    generated = 0
+    if todo:
+        # Forking a process whose OIIO thread pool is already running can deadlock.
+        with ProcessPoolExecutor(
+            max_workers=min(workers, len(todo)),
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_init_worker,
+            initargs=(threads,),
+        ) as executor:
+            futures = {
+                executor.submit(make_thumbnail, src, dst, size, to_colorspace): src
+                for src, dst in todo
+            }
+            for future in as_completed(futures):
+                src = futures[future]
+                try:
+                    method = future.result()["method"]
+                except Exception as e:  # pylint: disable=broad-except
+                    del paths[src]
+                    failures.append({"path": src, "error": str(e)})
+                    continue
+                generated += 1
+                methods[method] = methods.get(method, 0) + 1
+    elapsed = time.perf_counter() - start
+
+    return {
+        "paths": paths,
+        "cached": len(paths) - generated,
+        "generated": generated,
+        "methods": methods,
+        "failed": len(failures),
+        "failures": failures,
+        "seconds": elapsed,
+        "thumbnails_per_second": generated / elapsed if elapsed else 0.0,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        prog="oiio-thumbnails",
+        description="Generate cached thumbnails using reduced resolution decodes.",
+    )
+    parser.add_argument("sources", nargs="+", help="Source images.")
+    parser.add_argument("--cache-dir", type=Path, required=True)
+    parser.add_argument("--size", type=int, default=256, help="Max width/height.")
+    parser.add_argument("--ext", default="jpg", help="Thumbnail format extension.")
+    parser.add_argument(
+        "--colorspace",
+        default="sRGB",
+        help="Output color space, 'none' keeps source values.",
+    )
+    parser.add_argument("-j", "--workers", type=int, default=None, help="Processes.")
+    parser.add_argument(
+        "--threads", type=int, default=None, help="OpenImageIO threads per worker."
+    )
+    parser.add_argument("--json", action="store_true", help="Print the full report.")
+    args = parser.parse_args()
+
+    report = thumbnails(
+        args.sources,
+        args.cache_dir,
+        size=args.size,
+        ext=args.ext,
+        to_colorspace=None if args.colorspace.lower() == "none" else args.colorspace,
+        workers=args.workers,
+        threads=args.threads,
+    )
+    if args.json:
+        print(json.dumps(report, indent=2))
+    else:
+        for src, dst in report["paths"].items():
+            print(f"{src}\t{dst}")
+    for failure in report["failures"]:
+        print(f"Error: {failure['path']}: {failure['error']}", file=sys.stderr)
+    print(
+        f"{report['generated']} generated, {report['cached']} cached, "
+        f"{report['failed']} failed in {report['seconds']:.2f}s "
+        f"({report['thumbnails_per_second']:.1f}/s) {report['methods']}",
+        file=sys.stderr,
+    )
+    sys.exit(1 if report["failed"] else 0)
@@ -128,6 +128,7 @@ class OpenColorIOConan(ConanFile):
         get(
             self, **self.conan_data["sources"][self.version], strip_root=True
         )  # pylint: disable=no-member
+        self._patch_sources()
 
     def generate(self):
         tc = CMakeToolchain(self)
@@ -191,6 +192,11 @@ class OpenColorIOConan(ConanFile):
 
         tc.cache_variables["CMAKE_POLICY_DEFAULT_CMP0077"] = "NEW"
         tc.cache_variables["CMAKE_POLICY_DEFAULT_CMP0091"] = "NEW"
+        # Compiler launcher such as ccache, for incremental developer builds
+        launcher = os.getenv("OIIO_COMPILER_LAUNCHER")
+        if launcher:
+            tc.cache_variables["CMAKE_C_COMPILER_LAUNCHER"] = launcher
+            tc.cache_variables["CMAKE_CXX_COMPILER_LAUNCHER"] = launcher
         tc.generate()
 
         deps = CMakeDeps(self)
@@ -207,8 +213,6 @@ class OpenColorIOConan(ConanFile):
             )
 
     def build(self):
-        self._patch_sources()
-
         cm = CMake(self)
         cm.configure()
         cm.build()
@@ -261,6 +261,12 @@ class OpenImageIOConan(ConanFile):
         tc.variables["USE_LIBWEBP"] = True
         tc.variables["USE_OPENJPEG"] = True
 
+        # Compiler launcher such as ccache, for incremental developer builds
+        launcher = os.getenv("OIIO_COMPILER_LAUNCHER")
+        if launcher:
+            tc.cache_variables["CMAKE_C_COMPILER_LAUNCHER"] = launcher
+            tc.cache_variables["CMAKE_CXX_COMPILER_LAUNCHER"] = launcher
+
         tc.generate()
         cd = CMakeDeps(self)
         cd.generate()
@@ -1,18 +1,52 @@
+import importlib.util
 import os
+import signal
 import subprocess
 import sys
 from pathlib import Path
 
-HERE = Path(__file__).parent.resolve()
+
+def _package_dir(name: str) -> Path:
+    # Installed as a top-level module, so that launching a tool locates the
+    # package without importing it and loading its native libraries.
+    spec = importlib.util.find_spec(name)
+    if spec is None or not spec.submodule_search_locations:
+        raise RuntimeError(f"{name} package not found.")
+    return Path(list(spec.submodule_search_locations)[0]).resolve()
+
+
+HERE = _package_dir("PyOpenColorIO")
+
+# Set OIIO_PYTHON_TOOL_LAUNCH=subprocess to run tools as child processes
+# instead of replacing the Python process with them.
+LAUNCH_MODE = os.getenv("OIIO_PYTHON_TOOL_LAUNCH", "exec")
+
+
+def _exit_like(returncode: int) -> None:
+    """Exit with the same status as a finished child process."""
+    if returncode < 0:
+        # The tool was killed by a signal, re-raise it so callers see the same.
+        sig = -returncode
+        signal.signal(sig, signal.SIG_DFL)
+        os.kill(os.getpid(), sig)
+    sys.exit(returncode)
 
 
 def _run_tool(tool_name: str) -> None:
     tool_path = HERE / "tools" / tool_name
-    env = os.environ.copy()
+    argv = [str(tool_path)] + sys.argv[1:]
+    if LAUNCH_MODE == "exec":
+        # Flush Python buffers, execve does not return on success.
+        sys.stdout.flush()
+        sys.stderr.flush()
+        os.execve(argv[0], argv, os.environ)
     try:
-        subprocess.run([str(tool_path)] + sys.argv[1:], check=True, env=env)
+        subprocess.run(argv, check=True)
     except subprocess.CalledProcessError as e:
         print(f"Error: {tool_name} failed with return code {e.returncode}.")
+        _exit_like(e.returncode)
+    except KeyboardInterrupt:
+        _exit_like(-signal.SIGINT)
 
 
 def ocioarchive() -> None:
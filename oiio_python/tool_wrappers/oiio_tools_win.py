@@ -1,9 +1,20 @@
+import importlib.util
 import os
 import subprocess
 import sys
 from pathlib import Path
 
-HERE = Path(__file__).parent.resolve()
+
+def _package_dir(name: str) -> Path:
+    # Installed as a top-level module, so that launching a tool locates the
+    # package without importing it and loading its native libraries.
+    spec = importlib.util.find_spec(name)
+    if spec is None or not spec.submodule_search_locations:
+        raise RuntimeError(f"{name} package not found.")
+    return Path(list(spec.submodule_search_locations)[0]).resolve()
+
+
+HERE = _package_dir("OpenImageIO")
 
 
 def _run_tool(tool_name: str) -> None:
@@ -17,6 +28,8 @@ def _run_tool(tool_name: str) -> None:
         subprocess.run([str(tool_path)] + sys.argv[1:], check=True, env=env)
     except subprocess.CalledProcessError as e:
         print(f"Error: {tool_name} failed with return code {e.returncode}.")
+        # Windows has no real exec, at least report the tool exit status.
+        sys.exit(e.returncode)
 
 
 def iconvert() -> None:
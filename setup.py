@@ -2,6 +2,7 @@
 import os
 import platform
 import shutil
+import socket
 import sys
 from pathlib import Path
 
@@ -84,6 +85,24 @@ if __name__ == "__main__":
 
         # Define scripts based on the build type
         scripts_list = []
+        py_modules = []
+
+        # Pure Python scripts, available in both build types
+        python_scripts = {
+            "oiio-batch": "OpenImageIO.batch:main",
+            "iconvert-tree": "OpenImageIO.convert_tree:main",
+            "oiio-index": "OpenImageIO.metadata_index:main",
+            "oiio-dedupe": "OpenImageIO.dedupe:main",
+            "idiff-batch": "OpenImageIO.compare_tree:main",
+            "maketx-batch": "OpenImageIO.make_textures:main",
+            "oiio-thumbnails": "OpenImageIO.thumbnails:main",
+        }
+        # The cache server needs Unix sockets.
+        if hasattr(socket, "AF_UNIX"):
+            python_scripts["oiio-cache-server"] = "OpenImageIO.cache_server:main"
+        for script_name, script_path in python_scripts.items():
+            scripts_list.append(f"{script_name}={script_path}")
+
         if not static_build:
             oiio_tools = ["iconvert", "idiff", "igrep", "iinfo", "maketx", "oiiotool"]
             ocio_tools = [
@@ -99,18 +118,21 @@ if __name__ == "__main__":
             ]
 
             scripts = dict()
+            # Top-level wrappers, launching tools without importing the packages
+            py_modules = ["_oiio_python_oiio_tools", "_oiio_python_ocio_tools"]
 
             for tool in oiio_tools:
-                scripts[tool] = f"OpenImageIO._tool_wrapper:{tool}"
+                scripts[tool] = f"_oiio_python_oiio_tools:{tool}"
 
             for tool in ocio_tools:
-                scripts[tool] = f"PyOpenColorIO._tool_wrapper:{tool}"
+                scripts[tool] = f"_oiio_python_ocio_tools:{tool}"
 
             for script_name, script_path in scripts.items():
                 scripts_list.append(f"{script_name}={script_path}")
 
     else:
         scripts_list = []
+        py_modules = []
         package_data = {}
         scripts = {}
         include_data = False
@@ -134,6 +156,7 @@ if __name__ == "__main__":
         license_files=tuple(license_files),
         package_dir={"": "oiio_python"},
         packages=find_packages(where="oiio_python"),
+        py_modules=py_modules,
         package_data=package_data,
         include_package_data=include_data,
         ext_modules=[],
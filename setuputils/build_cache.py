@@ -0,0 +1,196 @@
+"""Content-addressed cache of built Conan recipes, to skip unchanged recipes."""
+
+import hashlib
+import json
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import sysconfig
+import time
+from pathlib import Path
+from typing import Dict, Optional, Sequence, Tuple
+
+# Environment variables read by the recipes or the build scripts.
+KEY_ENV_VARS = ("OIIO_STATIC", "MUSLLINUX_BUILD", "CONAN_CMAKE_TOOLCHAIN_ARGS")
+
+# Build artifacts left in recipe folders, which are not recipe inputs.
+_IGNORED = {"build", "src", "CMakeUserPresets.json", "__pycache__"}
+
+Snapshot = Dict[str, Tuple[int, int]]
+
+
+def cache_dir() -> Path:
+    """Return the cache folder, OIIO_BUILD_CACHE or ~/.cache/oiio-python/conan."""
+    path = os.getenv("OIIO_BUILD_CACHE")
+    if path:
+        return Path(path)
+    return Path.home() / ".cache" / "oiio-python" / "conan"
+
+
+def _hash_tree(digest, folder: Path) -> None:
+    for path in sorted(folder.rglob("*")):
+        relative = path.relative_to(folder)
+        if _IGNORED & set(relative.parts) or not path.is_file():
+            continue
+        digest.update(relative.as_posix().encode("utf8") + b"\0")
+        digest.update(hashlib.sha256(path.read_bytes()).digest())
+
+
+def python_tag() -> str:
+    """
+    Return the tag of the running Python interpreter, e.g.
+    ``cpython-311 .cpython-311-x86_64-linux-gnu.so``, which bindings built for
+    it depend on.
+    """
+    ext_suffix = sysconfig.get_config_var("EXT_SUFFIX") or ""
+    return f"{sys.implementation.cache_tag} {ext_suffix}"
+
+
+def recipe_key(
+    folder: Path,
+    version: str,
+    profile: str,
+    inputs: Sequence[Path] = (),
+    extra: Sequence[str] = (),
+    interpreter: Optional[str] = None,
+) -> str:
+    """
+    Return the cache key of a recipe build.
+
+    Hashes the files of the recipe ``folder`` (conanfile, conandata, patches)
+    and of the ``inputs`` folders, the version, the Conan ``profile`` contents,
+    the :data:`KEY_ENV_VARS`, the platform and the ``extra`` strings, such as
+    the keys of the recipes it requires. Recipes building Python bindings pass
+    the ``interpreter`` they build for, see :func:`python_tag`.
+    """
+    digest = hashlib.sha256()
+    for value in (version, platform.system(), platform.machine(), *extra):
+        digest.update(value.encode("utf8") + b"\0")
+    if interpreter is not None:
+        digest.update(f"python={interpreter}\0".encode("utf8"))
+    for name in KEY_ENV_VARS:
+        digest.update(f"{name}={os.getenv(name, '')}\0".encode("utf8"))
+    profile_path = Path.home() / ".conan2" / "profiles" / profile
+    if profile_path.exists():
+        digest.update(profile_path.read_bytes())
+    for tree in (folder, *inputs):
+        digest.update(Path(tree).name.encode("utf8") + b"\0")
+        _hash_tree(digest, Path(tree))
+    return digest.hexdigest()
+
+
+def source_key(folder: Path, version: str) -> str:
+    """
+    Return the hash of what ``conan source`` extracts for the recipe ``folder``:
+    the version, its ``conandata.yml``, its ``patches`` and the
+    :data:`KEY_ENV_VARS`.
+    """
+    digest = hashlib.sha256(version.encode("utf8") + b"\0")
+    for name in KEY_ENV_VARS:
+        digest.update(f"{name}={os.getenv(name, '')}\0".encode("utf8"))
+    conandata = Path(folder) / "conandata.yml"
+    if conandata.exists():
+        digest.update(conandata.read_bytes())
+    patches = Path(folder) / "patches"
+    if patches.is_dir():
+        _hash_tree(digest, patches)
+    return digest.hexdigest()
+
+
+def snapshot(folders: Sequence[Path]) -> Snapshot:
+    """Return the size and modification time of every file under ``folders``."""
+    files: Snapshot = {}
+    for index, folder in enumerate(folders):
+        for path in Path(folder).rglob("*"):
+            if path.is_file():
+                stat = path.stat()
+                key = f"{index}/{path.relative_to(folder).as_posix()}"
+                files[key] = (stat.st_size, stat.st_mtime_ns)
+    return files
+
+
+def _entry(name: str, key: str) -> Path:
+    return cache_dir() / f"{name}-{key[:32]}"
+
+
+def restore(name: str, key: str, outputs: Sequence[Path] = ()) -> bool:
+    """
+    Restore the cached build of recipe ``name`` with ``key``, if any.
+
+    Restores the Conan packages into the Conan cache and copies the files the
+    build wrote to ``outputs`` back. Returns False on a cache miss.
+    """
+    entry = _entry(name, key)
+    manifest_path = entry / "manifest.json"
+    if not manifest_path.exists():
+        return False
+    manifest = json.loads(manifest_path.read_text(encoding="utf8"))
+    if manifest["key"] != key or manifest["outputs"] != len(outputs):
+        return False
+    subprocess.run(
+        ["conan", "cache", "restore", (entry / "packages.tgz").as_posix()],
+        check=True,
+    )
+    for index, folder in enumerate(outputs):
+        saved = entry / "outputs" / str(index)
+        if saved.exists():
+            shutil.copytree(saved, folder, symlinks=True, dirs_exist_ok=True)
+    return True
+
+
+def store(
+    name: str,
+    version: str,
+    key: str,
+    outputs: Sequence[Path] = (),
+    before: Optional[Snapshot] = None,
+) -> None:
+    """
+    Save the Conan packages of ``name/version`` in the cache under ``key``.
+
+    Files of ``outputs`` new or changed since the ``before`` snapshot are
+    saved too, so recipes writing outside of the Conan cache can be restored.
+    """
+    entry = _entry(name, key)
+    tmp_entry = entry.with_name(f"{entry.name}.{os.getpid()}.tmp")
+    if tmp_entry.exists():
+        shutil.rmtree(tmp_entry)
+    tmp_entry.mkdir(parents=True)
+    try:
+        subprocess.run(
+            [
+                "conan",
+                "cache",
+                "save",
+                f"{name}/{version}:*",
+                "--file",
+                (tmp_entry / "packages.tgz").as_posix(),
+            ],
+            check=True,
+        )
+        after = snapshot(outputs)
+        for relative, stat in after.items():
+            if before is not None and before.get(relative) == stat:
+                continue
+            index, path = relative.split("/", 1)
+            dst = tmp_entry / "outputs" / index / path
+            dst.parent.mkdir(parents=True, exist_ok=True)
+            shutil.copy2(Path(outputs[int(index)]) / path, dst, follow_symlinks=False)
+        manifest = {
+            "name": name,
+            "version": version,
+            "key": key,
+            "outputs": len(outputs),
+            "created": time.time(),
+        }
+        (tmp_entry / "manifest.json").write_text(
+            json.dumps(manifest, indent=2), encoding="utf8"
+        )
+        if entry.exists():
+            shutil.rmtree(entry)
+        tmp_entry.rename(entry)
+    finally:
+        if tmp_entry.exists():
+            shutil.rmtree(tmp_entry)
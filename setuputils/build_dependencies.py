@@ -1,22 +1,39 @@
 """Build script for installing and building dependencies using Conan."""
 
+import argparse
 import os
 import platform
 import subprocess
 import sys
 from pathlib import Path
+from typing import Dict, Optional
 
 project = Path(__file__).parent.parent.resolve()
 sys.path.insert(0, project.as_posix())
 
-from setuputils.build_utils import build_cleanup  # pylint: disable=C0413
-from setuputils.build_utils import conan_install_package, conan_profile_ensure
+from setuputils.build_graph import Recipe, build_graph  # pylint: disable=C0413
+from setuputils.build_trace import BuildTrace, summary  # pylint: disable=C0413
+from setuputils.build_trace import trace_dir as get_trace_dir  # pylint: disable=C0413
+from setuputils.build_utils import conan_profile_ensure  # pylint: disable=C0413
 
 os.environ["CONAN_CMAKE_TOOLCHAIN_ARGS"] = "-DCMAKE_POLICY_VERSION_MINIMUM=3.5"
 
 
-def build_dependencies() -> None:
-    """Build all required dependencies using Conan with appropriate profile."""
+def build_dependencies(
+    jobs: Optional[int] = None,
+    log_dir: Optional[Path] = None,
+    force: bool = False,
+    trace_dir: Optional[Path] = None,
+) -> Dict[str, float]:
+    """
+    Build all required dependencies using Conan with appropriate profile.
+
+    Independent recipes build concurrently and unchanged recipes are restored
+    from the build cache, see :func:`setuputils.build_graph.build_graph` for
+    ``jobs``, ``log_dir`` and ``force``. A build trace is saved to
+    ``trace_dir``, or to the OIIO_BUILD_TRACE folder, when set. Returns the
+    build time of each recipe.
+    """
     if platform.system() == "Windows":
         conan_profile_ensure(cpp_std="17")
     else:
@@ -24,43 +41,59 @@ def build_dependencies() -> None:
 
     profile_name = "default_oiio_build"
 
-    # LibRaw
-    libraw_dep_dir = project / "oiio_python" / "recipes" / "dependencies" / "libraw"
-    libraw_version = "0.21.4"
-    conan_install_package(libraw_dep_dir, libraw_version, profile=profile_name)
-    build_cleanup(libraw_dep_dir)
-
-    # LibTiff
-    libtiff_dep_dir = project / "oiio_python" / "recipes" / "dependencies" / "libtiff"
-    libtiff_version = "4.7.0"
-    conan_install_package(libtiff_dep_dir, libtiff_version, profile=profile_name)
-    build_cleanup(libtiff_dep_dir)
-
-    # Libultrahdr
-    libuhdr_dep_dir = project / "oiio_python" / "recipes" / "dependencies" / "libuhdr"
-    libuhdr_version = "1.3.0"
-    conan_install_package(libuhdr_dep_dir, libuhdr_version, profile=profile_name)
-    build_cleanup(libuhdr_dep_dir)
-
-    # libjxl
-    libuhdr_dep_dir = project / "oiio_python" / "recipes" / "dependencies" / "libjxl"
-    libuhdr_version = "0.10.2"
-    conan_install_package(libuhdr_dep_dir, libuhdr_version, profile=profile_name)
-    build_cleanup(libuhdr_dep_dir)
-
+    dependencies_dir = project / "oiio_python" / "recipes" / "dependencies"
+    recipes = [
+        Recipe("libraw", dependencies_dir / "libraw", "0.21.4"),
+        Recipe("libtiff", dependencies_dir / "libtiff", "4.7.0"),
+        Recipe("libuhdr", dependencies_dir / "libuhdr", "1.3.0"),
+        Recipe("libjxl", dependencies_dir / "libjxl", "0.10.2"),
+    ]
     # bzip2 on linux
     if platform.system() == "Linux":
-        bzip2_dep_dir = project / "oiio_python" / "recipes" / "dependencies" / "bzip2"
-        bzip2_version = "1.0.8"
-        conan_install_package(bzip2_dep_dir, bzip2_version, profile=profile_name)
-        build_cleanup(bzip2_dep_dir)
+        recipes.append(Recipe("bzip2", dependencies_dir / "bzip2", "1.0.8"))
+
+    trace_dir = get_trace_dir(trace_dir)
+    trace = BuildTrace("dependencies") if trace_dir is not None else None
+    try:
+        return build_graph(
+            recipes, profile_name, jobs=jobs, log_dir=log_dir, force=force, trace=trace
+        )
+    finally:
+        if trace is not None:
+            path = trace.save(trace_dir)
+            print(summary(trace.to_dict()))
+            print(f"Build trace saved to {path}")
 
 
 def _main() -> None:
+    parser = argparse.ArgumentParser(description="Build oiio-python dependencies.")
+    parser.add_argument(
+        "-j",
+        "--jobs",
+        type=int,
+        default=None,
+        help="Cores to use, defaults to OIIO_BUILD_JOBS or the CPU count.",
+    )
+    parser.add_argument(
+        "--log-dir", type=Path, default=None, help="Write one log file per recipe."
+    )
+    parser.add_argument(
+        "--force", action="store_true", help="Rebuild recipes found in the cache."
+    )
+    parser.add_argument(
+        "--trace-dir",
+        type=Path,
+        default=None,
+        help="Save a build trace, defaults to OIIO_BUILD_TRACE.",
+    )
+    args = parser.parse_args()
+
     python_exe = sys.executable
     cmd = [python_exe, "-m", "pip", "install", "conan==2.4.0"]
     subprocess.run(cmd, check=True)
-    build_dependencies()
+    build_dependencies(
+        jobs=args.jobs, log_dir=args.log_dir, force=args.force, trace_dir=args.trace_dir
+    )
 
 
 if __name__ == "__main__":
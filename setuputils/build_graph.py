@@ -0,0 +1,291 @@
+"""Schedule Conan recipe builds concurrently, following their dependencies."""
+
+import contextlib
+import os
+import sys
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence
+
+from setuputils import build_cache
+from setuputils.build_trace import BuildTrace
+from setuputils.build_utils import (
+    build_cleanup,
+    conan_install_package,
+    conan_install_requirements,
+)
+
+
+@dataclass
+class Recipe:
+    """
+    A local Conan recipe to build, and the names of recipes it requires.
+
+    ``inputs`` are other folders the build depends on, hashed in its cache
+    key, and ``outputs`` folders the recipe writes files to outside of the
+    Conan cache, saved and restored with its packages. Recipes building at the
+    same time must not share ``outputs``. Recipes building Python bindings set
+    ``python``, so that they are rebuilt for each interpreter.
+    """
+
+    name: str
+    folder: Path
+    version: str
+    requires: Sequence[str] = field(default_factory=tuple)
+    inputs: Sequence[Path] = field(default_factory=tuple)
+    outputs: Sequence[Path] = field(default_factory=tuple)
+    python: bool = False
+
+
+# Written in the sources of incremental builds, holding their source_key.
+SOURCE_STAMP = ".oiio-source-key"
+
+
+def build_jobs(jobs: Optional[int] = None) -> int:
+    """Return ``jobs``, or the OIIO_BUILD_JOBS variable, or the CPU count."""
+    if jobs is None and os.getenv("OIIO_BUILD_JOBS"):
+        jobs = int(os.environ["OIIO_BUILD_JOBS"])
+    return max(1, jobs or os.cpu_count() or 1)
+
+
+def _levels(recipes: Sequence[Recipe]) -> List[List[Recipe]]:
+    """Return ``recipes`` grouped by depth in the dependency graph."""
+    names = {recipe.name for recipe in recipes}
+    for recipe in recipes:
+        missing = set(recipe.requires) - names
+        if missing:
+            raise ValueError(f"{recipe.name} requires unknown recipes {missing}")
+    levels = []
+    done: set = set()
+    remaining = list(recipes)
+    while remaining:
+        ready = [r for r in remaining if set(r.requires) <= done]
+        if not ready:
+            raise ValueError(f"Dependency cycle between {[r.name for r in remaining]}")
+        levels.append(ready)
+        done.update(r.name for r in ready)
+        remaining = [r for r in remaining if r.name not in done]
+    return levels
+
+
+def build_graph(
+    recipes: Sequence[Recipe],
+    profile: str,
+    jobs: Optional[int] = None,
+    log_dir: Optional[Path] = None,
+    force: bool = False,
+    incremental: bool = False,
+    trace: Optional[BuildTrace] = None,
+) -> Dict[str, float]:
+    """
+    Build ``recipes`` with up to ``jobs`` recipes at once, dependencies first.
+
+    Recipes whose files, inputs, profile, environment, Python interpreter when
+    building bindings, and required recipes did not change since a previous
+    build are restored from :mod:`setuputils.build_cache` instead, unless
+    ``force`` or the OIIO_BUILD_FORCE=1 variable is set. With ``incremental``, the build cache
+    is not used and the source and build folders are kept. Sources are only
+    extracted and patched again when the version, ``conandata.yml`` or
+    patches change, see :func:`setuputils.build_cache.source_key`, so CMake
+    only recompiles the files that changed. Delete the recipe ``src`` folder
+    after editing its ``source()`` method.
+
+    The Conan cache can't be written to concurrently, so the ConanCenter
+    requirements missing from it are first built one at a time for the recipes
+    that don't require other local recipes, using all the ``jobs`` cores. The
+    ``jobs`` cores are then shared between the recipes building at once
+    through Conan's ``tools.build:jobs``. Their Conan installs, now only
+    writing generator files, and exports run one at a time, while sources are
+    fetched and recipes compiled in parallel. Requirements only needed by
+    recipes depending on other local recipes are still built while holding
+    the cache, as they need those recipes exported first.
+
+    Output of each recipe goes to ``log_dir/<name>.log`` when ``log_dir`` is
+    given, and the time of each build phase is recorded in ``trace`` when
+    given.
+
+    Returns the wall-clock seconds of each recipe. Raises RuntimeError once
+    running builds are done if any recipe failed, recipes depending on it
+    are not built.
+    """
+    levels = _levels(recipes)
+    jobs = build_jobs(jobs)
+    force = force or os.getenv("OIIO_BUILD_FORCE") == "1"
+    concurrency = min(jobs, max(len(level) for level in levels)) if levels else 1
+    keys: Dict[str, str] = {}
+    for level in levels:
+        for recipe in level:
+            keys[recipe.name] = build_cache.recipe_key(
+                recipe.folder,
+                recipe.version,
+                profile,
+                inputs=recipe.inputs,
+                extra=[keys[name] for name in recipe.requires],
+                interpreter=build_cache.python_tag() if recipe.python else None,
+            )
+    if log_dir is not None:
+        log_dir = Path(log_dir)
+        log_dir.mkdir(parents=True, exist_ok=True)
+    cache_lock = threading.Lock()
+    if trace is not None:
+        trace.jobs = jobs
+        for recipe in recipes:
+            trace.add_recipe(recipe.name, recipe.version, recipe.requires)
+
+    def phase(name: str, phase_name: str):
+        if trace is None:
+            return contextlib.nullcontext()
+        return trace.phase(name, phase_name)
+
+    timings: Dict[str, float] = {}
+    failures: Dict[str, str] = {}
+    done: set = set()
+
+    def _source_stamp(recipe: Recipe) -> Path:
+        return recipe.folder / "src" / SOURCE_STAMP
+
+    def _needs_source(recipe: Recipe) -> bool:
+        if not incremental:
+            return True
+        stamp = _source_stamp(recipe)
+        key = build_cache.source_key(recipe.folder, recipe.version)
+        if stamp.exists() and stamp.read_text(encoding="utf8") == key:
+            return False
+        # Written again once built, the sources may be changed before then.
+        stamp.unlink(missing_ok=True)
+        return True
+
+    def _log_file(recipe: Recipe) -> Optional[Path]:
+        return log_dir / f"{recipe.name}.log" if log_dir is not None else None
+
+    def _restore(recipe: Recipe) -> bool:
+        if force or incremental:
+            return False
+        key = keys[recipe.name]
+        start = time.perf_counter()
+        with cache_lock, phase(recipe.name, "cache-restore"):
+            restored = build_cache.restore(recipe.name, key, recipe.outputs)
+        timings[recipe.name] = time.perf_counter() - start
+        if restored:
+            if trace is not None:
+                trace.set_cached(recipe.name)
+            print(f"[{recipe.name}] restored from cache {key[:12]}", flush=True)
+        return restored
+
+    def _fail(recipe: Recipe, error: Exception) -> None:
+        log = f", see {_log_file(recipe)}" if log_dir else ""
+        failures[recipe.name] = f"{error}{log}"
+        print(f"[{recipe.name}] failed: {error}", file=sys.stderr, flush=True)
+
+    def _build(recipe: Recipe) -> None:
+        key = keys[recipe.name]
+        start = time.perf_counter() - timings.get(recipe.name, 0.0)
+        # Recipes of the first level were restored or prepared beforehand.
+        if recipe.name not in prepared and _restore(recipe):
+            return
+        print(f"[{recipe.name}] building {recipe.version}", flush=True)
+        try:
+            before = build_cache.snapshot(recipe.outputs)
+            conan_install_package(
+                recipe.folder,
+                recipe.version,
+                profile=profile,
+                source=recipe.name not in prepared and _needs_source(recipe),
+                jobs=max(1, jobs // concurrency),
+                log_file=_log_file(recipe),
+                cache_lock=cache_lock,
+                trace=trace,
+            )
+            if incremental:
+                _source_stamp(recipe).write_text(
+                    build_cache.source_key(recipe.folder, recipe.version),
+                    encoding="utf8",
+                )
+            else:
+                with cache_lock, phase(recipe.name, "cache-store"):
+                    build_cache.store(
+                        recipe.name, recipe.version, key, recipe.outputs, before
+                    )
+                with phase(recipe.name, "cleanup"):
+                    build_cleanup(recipe.folder)
+        finally:
+            timings[recipe.name] = time.perf_counter() - start
+        print(f"[{recipe.name}] done in {timings[recipe.name]:.1f}s", flush=True)
+
+    pending = list(recipes)
+    prepared: set = set()
+
+    def _prepare(recipe: Recipe) -> None:
+        start = time.perf_counter() - timings.get(recipe.name, 0.0)
+        print(f"[{recipe.name}] installing requirements", flush=True)
+        try:
+            conan_install_requirements(
+                recipe.folder,
+                recipe.version,
+                profile=profile,
+                source=_needs_source(recipe),
+                jobs=jobs,
+                log_file=_log_file(recipe),
+                cache_lock=cache_lock,
+                trace=trace,
+            )
+        finally:
+            timings[recipe.name] = time.perf_counter() - start
+
+    # Nothing compiles yet, so requirements missing from the Conan cache are
+    # built one at a time with all cores, while sources are fetched in parallel.
+    first: List[Recipe] = []
+    for recipe in levels[0] if levels else []:
+        if _restore(recipe):
+            done.add(recipe.name)
+            pending.remove(recipe)
+        else:
+            first.append(recipe)
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        futures = {executor.submit(_prepare, recipe): recipe for recipe in first}
+        for future, recipe in futures.items():
+            try:
+                future.result()
+                prepared.add(recipe.name)
+            except Exception as e:  # pylint: disable=broad-except
+                _fail(recipe, e)
+                pending.remove(recipe)
+
+    running: Dict[Future, Recipe] = {}
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        while pending or running:
+            # Repeated until dependents of dependents are reported too.
+            blocked = [r for r in pending if set(r.requires) & set(failures)]
+            while blocked:
+                for recipe in blocked:
+                    failures[recipe.name] = "not built, a dependency failed"
+                    pending.remove(recipe)
+                blocked = [r for r in pending if set(r.requires) & set(failures)]
+            for recipe in [r for r in pending if set(r.requires) <= done]:
+                if len(running) >= concurrency:
+                    break
+                pending.remove(recipe)
+                running[executor.submit(_build, recipe)] = recipe
+            if not running:
+                break
+            finished, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in finished:
+                recipe = running.pop(future)
+                try:
+                    future.result()
+                    done.add(recipe.name)
+                except Exception as e:  # pylint: disable=broad-except
+                    _fail(recipe, e)
+
+    print("Recipe build times:")
+    for name, seconds in sorted(timings.items(), key=lambda item: -item[1]):
+        print(f"  {name:<16} {seconds:8.1f}s")
+    if failures:
+        raise RuntimeError(
+            "Failed recipes:\n"
+            + "\n".join(f"  {name}: {error}" for name, error in failures.items())
+        )
+    return timings
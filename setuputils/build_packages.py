@@ -3,19 +3,53 @@
 import os
 import platform
 import shutil
+import sys
 from pathlib import Path
+from typing import Optional
 
+from setuputils.build_graph import Recipe, build_graph
+from setuputils.build_trace import BuildTrace, summary
+from setuputils.build_trace import trace_dir as get_trace_dir
 from setuputils.build_utils import (
-    build_cleanup,
-    conan_install_package,
+    ccache_stats,
+    ccache_zero_stats,
     conan_profile_ensure,
 )
 
 project = Path(__file__).parent.parent.resolve()
 
 
-def build_packages(build_static_version: bool = False) -> None:
-    """Build OpenImageIO and OpenColorIO packages using conan."""
+def build_packages(
+    build_static_version: bool = False,
+    force: bool = False,
+    incremental: Optional[bool] = None,
+    trace_dir: Optional[Path] = None,
+) -> None:
+    """
+    Build OpenImageIO and OpenColorIO packages using conan.
+
+    Unchanged recipes are restored from the build cache, with the bindings and
+    libraries they copy to the Python packages, unless ``force`` is set.
+
+    ``incremental``, or the OIIO_INCREMENTAL=1 variable, is a developer mode
+    rebuilding every recipe while keeping their build folders, with ccache as
+    compiler launcher when it is installed, and printing its hit rate.
+
+    A build trace is saved to ``trace_dir``, or to the OIIO_BUILD_TRACE
+    folder, when set, see :mod:`setuputils.build_trace`.
+    """
+    if incremental is None:
+        incremental = os.getenv("OIIO_INCREMENTAL") == "1"
+    launcher = None
+    if incremental:
+        launcher = os.getenv("OIIO_COMPILER_LAUNCHER") or shutil.which("ccache")
+        if launcher:
+            os.environ["OIIO_COMPILER_LAUNCHER"] = launcher
+        else:
+            print("ccache not found, building without compiler cache")
+    use_ccache = launcher is not None and Path(launcher).stem == "ccache"
+    if use_ccache:
+        ccache_zero_stats()
 
     if platform.system() == "Windows":
         conan_profile_ensure(cpp_std="17")
@@ -41,17 +75,47 @@ def build_packages(build_static_version: bool = False) -> None:
     os.environ["OIIO_PKG_DIR"] = oiio_pkg_dir.as_posix()
     os.environ["OIIO_LIBS_DIR"] = libs_dir.as_posix()
 
-    # OpenColorIO
-    ocio_dep_dir = project / "oiio_python" / "recipes" / "opencolorio"
-    ocio_version = "2.4.0"
-    conan_install_package(ocio_dep_dir, ocio_version, profile=profile_name)
-    build_cleanup(ocio_dep_dir)
-
-    # OpenImageIO
-    oiio_dir = project / "oiio_python" / "recipes" / "openimageio"
-    oiio_version = "3.0.10.0"
-    conan_install_package(oiio_dir, oiio_version, profile=profile_name)
-    build_cleanup(oiio_dir)
+    recipes_dir = project / "oiio_python" / "recipes"
+    recipes = [
+        # OpenColorIO
+        Recipe(
+            "opencolorio",
+            recipes_dir / "opencolorio",
+            "2.4.0",
+            outputs=(ocio_pkg_dir, libs_dir),
+            python=True,
+        ),
+        # OpenImageIO, built against the dependencies built beforehand
+        Recipe(
+            "openimageio",
+            recipes_dir / "openimageio",
+            "3.0.10.0",
+            requires=("opencolorio",),
+            inputs=(recipes_dir / "dependencies",),
+            outputs=(oiio_pkg_dir, libs_dir),
+            python=True,
+        ),
+    ]
+    trace_dir = get_trace_dir(trace_dir)
+    label = f"packages-py{sys.version_info.major}{sys.version_info.minor}"
+    trace = BuildTrace(label) if trace_dir is not None else None
+    try:
+        build_graph(
+            recipes, profile_name, force=force, incremental=incremental, trace=trace
+        )
+    finally:
+        if trace is not None:
+            path = trace.save(trace_dir)
+            print(summary(trace.to_dict()))
+            print(f"Build trace saved to {path}")
+    if use_ccache:
+        stats = ccache_stats()
+        total = stats["hits"] + stats["misses"]
+        rate = 100 * stats["hits"] / total if total else 0.0
+        print(
+            f"ccache: {stats['hits']} hits, {stats['misses']} misses "
+            f"({rate:.1f}% hit rate)"
+        )
 
     # Clean loaders
     loaders_dir = project / "oiio_python" / "loaders"
@@ -72,20 +136,27 @@ def build_packages(build_static_version: bool = False) -> None:
         shutil.copyfile(loaders_dir / "ocio_loader.py", ocio_pkg_dir / "__init__.py")
         shutil.copyfile(loaders_dir / "oiio_loader.py", oiio_pkg_dir / "__init__.py")
 
+    # Copy pure Python modules shipped alongside the bindings
+    modules_dir = project / "oiio_python" / "modules"
+    for module_path in (modules_dir / "oiio").glob("*.py"):
+        shutil.copyfile(module_path, oiio_pkg_dir / module_path.name)
+    for module_path in (modules_dir / "ocio").glob("*.py"):
+        shutil.copyfile(module_path, ocio_pkg_dir / module_path.name)
+    # Worker pool helpers are shared by both packages
+    shutil.copyfile(modules_dir / "oiio" / "_workers.py", ocio_pkg_dir / "_workers.py")
+
+    # Tool wrappers are top-level modules, so launching a tool doesn't import
+    # the packages and load their native libraries.
+    tool_modules = {
+        "oiio": project / "oiio_python" / "_oiio_python_oiio_tools.py",
+        "ocio": project / "oiio_python" / "_oiio_python_ocio_tools.py",
+    }
+    for module_path in tool_modules.values():
+        if module_path.exists():
+            module_path.unlink()
     if not build_static_version:
         # Copy tool wrappers
         wrappers_dir = project / "oiio_python" / "tool_wrappers"
-        if platform.system() == "Windows":
-            shutil.copyfile(
-                wrappers_dir / "oiio_tools_win.py", oiio_pkg_dir / "_tool_wrapper.py"
-            )
-            shutil.copyfile(
-                wrappers_dir / "ocio_tools_win.py", ocio_pkg_dir / "_tool_wrapper.py"
-            )
-        else:
-            shutil.copyfile(
-                wrappers_dir / "oiio_tools.py", oiio_pkg_dir / "_tool_wrapper.py"
-            )
-            shutil.copyfile(
-                wrappers_dir / "ocio_tools.py", ocio_pkg_dir / "_tool_wrapper.py"
-            )
+        suffix = "_win" if platform.system() == "Windows" else ""
+        for name, module_path in tool_modules.items():
+            shutil.copyfile(wrappers_dir / f"{name}_tools{suffix}.py", module_path)
@@ -0,0 +1,335 @@
+"""
+Record where recipe builds spend their time, to tune the CI build.
+
+A :class:`BuildTrace` collects the phases of each recipe build (source, conan
+install, cmake configure, compile, export-pkg, cleanup, build cache restore or
+store) with their wall-clock time and the peak RSS of the largest process they
+ran. It is saved as JSON, with a Chrome trace-format copy that opens in
+``chrome://tracing`` or https://ui.perfetto.dev, and summarized with the
+critical path through the recipe dependency graph.
+
+Set OIIO_BUILD_TRACE to a folder to trace ``build_dependencies`` and
+``build_packages``. Traces saved by several runs, e.g. by the CI dependencies
+step and the wheel build, are summarized and merged into one Chrome trace with::
+
+    python setuputils/build_trace.py build-trace/*.json --chrome build.trace.json
+"""
+
+import argparse
+import contextlib
+import json
+import os
+import platform
+import subprocess
+import sys
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple
+
+# Conan messages starting a new phase in the output of `conan build`.
+CMAKE_MARKERS = (("Running CMake.build()", "compile"),)
+
+PHASES = (
+    "cache-restore",
+    "source",
+    "install",
+    "configure",
+    "compile",
+    "export-pkg",
+    "cache-store",
+    "cleanup",
+)
+
+
+def trace_dir(path: Optional[Path] = None) -> Optional[Path]:
+    """Return ``path``, or the OIIO_BUILD_TRACE variable, or None to not trace."""
+    if path is None and os.getenv("OIIO_BUILD_TRACE"):
+        path = Path(os.environ["OIIO_BUILD_TRACE"])
+    return path
+
+
+def _wait(process: subprocess.Popen) -> Optional[int]:
+    """Wait for ``process``, returning the peak RSS of its process tree in bytes."""
+    if not hasattr(os, "wait4"):
+        process.wait()
+        return None
+    _, status, usage = os.wait4(process.pid, 0)
+    if os.WIFSIGNALED(status):
+        process.returncode = -os.WTERMSIG(status)
+    else:
+        process.returncode = os.WEXITSTATUS(status)
+    # Kilobytes on Linux, bytes on macOS.
+    return usage.ru_maxrss * (1 if platform.system() == "Darwin" else 1024)
+
+
+class BuildTrace:
+    """Thread-safe record of recipe build phases."""
+
+    def __init__(self, label: str, jobs: Optional[int] = None) -> None:
+        self.label = label
+        self.jobs = jobs
+        self.started = time.time()
+        self.recipes: Dict[str, Dict[str, Any]] = {}
+        self.events: List[Dict[str, Any]] = []
+        self._lock = threading.Lock()
+
+    def add_recipe(self, name: str, version: str, requires: Sequence[str]) -> None:
+        """Declare recipe ``name``, and the recipes it requires."""
+        with self._lock:
+            self.recipes[name] = {
+                "version": version,
+                "requires": list(requires),
+                "cached": False,
+                "peak_rss": None,
+            }
+
+    def add(
+        self,
+        recipe: str,
+        phase: str,
+        start: float,
+        end: float,
+        peak_rss: Optional[int] = None,
+    ) -> None:
+        """Record ``phase`` of ``recipe``, from ``start`` to ``end`` epoch seconds."""
+        with self._lock:
+            self.events.append(
+                {
+                    "recipe": recipe,
+                    "phase": phase,
+                    "start": start,
+                    "end": end,
+                    "peak_rss": peak_rss,
+                }
+            )
+            info = self.recipes.setdefault(
+                recipe, {"requires": [], "cached": False, "peak_rss": None}
+            )
+            if peak_rss is not None:
+                info["peak_rss"] = max(info["peak_rss"] or 0, peak_rss)
+
+    def set_cached(self, recipe: str) -> None:
+        """Mark ``recipe`` as restored from the build cache."""
+        with self._lock:
+            self.recipes[recipe]["cached"] = True
+
+    @contextlib.contextmanager
+    def phase(self, recipe: str, phase: str) -> Iterator[None]:
+        """Record the time spent in the ``with`` block as ``phase`` of ``recipe``."""
+        start = time.time()
+        try:
+            yield
+        finally:
+            self.add(recipe, phase, start, time.time())
+
+    def run(
+        self,
+        recipe: str,
+        phase: str,
+        cmd: Sequence[str],
+        output=None,
+        markers: Sequence[Tuple[str, str]] = (),
+    ) -> None:
+        """
+        Run ``cmd`` like ``subprocess.run(cmd, check=True)``, recording ``phase``.
+
+        Output goes to the ``output`` file, or to stdout. A line containing one
+        of the ``markers`` text ends the current phase and starts the phase
+        given with it, e.g. :data:`CMAKE_MARKERS` splits ``conan build`` into
+        configure and compile. The peak RSS is recorded on the last phase.
+        """
+        if output is None:
+            output = sys.stdout
+        output.flush()
+        start = time.time()
+        process = subprocess.Popen(
+            cmd, stdout=subprocess.PIPE, stderr=subprocess.STDOUT
+        )
+        try:
+            for line in process.stdout:
+                text = line.decode("utf8", "replace")
+                output.write(text)
+                for marker, next_phase in markers:
+                    if marker in text:
+                        now = time.time()
+                        self.add(recipe, phase, start, now)
+                        phase, start = next_phase, now
+            output.flush()
+        finally:
+            process.stdout.close()
+            peak_rss = _wait(process)
+            self.add(recipe, phase, start, time.time(), peak_rss)
+        if process.returncode:
+            raise subprocess.CalledProcessError(process.returncode, cmd)
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Return the trace as JSON-serializable data."""
+        with self._lock:
+            recipes = {name: dict(info) for name, info in self.recipes.items()}
+            events = sorted(self.events, key=lambda event: event["start"])
+        for name, info in recipes.items():
+            spans = [e for e in events if e["recipe"] == name]
+            if spans:
+                info["start"] = min(e["start"] for e in spans)
+                info["end"] = max(e["end"] for e in spans)
+        return {
+            "label": self.label,
+            "host": platform.node(),
+            "platform": f"{platform.system()}-{platform.machine()}",
+            "cpu_count": os.cpu_count(),
+            "jobs": self.jobs,
+            "started": self.started,
+            "ended": max([e["end"] for e in events], default=self.started),
+            "recipes": recipes,
+            "events": events,
+        }
+
+    def save(self, folder: Path) -> Path:
+        """
+        Write the trace to ``folder/<label>-<time>.json``, and its Chrome
+        trace-format export next to it, returning the JSON trace path.
+        """
+        folder = Path(folder)
+        folder.mkdir(parents=True, exist_ok=True)
+        stamp = time.strftime("%Y%m%d-%H%M%S", time.localtime(self.started))
+        path = folder / f"{self.label}-{stamp}.json"
+        data = self.to_dict()
+        path.write_text(json.dumps(data, indent=2), encoding="utf8")
+        chrome_path = path.with_suffix(".chrome.json")
+        chrome_path.write_text(json.dumps(chrome_trace([data])), encoding="utf8")
+        return path
+
+
+def critical_path(trace: Dict[str, Any]) -> Tuple[List[str], float]:
+    """
+    Return the chain of dependent recipes taking the longest time in
+    ``trace``, and its duration in seconds. No build can finish sooner
+    than this chain, whatever the number of cores.
+    """
+    recipes = trace["recipes"]
+    durations = {
+        name: info["end"] - info["start"]
+        for name, info in recipes.items()
+        if "start" in info
+    }
+    longest: Dict[str, Tuple[float, List[str]]] = {}
+
+    def _longest(name: str) -> Tuple[float, List[str]]:
+        if name not in longest:
+            before = max(
+                (_longest(dep) for dep in recipes[name]["requires"] if dep in recipes),
+                default=(0.0, []),
+            )
+            longest[name] = (before[0] + durations.get(name, 0.0), before[1] + [name])
+        return longest[name]
+
+    seconds, path = max((_longest(name) for name in recipes), default=(0.0, []))
+    return path, seconds
+
+
+def _phase_times(trace: Dict[str, Any], recipe: str) -> Dict[str, float]:
+    times: Dict[str, float] = {}
+    for event in trace["events"]:
+        if event["recipe"] == recipe:
+            seconds = event["end"] - event["start"]
+            times[event["phase"]] = times.get(event["phase"], 0.0) + seconds
+    return times
+
+
+def summary(trace: Dict[str, Any]) -> str:
+    """Return the phase times and peak RSS of each recipe, and the critical path."""
+    phases = [p for p in PHASES if any(e["phase"] == p for e in trace["events"])]
+    phases += sorted({e["phase"] for e in trace["events"]} - set(phases))
+    lines = [
+        f"Build trace {trace['label']}: {trace['ended'] - trace['started']:.1f}s "
+        f"wall, {trace['jobs']} jobs on {trace['cpu_count']} cores",
+        f"  {'recipe':<16}" + "".join(f"{p:>14}" for p in phases) + f"{'peak RSS':>12}",
+    ]
+    totals = dict.fromkeys(phases, 0.0)
+    for name, info in trace["recipes"].items():
+        times = _phase_times(trace, name)
+        row = f"  {name:<16}"
+        for phase in phases:
+            totals[phase] += times.get(phase, 0.0)
+            row += f"{times[phase]:13.1f}s" if phase in times else f"{'-':>14}"
+        rss = info.get("peak_rss")
+        row += f"{rss / 2**20:9.0f} MiB" if rss else f"{'-':>12}"
+        lines.append(row)
+    lines.append(f"  {'total':<16}" + "".join(f"{totals[p]:13.1f}s" for p in phases))
+    path, seconds = critical_path(trace)
+    if path:
+        lines.append(f"  Critical path ({seconds:.1f}s): {' -> '.join(path)}")
+    return "\n".join(lines)
+
+
+def chrome_trace(traces: Sequence[Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    Return ``traces`` in the Chrome trace event format, one process per trace
+    and one thread per recipe.
+    """
+    events: List[Dict[str, Any]] = []
+    for pid, trace in enumerate(traces, 1):
+        events.append(
+            {
+                "name": "process_name",
+                "ph": "M",
+                "pid": pid,
+                "args": {"name": trace["label"]},
+            }
+        )
+        tids = {name: tid for tid, name in enumerate(trace["recipes"], 1)}
+        for name, tid in tids.items():
+            events.append(
+                {
+                    "name": "thread_name",
+                    "ph": "M",
+                    "pid": pid,
+                    "tid": tid,
+                    "args": {"name": name},
+                }
+            )
+        for event in trace["events"]:
+            events.append(
+                {
+                    "name": event["phase"],
+                    "cat": event["recipe"],
+                    "ph": "X",
+                    "ts": int(event["start"] * 1e6),
+                    "dur": int((event["end"] - event["start"]) * 1e6),
+                    "pid": pid,
+                    "tid": tids.get(event["recipe"], 0),
+                    "args": {"peak_rss": event["peak_rss"]},
+                }
+            )
+    return {"traceEvents": events, "displayTimeUnit": "ms"}
+
+
+def _main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Summarize build traces and merge them into a Chrome trace."
+    )
+    parser.add_argument("traces", nargs="+", type=Path, help="JSON build traces.")
+    parser.add_argument(
+        "--chrome", type=Path, default=None, help="Write a merged Chrome trace."
+    )
+    args = parser.parse_args()
+
+    traces = [
+        json.loads(path.read_text(encoding="utf8"))
+        for path in args.traces
+        if not path.name.endswith(".chrome.json")
+    ]
+    traces.sort(key=lambda trace: trace["started"])
+    for trace in traces:
+        print(summary(trace))
+    if len(traces) > 1:
+        # Traced runs follow each other, so their critical paths add up.
+        seconds = sum(critical_path(trace)[1] for trace in traces)
+        print(f"Critical path of all traces: {seconds:.1f}s")
+    if args.chrome is not None:
+        args.chrome.write_text(json.dumps(chrome_trace(traces)), encoding="utf8")
+
+
+if __name__ == "__main__":
+    _main()
@@ -1,11 +1,16 @@
 """Utility functions for building and managing Conan packages."""
 
+import contextlib
 import os
 import time
 import platform
 import shutil
 import subprocess
+import threading
 from pathlib import Path
+from typing import Callable, Dict, Iterator, List, Optional
+
+from setuputils.build_trace import CMAKE_MARKERS, BuildTrace
 
 project = Path(__file__).parent.resolve()
 
@@ -100,17 +105,8 @@ def build_cleanup(recipe_dir: Path) -> None:
             retry += 1
 
 
-def conan_install_package(
-    root_folder: Path,
-    version: str,
-    profile: str,
-    source: bool = True,
-    export: bool = True,
-    to_build=None,
-) -> None:
-    """Build and install a Conan package with specified version and profile."""
-
-    source_cmd = [
+def _conan_source_cmd(root_folder: Path, version: str) -> List[str]:
+    return [
         "conan",
         "source",
         root_folder.as_posix(),
@@ -118,14 +114,17 @@ def conan_install_package(
         version,
         # "-vwarning",
     ]
+
+
+def _conan_install_cmd(
+    root_folder: Path,
+    version: str,
+    profile: str,
+    to_build=None,
+    jobs: Optional[int] = None,
+) -> List[str]:
     if to_build is None:
         to_build = ["missing"]
-    build_arg_list = []
-    # Without boost, build=missing seems to work on linux!
-    for b in to_build:
-        build_arg = f"--build={b}"
-        build_arg_list.append(build_arg)
-
     install_cmd = [
         "conan",
         "install",
@@ -135,8 +134,91 @@ def conan_install_package(
         "--profile",
         profile,
     ]
+    # Without boost, build=missing seems to work on linux!
+    install_cmd += [f"--build={b}" for b in to_build]
+    if jobs:
+        install_cmd += ["-c", f"tools.build:jobs={jobs}"]
+    return install_cmd
 
-    install_cmd += build_arg_list
+
+@contextlib.contextmanager
+def _conan_runner(
+    root_folder: Path,
+    log_file: Optional[Path] = None,
+    trace: Optional[BuildTrace] = None,
+) -> Iterator[Callable[..., None]]:
+    """Yield ``run(cmd, phase, markers=())``, logging to ``log_file`` if given."""
+    with contextlib.ExitStack() as stack:
+        output = None
+        if log_file is not None:
+            output = stack.enter_context(open(log_file, "a", encoding="utf8"))
+
+        def run(cmd, phase, markers=()):
+            if output is not None:
+                output.write(f"$ {' '.join(cmd)}\n")
+                output.flush()
+            if trace is not None:
+                trace.run(root_folder.name, phase, cmd, output, markers)
+            else:
+                subprocess.run(cmd, check=True, stdout=output, stderr=output)
+
+        yield run
+
+
+def conan_install_requirements(
+    root_folder: Path,
+    version: str,
+    profile: str,
+    source: bool = True,
+    to_build=None,
+    jobs: Optional[int] = None,
+    log_file: Optional[Path] = None,
+    cache_lock: Optional[threading.Lock] = None,
+    trace: Optional[BuildTrace] = None,
+) -> None:
+    """
+    Fetch the sources of a Conan recipe and install its requirements, building
+    the missing ones, without building the recipe.
+
+    Run before compiling recipes concurrently, so that the requirements built
+    from source get all the ``jobs`` cores, then call
+    :func:`conan_install_package` with ``source=False``. Arguments are the same.
+    """
+    source_cmd = _conan_source_cmd(root_folder, version)
+    install_cmd = _conan_install_cmd(root_folder, version, profile, to_build, jobs)
+    if cache_lock is None:
+        cache_lock = contextlib.nullcontext()
+
+    with _conan_runner(root_folder, log_file, trace) as run:
+        if source:
+            run(source_cmd, "source")
+        with cache_lock:
+            run(install_cmd, "install")
+
+
+def conan_install_package(
+    root_folder: Path,
+    version: str,
+    profile: str,
+    source: bool = True,
+    export: bool = True,
+    to_build=None,
+    jobs: Optional[int] = None,
+    log_file: Optional[Path] = None,
+    cache_lock: Optional[threading.Lock] = None,
+    trace: Optional[BuildTrace] = None,
+) -> None:
+    """
+    Build and install a Conan package with specified version and profile.
+
+    ``jobs`` sets Conan's ``tools.build:jobs``. Output goes to ``log_file`` when
+    given. ``cache_lock`` is held while installing and exporting, which write to
+    the Conan cache, when several packages build concurrently. Phases are
+    recorded in ``trace`` under the recipe folder name when given.
+    """
+
+    source_cmd = _conan_source_cmd(root_folder, version)
+    install_cmd = _conan_install_cmd(root_folder, version, profile, to_build, jobs)
 
     build_cmd = [
         "conan",
@@ -157,9 +239,39 @@ def conan_install_package(
         profile,
         # "-vwarning",
     ]
-    if source:
-        subprocess.run(source_cmd, check=True)
-    subprocess.run(install_cmd, check=True)
-    subprocess.run(build_cmd, check=True)
-    if export:
-        subprocess.run(export_cmd, check=True)
+    if jobs:
+        build_cmd += ["-c", f"tools.build:jobs={jobs}"]
+    if cache_lock is None:
+        cache_lock = contextlib.nullcontext()
+
+    with _conan_runner(root_folder, log_file, trace) as run:
+        if source:
+            run(source_cmd, "source")
+        with cache_lock:
+            run(install_cmd, "install")
+        run(build_cmd, "configure", CMAKE_MARKERS)
+        if export:
+            with cache_lock:
+                run(export_cmd, "export-pkg")
+
+
+def ccache_zero_stats() -> None:
+    """Reset ccache statistics, to report the hit rate of the next build."""
+    subprocess.run(["ccache", "--zero-stats"], check=True, capture_output=True)
+
+
+def ccache_stats() -> Dict[str, int]:
+    """Return ccache hits and misses since statistics were last reset (ccache 4.4+)."""
+    output = subprocess.run(
+        ["ccache", "--print-stats"], check=True, capture_output=True, text=True
+    ).stdout
+    counters = {}
+    for line in output.splitlines():
+        name, _, value = line.partition("\t")
+        if value.strip().isdigit():
+            counters[name] = int(value)
+    hits = counters.get("direct_cache_hit", 0) + counters.get(
+        "preprocessed_cache_hit", 0
+    )
+    misses = counters.get("cache_miss", 0)
+    return {"hits": hits, "misses": misses}
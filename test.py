@@ -1,5 +1,8 @@
 import os
 import subprocess
+import sys
+import tempfile
+from pathlib import Path
 
 import numpy as np
 import OpenImageIO as oiio
@@ -37,12 +40,457 @@ def test_numpy():
     buf = oiio.ImageBuf(pixels)
 
 
+def test_numpy_views():
+    rand_img = np.random.rand(128, 128, 3).astype(np.float32)
+    buf = oiio.ImageBuf.wrap(rand_img)
+    rand_img[0, 0] = 1.0
+    assert buf.getpixel(0, 0) == (1.0, 1.0, 1.0)
+    view = buf.localpixels()
+    view[1, 1] = 0.5
+    assert np.all(rand_img[1, 1] == 0.5)
+    assert view.base is buf
+
+
+def test_lazy_import():
+    code = (
+        "import sys, OpenImageIO as oiio, PyOpenColorIO as ocio\n"
+        "assert 'OpenImageIO.OpenImageIO' not in sys.modules\n"
+        "assert oiio.ImageSpec(4, 4, 3, oiio.FLOAT).width == 4\n"
+        "assert oiio.__version__ and ocio.__version__\n"
+    )
+    env = os.environ.copy()
+    env["OIIO_PYTHON_LAZY_IMPORT"] = "1"
+    subprocess.run([sys.executable, "-c", code], check=True, env=env)
+
+    # Tool console scripts don't import the packages before the launch.
+    if os.getenv("OIIO_STATIC") != "1":
+        code = (
+            "import sys, _oiio_python_oiio_tools, _oiio_python_ocio_tools\n"
+            "assert 'OpenImageIO' not in sys.modules\n"
+            "assert 'PyOpenColorIO' not in sys.modules\n"
+            "assert (_oiio_python_oiio_tools.HERE / 'tools').is_dir()\n"
+        )
+        subprocess.run([sys.executable, "-c", code], check=True)
+
+
+def test_batch():
+    from OpenImageIO._bands import band_cache
+    from OpenImageIO.batch import run_batch
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        src = os.path.join(tmp_dir, "src.exr")
+        oiio.ImageBuf(np.random.rand(64, 64, 3).astype(np.float32)).write(src)
+        jobs = [
+            {
+                "input": src,
+                "output": os.path.join(tmp_dir, f"out{i}.tif"),
+                "ops": [{"op": "resize", "width": 32}],
+            }
+            for i in range(4)
+        ]
+        results = list(run_batch(jobs, workers=2))
+        assert all(result["status"] == "ok" for result in results)
+        assert oiio.ImageBuf(jobs[0]["output"]).spec().width == 32
+        # The input is still cached, a later job doesn't read it again.
+        cache = band_cache()
+        bytes_read = cache.getattribute("stat:bytes_read", oiio.TypeInt64)
+        assert bytes_read > 0
+        job = dict(jobs[0], ops=[], output=os.path.join(tmp_dir, "copy.exr"))
+        assert [result["status"] for result in run_batch([job])] == ["ok"]
+        assert cache.getattribute("stat:bytes_read", oiio.TypeInt64) == bytes_read
+        copy = oiio.ImageBuf(job["output"]).get_pixels(oiio.FLOAT)
+        assert np.array_equal(copy, oiio.ImageBuf(src).get_pixels(oiio.FLOAT))
+
+
+def test_convert_tree():
+    from OpenImageIO.convert_tree import convert_tree
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        src_dir = os.path.join(tmp_dir, "src", "shot")
+        os.makedirs(src_dir)
+        for i in range(3):
+            rand_img = np.random.rand(32, 32, 3).astype(np.float32)
+            oiio.ImageBuf(rand_img).write(os.path.join(src_dir, f"frame{i}.tif"))
+        dst_dir = os.path.join(tmp_dir, "dst")
+        report = convert_tree(
+            os.path.join(tmp_dir, "src"), dst_dir, ["tif"], "exr", workers=2
+        )
+        assert report["converted"] == 3 and report["failed"] == 0
+        assert os.path.exists(os.path.join(dst_dir, "shot", "frame0.exr"))
+
+
+def test_streaming_read():
+    from OpenImageIO.streaming import iter_tiles
+
+    rand_img = np.random.rand(100, 150, 4).astype(np.float32)
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        for tiled in (False, True):
+            path = os.path.join(tmp_dir, f"stream{int(tiled)}.exr")
+            buf = oiio.ImageBuf(rand_img)
+            if tiled:
+                buf.set_write_tiles(32, 32)
+            buf.write(path)
+            pixels = np.zeros((100, 150, 3), dtype=np.float32)
+            for roi, chunk in iter_tiles(path, (64, 40), channels=(0, 3)):
+                pixels[roi.ybegin : roi.yend, roi.xbegin : roi.xend] = chunk
+            assert np.array_equal(pixels, rand_img[..., :3])
+
+
+def test_streaming_write():
+    from OpenImageIO.streaming import ImageStreamWriter
+
+    rand_img = np.random.rand(100, 150, 3).astype(np.float32)
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        for tiled in (False, True):
+            path = os.path.join(tmp_dir, f"stream{int(tiled)}.exr")
+            spec = oiio.ImageSpec(150, 100, 3, oiio.FLOAT)
+            if tiled:
+                spec.tile_width = spec.tile_height = 32
+            with ImageStreamWriter(path, spec) as writer:
+                for y in range(0, 100, 64):
+                    for x in range(0, 150, 64):
+                        roi = oiio.ROI(x, min(x + 64, 150), y, min(y + 64, 100))
+                        block = rand_img[roi.ybegin : roi.yend, roi.xbegin : roi.xend]
+                        writer.write(roi, block)
+            assert np.array_equal(oiio.ImageBuf(path).get_pixels(oiio.FLOAT), rand_img)
+
+        # Overlapping blocks don't complete a band that still has a gap.
+        path = os.path.join(tmp_dir, "overlap.exr")
+        with ImageStreamWriter(path, oiio.ImageSpec(150, 100, 3, oiio.FLOAT)) as writer:
+            for x, xend in ((0, 100), (50, 100), (100, 150)):
+                writer.write(oiio.ROI(x, xend, 0, 100), rand_img[:, x:xend])
+        assert np.array_equal(oiio.ImageBuf(path).get_pixels(oiio.FLOAT), rand_img)
+
+
+def test_processor_cache():
+    from PyOpenColorIO.processor_cache import ProcessorCache
+
+    cache = ProcessorCache(maxsize=4)
+    config = ocio.Config.CreateRaw()
+    first = cache.get_cpu_processor("raw", "raw", config=config)
+    second = cache.get_cpu_processor("raw", "raw", config=config)
+    assert first is second
+    assert cache.stats()["hits"] == 1
+
+
+def test_numpy_apply():
+    from PyOpenColorIO.numpy_apply import apply, apply_inplace
+
+    config = ocio.Config.CreateFromBuiltinConfig("cg-config-v2.1.0_aces-v1.3_ocio-v2.3")
+    processor = config.getProcessor("ACEScg", "sRGB - Texture")
+    rand_img = np.random.rand(100, 150, 4).astype(np.float32)
+    expected = rand_img.copy()
+    processor.getDefaultCPUProcessor().applyRGBA(expected)
+    assert np.allclose(apply(processor, rand_img, rows=16), expected, atol=1e-5)
+    assert np.allclose(apply_inplace(processor, rand_img, rows=16), expected, atol=1e-5)
+
+
+def test_metadata_index():
+    from OpenImageIO.metadata_index import connect, query, scan
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        for size, compression in ((64, "dwaa"), (32, "zip")):
+            buf = oiio.ImageBuf(np.zeros((size, size, 3), dtype=np.float32))
+            buf.specmod().attribute("compression", compression)
+            buf.write(os.path.join(tmp_dir, f"{compression}.exr"))
+        db = connect(os.path.join(tmp_dir, "index.db"))
+        assert scan(db, [tmp_dir], workers=1)["scanned"] == 2
+        assert scan(db, [tmp_dir], workers=1)["skipped"] == 2
+        rows = query(db, format="openexr", min_width=64, compression="dwaa")
+        assert [os.path.basename(row["path"]) for row in rows] == ["dwaa.exr"]
+        db.close()
+
+
+def test_dedupe():
+    from OpenImageIO.dedupe import dedupe, fingerprint, hamming
+
+    rand_img = np.random.rand(64, 96, 3).astype(np.float32)
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        paths = [os.path.join(tmp_dir, f"{name}.exr") for name in "abc"]
+        for path, compression in zip(paths, ("zip", "piz")):
+            buf = oiio.ImageBuf(rand_img)
+            buf.specmod().attribute("compression", compression)
+            buf.write(path)
+        oiio.ImageBuf(np.random.rand(64, 96, 3).astype(np.float32)).write(paths[2])
+        report = dedupe(paths, workers=2, near=True)
+        assert report["duplicates"] == [paths[:2]]
+        assert hamming(fingerprint(paths[0]), fingerprint(paths[1])) == 0
+
+
+def test_compare_tree():
+    from OpenImageIO import compare_tree
+    from OpenImageIO._bands import band_cache
+    from OpenImageIO.compare_tree import compare_images, compare_trees
+
+    rand_img = np.random.rand(512, 64, 3).astype(np.float32)
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        for name, offset in (("same", 0.0), ("diff", 0.5)):
+            for tree in ("ref", "test"):
+                os.makedirs(os.path.join(tmp_dir, tree), exist_ok=True)
+                pixels = rand_img + (offset if tree == "test" else 0.0)
+                oiio.ImageBuf(pixels).write(os.path.join(tmp_dir, tree, f"{name}.exr"))
+        cache = band_cache()
+        bytes_read = cache.getattribute("stat:bytes_read", oiio.TypeInt64)
+        diff = compare_images(
+            os.path.join(tmp_dir, "ref", "diff.exr"),
+            os.path.join(tmp_dir, "test", "diff.exr"),
+            rows=16,
+        )
+        assert diff["status"] == "fail" and diff["early_exit"]
+        # Only the first band of rows of each file was decoded.
+        bytes_read = cache.getattribute("stat:bytes_read", oiio.TypeInt64) - bytes_read
+        assert 0 < bytes_read < rand_img.nbytes // 2
+        report = compare_trees(
+            os.path.join(tmp_dir, "ref"), os.path.join(tmp_dir, "test"), workers=2
+        )
+        assert report["summary"]["pass"] == 1 and report["summary"]["fail"] == 1
+
+        # Failing comparisons release their files from the cache too.
+        small = os.path.join(tmp_dir, "small.exr")
+        oiio.ImageBuf(rand_img[:32]).write(small)
+        invalidated = []
+
+        class RecordingCache:
+            def __getattr__(self, name):
+                return getattr(cache, name)
+
+            def invalidate(self, path):
+                invalidated.append(path)
+                cache.invalidate(path)
+
+        ref = os.path.join(tmp_dir, "ref", "same.exr")
+        compare_tree.band_cache = RecordingCache
+        try:
+            assert compare_images(ref, small)["status"] == "fail"
+        finally:
+            compare_tree.band_cache = band_cache
+        assert sorted(invalidated) == sorted([ref, small])
+
+
+def test_cache_server():
+    if sys.platform == "win32":
+        return
+    from OpenImageIO.cache_server import CacheClient, CacheServer, spawn_server
+
+    rand_img = np.random.rand(100, 80, 3).astype(np.float32)
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        path = os.path.join(tmp_dir, "cached.exr")
+        oiio.ImageBuf(rand_img).write(path)
+        socket_path = os.path.join(tmp_dir, "cache.sock")
+        server = spawn_server(socket_path, max_memory_mb=64)
+        assert os.stat(socket_path).st_mode & 0o777 == 0o600
+        with CacheClient(socket_path) as client:
+            pixels = client.get_pixels(path, 0, 0, 10, 50, 20, 60)
+            assert np.array_equal(pixels, rand_img[20:60, 10:50])
+            assert client.get_imagespec(path).width == 80
+            client.shutdown()
+        assert server.wait(10) == 0
+        # A path that isn't a socket is never taken over.
+        not_socket = os.path.join(tmp_dir, "not-a-socket")
+        Path(not_socket).write_text("keep")
+        try:
+            CacheServer(not_socket)
+        except RuntimeError:
+            pass
+        else:
+            raise AssertionError("expected RuntimeError")
+        assert Path(not_socket).read_text() == "keep"
+
+
+def test_cache_tuning():
+    from OpenImageIO.cache_tuning import apply_profile, cache_stats, to_prometheus
+
+    cache = oiio.ImageCache(False)
+    apply_profile("streaming", cache, max_memory_MB=100.0)
+    assert cache.getattribute("max_memory_MB") == 100.0
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        path = os.path.join(tmp_dir, "stats.exr")
+        oiio.ImageBuf(np.random.rand(32, 32, 3).astype(np.float32)).write(path)
+        for _ in range(2):
+            cache.get_pixels(path, 0, 0, 0, 32, 0, 32, 0, 1, oiio.FLOAT)
+        stats = cache_stats(cache)
+        cache.invalidate(path)
+    assert stats["unique_files"] == 1 and stats["hit_rate"] > 0.0
+    assert "oiio_imagecache_bytes_read " in to_prometheus(stats)
+    oiio.ImageCache.destroy(cache)
+
+
+def test_make_textures():
+    from OpenImageIO.make_textures import make_textures, output_paths
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        sources = []
+        for name in ("a", "b"):
+            sources.append(os.path.join(tmp_dir, f"{name}.exr"))
+            oiio.ImageBuf(np.random.rand(32, 32, 3).astype(np.float32)).write(
+                sources[-1]
+            )
+        out_dir = os.path.join(tmp_dir, "tx")
+        assert make_textures(sources, out_dir, workers=2)["converted"] == 2
+        assert make_textures(sources, out_dir, workers=2)["skipped"] == 2
+        oiio.ImageBuf(np.random.rand(32, 32, 3).astype(np.float32)).write(sources[0])
+        report = make_textures(sources, out_dir, workers=2)
+        assert report["converted"] == 1 and report["skipped"] == 1
+        assert oiio.ImageInput.open(os.path.join(out_dir, "a.tx")).spec().tile_width
+
+    # The layout under the common parent of the sources is kept in out_dir.
+    outputs = output_paths(["/tex/a/wood.png", "/tex/b/wood.png"], Path("/tx"))
+    assert sorted(outputs.values()) == [
+        os.path.abspath(p) for p in ("/tx/a/wood.tx", "/tx/b/wood.tx")
+    ]
+    for sources, base_dir in (
+        (["/tex/wood.png", "/tex/wood.exr"], None),
+        (["/tex/a/wood.png", "/other/wood.png"], Path("/tex")),
+    ):
+        try:
+            output_paths(sources, Path("/tx"), base_dir)
+        except ValueError:
+            pass
+        else:
+            raise AssertionError(f"{sources} should not be accepted.")
+    # A .tx source maps onto itself next to it or when out_dir is base_dir.
+    for out_dir in (None, Path("/tex")):
+        try:
+            output_paths(["/tex/wood.tx"], out_dir, Path("/tex"))
+        except ValueError:
+            pass
+        else:
+            raise AssertionError("/tex/wood.tx should not overwrite itself.")
+
+
+def test_aio():
+    import asyncio
+
+    from OpenImageIO import aio
+    from OpenImageIO.aio import AsyncImageIO
+
+    rand_img = np.random.rand(64, 48, 3).astype(np.float32)
+
+    async def _roundtrip(tmp_dir):
+        src = os.path.join(tmp_dir, "src.exr")
+        oiio.ImageBuf(rand_img).write(src)
+        async with AsyncImageIO(max_workers=2, max_inflight_mb=1) as io:
+            assert (await io.read_spec(src)).width == 48
+            bufs = await asyncio.gather(*(io.read(src) for _ in range(4)))
+            await io.write(bufs[0], os.path.join(tmp_dir, "dst.exr"))
+            assert io.inflight_bytes == 0
+        return bufs[0].get_pixels(oiio.FLOAT)
+
+    async def _module_reads(src):
+        bufs = await asyncio.gather(*(aio.read(src) for _ in range(4)))
+        return bufs[0].get_pixels(oiio.FLOAT)
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        assert np.array_equal(asyncio.run(_roundtrip(tmp_dir)), rand_img)
+        # The default instance must not carry its byte budget across loops.
+        aio.configure(max_workers=2, max_inflight_mb=0.001)
+        try:
+            for _ in range(2):
+                src = os.path.join(tmp_dir, "src.exr")
+                assert np.array_equal(asyncio.run(_module_reads(src)), rand_img)
+        finally:
+            aio.configure()
+
+
+def test_thumbnails():
+    from OpenImageIO.thumbnails import load_reduced, thumbnails
+
+    rand_img = np.random.rand(512, 768, 3).astype(np.float32)
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        src = os.path.join(tmp_dir, "src.tx")
+        oiio.ImageBufAlgo.make_texture(oiio.MakeTxTexture, oiio.ImageBuf(rand_img), src)
+        buf, method = load_reduced(src, 128)
+        assert method == "mip" and buf.spec().width == 192
+        cache_dir = os.path.join(tmp_dir, "cache")
+        report = thumbnails([src], cache_dir, size=128, workers=1)
+        assert report["generated"] == 1
+        thumb = oiio.ImageBuf(report["paths"][src])
+        assert (thumb.spec().width, thumb.spec().height) == (128, 85)
+        assert thumbnails([src], cache_dir, size=128, workers=1)["cached"] == 1
+
+
+def test_rawframe():
+    from OpenImageIO.rawframe import open_frame, open_imagebuf, write_frame
+
+    rand_img = np.random.rand(48, 64, 4).astype(np.float16)
+    buf = oiio.ImageBuf(rand_img)
+    buf.specmod().attribute("compression", "zip")
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        path = os.path.join(tmp_dir, "frame.oiioraw")
+        write_frame(path, buf)
+        pixels, spec = open_frame(path)
+        assert pixels.dtype == np.float16 and np.array_equal(pixels, rand_img)
+        assert spec.get_string_attribute("compression") == "zip"
+        frame = open_imagebuf(path)
+        assert frame.spec().format == oiio.HALF
+        assert np.array_equal(frame.get_pixels(oiio.HALF), rand_img)
+        del pixels, frame
+
+
+def test_memory_io():
+    from OpenImageIO import memory_io
+
+    rand_img = np.random.rand(32, 48, 3).astype(np.float32)
+    buf = oiio.ImageBuf(rand_img)
+    for ext, dtype in (("png", oiio.UINT16), ("exr", oiio.FLOAT)):
+        data = memory_io.write(buf, ext, dtype)
+        assert memory_io.guess_format(data) == ext
+        spec = memory_io.read_spec(data)
+        assert (spec.width, spec.height, spec.nchannels) == (48, 32, 3)
+        pixels = memory_io.read(memoryview(data)).get_pixels(oiio.FLOAT)
+        assert np.allclose(pixels, rand_img, atol=1e-4)
+
+
+def test_thread_tuning():
+    import time
+    import warnings
+
+    from OpenImageIO._workers import cpu_count
+    from OpenImageIO.thread_tuning import (
+        OversubscriptionMonitor,
+        check_oversubscription,
+        sweep,
+    )
+
+    report = sweep(["resize", "make_texture"], size=64, workers=[1, 2], threads=[1])
+    assert len(report["results"]["resize"]) == 2
+    assert report["best"]["make_texture"]["threads"] == 1
+    with warnings.catch_warnings(record=True) as caught:
+        warnings.simplefilter("always")
+        assert not check_oversubscription(1, 1)
+        assert check_oversubscription(cpu_count() + 1, 1)
+    assert len(caught) == 1 and issubclass(caught[0].category, RuntimeWarning)
+    assert os.path.samefile(caught[0].filename, __file__)
+    with OversubscriptionMonitor(interval=0.01, callback=lambda *_: None) as monitor:
+        time.sleep(0.05)
+    assert monitor.peak >= 0
+
+
 def main():
     # Test tools
     if os.getenv("OIIO_STATIC") != "1":
         test_tools()
 
     test_numpy()
+    test_numpy_views()
+    test_lazy_import()
+    test_batch()
+    test_convert_tree()
+    test_streaming_read()
+    test_streaming_write()
+    test_processor_cache()
+    test_numpy_apply()
+    test_metadata_index()
+    test_dedupe()
+    test_compare_tree()
+    test_cache_server()
+    test_cache_tuning()
+    test_make_textures()
+    test_aio()
+    test_thumbnails()
+    test_rawframe()
+    test_memory_io()
+    test_thread_tuning()
 
     config = ocio.GetCurrentConfig()
     print("Config: ", config)
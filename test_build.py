@@ -0,0 +1,201 @@
+"""
+Tests of the build scripts in setuputils, run from a source checkout.
+
+They don't need Conan nor a built wheel, unlike test.py which checks the
+installed packages.
+"""
+
+import contextlib
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+
+@contextlib.contextmanager
+def stub_conan(failing=(), seconds=0.0):
+    """
+    Replace the Conan steps of build_graph, yielding the names of the built
+    recipes and the peak number of recipes building at once.
+    """
+    from setuputils import build_cache, build_graph
+
+    built = []
+    state = {"running": 0, "peak": 0}
+    lock = threading.Lock()
+
+    def install_package(folder, version, **kwargs):
+        with lock:
+            state["running"] += 1
+            state["peak"] = max(state["peak"], state["running"])
+        try:
+            time.sleep(seconds)
+            if folder.name in failing:
+                raise RuntimeError(f"{folder.name} failed")
+            built.append(folder.name)
+        finally:
+            with lock:
+                state["running"] -= 1
+
+    stubs = {
+        (build_graph, "conan_install_package"): install_package,
+        (build_graph, "conan_install_requirements"): lambda *args, **kwargs: None,
+        (build_graph, "build_cleanup"): lambda folder: None,
+        (build_cache, "restore"): lambda *args: False,
+        (build_cache, "store"): lambda *args: None,
+    }
+    saved = {target: getattr(*target) for target in stubs}
+    for (module, name), stub in stubs.items():
+        setattr(module, name, stub)
+    try:
+        yield built, state
+    finally:
+        for (module, name), value in saved.items():
+            setattr(module, name, value)
+
+
+def recipes(tmp, requires):
+    """Return a Recipe per name of ``requires``, in a folder of ``tmp``."""
+    from setuputils.build_graph import Recipe
+
+    result = []
+    for name, deps in requires.items():
+        folder = Path(tmp) / name
+        folder.mkdir()
+        (folder / "conanfile.py").write_text(f"# {name}")
+        result.append(Recipe(name, folder, "1.0", requires=deps))
+    return result
+
+
+def test_build_cache_key():
+    from setuputils.build_cache import python_tag, recipe_key
+
+    with tempfile.TemporaryDirectory() as tmp:
+        folder = Path(tmp) / "recipe"
+        folder.mkdir()
+        (folder / "conanfile.py").write_text("# recipe")
+        key = recipe_key(folder, "1.0", "default", interpreter=python_tag())
+        assert key == recipe_key(folder, "1.0", "default", interpreter=python_tag())
+        assert key != recipe_key(folder, "1.0", "default")
+        other = recipe_key(
+            folder,
+            "1.0",
+            "default",
+            interpreter="cpython-313 .cpython-313-x86_64-linux-gnu.so",
+        )
+        assert other != recipe_key(
+            folder,
+            "1.0",
+            "default",
+            interpreter="cpython-312 .cpython-312-x86_64-linux-gnu.so",
+        )
+        assert python_tag().startswith(sys.implementation.cache_tag)
+
+
+def test_build_graph_levels():
+    from setuputils.build_graph import _levels
+
+    with tempfile.TemporaryDirectory() as tmp:
+        graph = recipes(tmp, {"c": ("a", "b"), "a": (), "b": ("a",)})
+        assert [[r.name for r in level] for level in _levels(graph)] == [
+            ["a"],
+            ["b"],
+            ["c"],
+        ]
+    for requires, error in (
+        ({"a": ("missing",)}, "unknown"),
+        ({"a": ("b",), "b": ("a",)}, "cycle"),
+    ):
+        with tempfile.TemporaryDirectory() as tmp:
+            try:
+                _levels(recipes(tmp, requires))
+            except ValueError as e:
+                assert error in str(e)
+            else:
+                raise AssertionError(f"expected a ValueError for {requires}")
+
+
+def test_build_graph_schedule():
+    from setuputils.build_graph import build_graph
+
+    with tempfile.TemporaryDirectory() as tmp:
+        graph = recipes(tmp, {name: () for name in "abcd"})
+        with stub_conan(seconds=0.05) as (built, state):
+            timings = build_graph(graph, "default", jobs=2, force=True)
+        assert sorted(built) == list("abcd") and sorted(timings) == list("abcd")
+        assert state["peak"] == 2
+
+    with tempfile.TemporaryDirectory() as tmp:
+        graph = recipes(tmp, {"a": (), "b": ("a",), "c": ("b",), "d": ()})
+        with stub_conan(failing=("a",)) as (built, _):
+            try:
+                build_graph(graph, "default", jobs=2, force=True)
+            except RuntimeError as e:
+                message = str(e)
+            else:
+                raise AssertionError("expected a RuntimeError")
+        assert built == ["d"]
+        assert "a: a failed" in message
+        assert "b: not built, a dependency failed" in message
+        assert "c: not built, a dependency failed" in message
+
+
+def test_build_trace():
+    import io
+    import subprocess
+
+    from setuputils.build_trace import BuildTrace, critical_path, summary
+
+    trace = BuildTrace("test", jobs=2)
+    trace.add_recipe("a", "1.0", [])
+    trace.add_recipe("b", "1.0", ["a"])
+    trace.add_recipe("c", "1.0", [])
+    output = io.StringIO()
+    script = "import time; print('configuring'); time.sleep(0.05); print('BUILD')"
+    trace.run(
+        "a", "configure", [sys.executable, "-c", script], output, [("BUILD", "compile")]
+    )
+    assert output.getvalue().splitlines() == ["configuring", "BUILD"]
+    phases = [event["phase"] for event in trace.to_dict()["events"]]
+    assert phases == ["configure", "compile"]
+    try:
+        trace.run("c", "source", [sys.executable, "-c", "raise SystemExit(3)"], output)
+    except subprocess.CalledProcessError as e:
+        assert e.returncode == 3
+    else:
+        raise AssertionError("expected a CalledProcessError")
+
+    # A chain a -> b taking 5s, and c alone taking 4s.
+    synthetic = {
+        "label": "synthetic",
+        "jobs": 2,
+        "cpu_count": 2,
+        "started": 0.0,
+        "ended": 5.0,
+        "recipes": {
+            "a": {"requires": [], "start": 0.0, "end": 2.0, "peak_rss": None},
+            "b": {"requires": ["a"], "start": 2.0, "end": 5.0, "peak_rss": 2**20},
+            "c": {"requires": [], "start": 0.0, "end": 4.0, "peak_rss": None},
+        },
+        "events": [
+            {"recipe": "a", "phase": "compile", "start": 0.0, "end": 2.0},
+            {"recipe": "b", "phase": "compile", "start": 2.0, "end": 5.0},
+            {"recipe": "c", "phase": "source", "start": 0.0, "end": 4.0},
+        ],
+    }
+    assert critical_path(synthetic) == (["a", "b"], 5.0)
+    text = summary(synthetic)
+    assert "Critical path (5.0s): a -> b" in text
+    assert "1 MiB" in text
+
+
+def main():
+    test_build_cache_key()
+    test_build_graph_levels()
+    test_build_graph_schedule()
+    test_build_trace()
+
+
+if __name__ == "__main__":
+    main()